@@ -3,15 +3,17 @@ import json
 import base64
 import io
 import re
+import threading
+import time
 import traceback
+import zipfile
 from datetime import datetime, timedelta
 import google.generativeai as genai
-from flask import Flask, request, jsonify, render_template, send_from_directory, session, redirect, url_for
+from flask import Flask, Response, g, request, jsonify, render_template, send_from_directory, session, redirect, url_for
 from flask_cors import CORS
-import tensorflow as tf
 from PIL import Image
 import numpy as np
-from database import DatabaseManager
+from database import DatabaseManager, next_page_token
 from security_utils import (
     sanitize_message, sanitize_description, sanitize_text,
     validate_numeric, validate_integer, validate_date,
@@ -19,6 +21,29 @@ from security_utils import (
     validate_longitude, validate_enum
 )
 from rate_limiter import check_rate_limit, record_api_call, get_rate_limit_info
+from write_behind import queue_prediction
+from event_hub import event_hub, format_sse
+from query_stats import query_stats, get_query_stats
+from inference_engine import get_pool_config
+from inference_server import RemoteInferenceClient, get_authkey
+from model_backend import load_inference_engine
+from image_pipeline import decode_base64_image, process_image
+from upload_stream import UploadError, UploadTooLarge, ZIP_TYPES, spool_request
+from prediction_cache import prediction_cache, perceptual_hash
+from blob_store import store_upload, thumbnail_url
+from prediction_jobs import prediction_jobs, submit_job
+from enrichment import EnrichmentCall, enrichment_executor, fan_out
+from llm_client import generate_text, llm_client
+from knowledge_cache import knowledge_cache
+from translation_service import translate_fields
+from treatment_catalog import (
+    TREATMENT_PROMPT_VERSION, build_treatment_prompt, clean_gemini_text, get_cached_treatment, is_complete,
+    parse_gemini_response
+)
+from batch_predict import (
+    BATCH_DECODE_WORKERS, BATCH_MAX_CONCURRENT, BATCH_MAX_MEMBER_BYTES, BATCH_MAX_MEMBERS, BATCH_UPLOAD_MAX_BYTES,
+    count_archive_images, csv_rows, error_row, iter_image_sources, jsonl_rows, score_images
+)
 
 # Weather API imports
 try:
@@ -45,26 +70,84 @@ app.secret_key = os.getenv('FLASK_SECRET_KEY', 'raitha-mitra-secret-key-2025-cha
 
 # Initialize database
 db = DatabaseManager()
+# Under gunicorn the master runs maintenance once (gunicorn.conf.py), not every worker
+if os.getenv('DB_MAINTENANCE_OWNER') != 'gunicorn':
+    db.start_maintenance()
+
+# Requests running more SQL statements than this are logged (likely N+1 loops)
+QUERY_COUNT_WARN = int(os.getenv('QUERY_COUNT_WARN', 25))
+
+@app.before_request
+def start_query_tracking():
+    """Reset per-request SQL totals (incremented by query_stats)"""
+    g.query_count = 0
+    g.query_time = 0.0
+
+@app.after_request
+def record_query_totals(response):
+    """Attach per-request SQL totals to the response and route aggregates"""
+    query_count = g.get('query_count', 0)
+    query_time = g.get('query_time', 0.0)
+    
+    if request.endpoint and request.endpoint != 'static':
+        query_stats.record_request(request.endpoint, query_count, query_time)
+    
+    response.headers['X-Query-Count'] = str(query_count)
+    response.headers['X-Query-Time-Ms'] = f"{query_time * 1000:.1f}"
+    
+    if query_count >= QUERY_COUNT_WARN:
+        print(f"⚠️  {request.method} {request.path} ran {query_count} SQL statements ({query_time * 1000:.0f}ms)")
+    return response
+
+@app.teardown_request
+def release_leaked_connection(exc):
+    """Hand back any pooled connection the request never closed (logged by the pool)"""
+    if db.pool:
+        db.pool.release_thread()
+
+def is_internal_request():
+    """Internal endpoints need INTERNAL_API_TOKEN if set, otherwise a local caller"""
+    token = os.getenv('INTERNAL_API_TOKEN')
+    if token:
+        return request.headers.get('X-Internal-Token') == token
+    return request.remote_addr in ('127.0.0.1', '::1')
 
 # --- 2. Routes for serving HTML pages ---
 
+@app.route('/api/internal/query-stats', methods=['GET'])
+def internal_query_stats():
+    """SQL statement and per-route aggregates (p50/p95); ?reset=true clears them"""
+    if not is_internal_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    stats = get_query_stats(request.args.get('limit', 50, type=int))
+    if request.args.get('reset', '').lower() == 'true':
+        query_stats.reset()
+    return jsonify(stats), 200
+
 # Health check endpoint for Render
 @app.route('/health')
 def health_check():
     """Health check endpoint for monitoring"""
     try:
-        model_loaded = (use_tflite and interpreter is not None) or (not use_tflite and model is not None)
+        model_loaded = inference_engine is not None
         
         health_status = {
             'status': 'healthy',
             'model_loaded': model_loaded,
-            'model_type': 'TFLite' if use_tflite else 'H5' if model is not None else 'None',
+            'model_type': model_type,
             'model_classes': len(class_names) if class_names else 0,
             'database': 'connected',
             'gemini_configured': gemini_text_model is not None,
             'tflite_exists': os.path.exists(TFLITE_MODEL_PATH),
             'h5_exists': os.path.exists(H5_MODEL_PATH),
-            'classes_path_exists': os.path.exists(CLASSES_PATH)
+            'classes_path_exists': os.path.exists(CLASSES_PATH),
+            'prediction_cache': prediction_cache.get_stats(),
+            'prediction_jobs': prediction_jobs.get_stats(),
+            'enrichment': enrichment_executor.get_stats(),
+            'llm': llm_client.get_stats(),
+            'knowledge_cache': knowledge_cache.get_stats(),
+            'events': event_hub.get_stats()
         }
         
         # Test model if loaded
@@ -72,17 +155,10 @@ def health_check():
             try:
                 # Create a dummy input to test model
                 test_input = np.zeros((1, 128, 128, 3), dtype=np.float32)
-                
-                if use_tflite and interpreter is not None:
-                    input_details = interpreter.get_input_details()
-                    output_details = interpreter.get_output_details()
-                    interpreter.set_tensor(input_details[0]['index'], test_input)
-                    interpreter.invoke()
-                    test_pred = interpreter.get_tensor(output_details[0]['index'])
-                elif model is not None:
-                    test_pred = model.predict(test_input, verbose=0)
+                test_pred = inference_engine.predict(test_input)
                 
                 health_status['model_test'] = 'passed'
+                health_status['inference'] = inference_engine.get_stats()
             except Exception as model_error:
                 health_status['model_test'] = f'failed: {str(model_error)}'
                 health_status['status'] = 'degraded'
@@ -118,7 +194,7 @@ def disease_detection():
 def test_model():
     """Simple endpoint to test if model is working"""
     try:
-        model_loaded = (use_tflite and interpreter is not None) or (not use_tflite and model is not None)
+        model_loaded = inference_engine is not None
         
         if not model_loaded:
             return jsonify({
@@ -133,19 +209,12 @@ def test_model():
         test_image = np.random.rand(1, 128, 128, 3).astype(np.float32)
         
         # Try prediction
-        if use_tflite and interpreter is not None:
-            input_details = interpreter.get_input_details()
-            output_details = interpreter.get_output_details()
-            interpreter.set_tensor(input_details[0]['index'], test_image)
-            interpreter.invoke()
-            prediction = interpreter.get_tensor(output_details[0]['index'])
-        elif model is not None:
-            prediction = model.predict(test_image, verbose=0)
+        prediction = inference_engine.predict(test_image)
         
         return jsonify({
             'status': 'success',
             'message': 'Model is working',
-            'model_type': 'TFLite' if use_tflite else 'H5',
+            'model_type': model_type,
             'num_classes': len(class_names),
             'prediction_shape': list(prediction.shape),
             'sample_classes': class_names[:5]
@@ -211,12 +280,11 @@ try:
     if not api_key or api_key == "YOUR_GEMINI_API_KEY":
         raise ValueError("Please set GEMINI_API_KEY in your .env file")
         
-    genai.configure(api_key=api_key)
-    
-    # Model for general text generation (treatments) - Using working model
-    gemini_text_model = genai.GenerativeModel('gemini-2.5-flash')
-    # Model for market prices - Using same working model (search tools may not be available in newer models)
-    gemini_search_model = genai.GenerativeModel('gemini-2.5-flash')
+    # One shared client (llm_client.py) for treatments, market prices,
+    # translations and the chat/farm/yield/finance services
+    gemini_text_model = llm_client.configure(api_key)
+    # Market prices use the same model (search tools may not be available in newer models)
+    gemini_search_model = gemini_text_model
     print("✅ Gemini AI models configured successfully.")
     
     # Test the models
@@ -227,7 +295,7 @@ try:
         print(f"📋 Available Gemini models: {available_models[:3]}...")  # Show first 3
         
         # Test text model
-        test_response = gemini_text_model.generate_content("Test")
+        test_response = generate_text("Test", caller='startup', timeout=15)
         if test_response:
             print("✅ Gemini text model test successful")
         else:
@@ -240,16 +308,28 @@ except Exception as e:
     gemini_text_model = None
     gemini_search_model = None
 
-# --- 4. Load the Local TensorFlow Model ---
-# Try TFLite model first (smaller, faster), fallback to H5
+# Per-call timeouts (seconds) for the Gemini calls behind /predict;
+# ENRICHMENT_DEADLINE in enrichment.py bounds all of them together
+TREATMENT_TIMEOUT = float(os.getenv('TREATMENT_TIMEOUT', 15))
+MARKET_TIMEOUT = float(os.getenv('MARKET_TIMEOUT', 15))
+TRANSLATION_TIMEOUT = float(os.getenv('TRANSLATION_TIMEOUT', 5))
+# /translate-results sends every field in one request
+TRANSLATION_BATCH_TIMEOUT = float(os.getenv('TRANSLATION_BATCH_TIMEOUT', 12))
+# Seconds clients wait between /api/predict/jobs/<job_id> polls (Retry-After)
+JOB_POLL_INTERVAL = int(os.getenv('JOB_POLL_INTERVAL', 2))
+
+# --- 4. Load the Disease Model ---
+# TFLite model first (via LiteRT / tflite_runtime when installed, so full
+# TensorFlow is never imported), H5 fallback only if the .tflite is missing
 TFLITE_MODEL_PATH = 'crop_disease_detection_model.tflite'
 H5_MODEL_PATH = 'crop_disease_detection_model.h5'
 CLASSES_PATH = 'class_names.json'
 
-model = None
-interpreter = None
+# With INFERENCE_SERVER set, predictions run in inference_server.py and this
+# process does not load the model at all
+INFERENCE_SERVER = os.getenv('INFERENCE_SERVER')
+
 class_names = []
-use_tflite = False
 
 # Load class names first
 if os.path.exists(CLASSES_PATH):
@@ -260,50 +340,28 @@ if os.path.exists(CLASSES_PATH):
     except Exception as e:
         print(f"❌ Error loading class names: {e}")
 
-# Try loading TFLite model first (optimized for production)
-if os.path.exists(TFLITE_MODEL_PATH):
-    try:
-        print(f"📦 Loading TFLite model from: {TFLITE_MODEL_PATH}")
-        interpreter = tf.lite.Interpreter(model_path=TFLITE_MODEL_PATH)
-        interpreter.allocate_tensors()
-        use_tflite = True
-        
-        # Get input and output details
-        input_details = interpreter.get_input_details()
-        output_details = interpreter.get_output_details()
-        
-        print(f"✅ TFLite model loaded successfully")
-        print(f"🧠 Model input shape: {input_details[0]['shape']}")
-        print(f"📊 Model output shape: {output_details[0]['shape']}")
-    except Exception as e:
-        print(f"⚠️ Error loading TFLite model: {e}")
-        interpreter = None
-        use_tflite = False
-
-# Fallback to H5 model if TFLite not available
-if not use_tflite and os.path.exists(H5_MODEL_PATH):
-    try:
-        print(f"📦 Loading H5 model from: {H5_MODEL_PATH}")
-        model = tf.keras.models.load_model(H5_MODEL_PATH, compile=False)
-        model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-        print(f"✅ H5 model loaded successfully")
-        print(f"🧠 Model input shape: {model.input_shape}")
-    except Exception as e:
-        print(f"❌ Error loading H5 model: {e}")
-        traceback.print_exc()
-        model = None
+# All predictions go through one micro-batching engine (here or in the
+# inference server); each of its worker threads checks an interpreter out
+# of the pool, so no two threads ever share one (they are not thread-safe)
+if INFERENCE_SERVER:
+    inference_engine = RemoteInferenceClient(INFERENCE_SERVER, get_authkey())
+    model_type = "Remote"
+    print(f"✅ Using inference server at {INFERENCE_SERVER} for predictions")
+else:
+    inference_engine, model_type = load_inference_engine(TFLITE_MODEL_PATH, H5_MODEL_PATH)
 
-# Check if any model loaded
-if not use_tflite and model is None:
+if inference_engine is None:
     print(f"❌ Error: No model could be loaded")
     print(f"   TFLite path exists: {os.path.exists(TFLITE_MODEL_PATH)}")
     print(f"   H5 path exists: {os.path.exists(H5_MODEL_PATH)}")
     print(f"   Classes path exists: {os.path.exists(CLASSES_PATH)}")
     print(f"   Current directory: {os.getcwd()}")
     print(f"   Files in directory: {os.listdir('.')[:10]}")
-else:
-    model_type = "TFLite" if use_tflite else "H5"
+elif not INFERENCE_SERVER:
+    pool_size, num_threads = get_pool_config()
     print(f"✅ Using {model_type} model for predictions")
+    if model_type.startswith('TFLite'):
+        print(f"🧵 Interpreter pool: {pool_size} x {num_threads} threads")
 
 # --- 5. Yield Impact Database ---
 yield_impact_db = {
@@ -537,92 +595,56 @@ def get_default_forecast_data(city="Bengaluru", days=5):
     }
 
 # --- 10. Gemini Interaction Functions ---
+# Bump when the market prompt changes; cached answers for older versions are ignored
+# (the treatment prompt and TREATMENT_PROMPT_VERSION live in treatment_catalog.py)
+MARKET_PROMPT_VERSION = 1
+
 def get_gemini_treatment_details(disease_name, target_language='en'):
     """Get treatment details from Gemini AI with fallback to default data"""
     
-    # Language mapping for prompts
-    language_names = {
-        'en': 'English',
-        'hi': 'Hindi',
-        'kn': 'Kannada', 
-        'te': 'Telugu',
-        'ta': 'Tamil',
-        'ml': 'Malayalam',
-        'mr': 'Marathi',
-        'gu': 'Gujarati',
-        'bn': 'Bengali',
-        'pa': 'Punjabi'
-    }
-    
-    target_lang_name = language_names.get(target_language, 'English')
+    # Same disease and language -> same advice; skip Gemini if already generated (or in the catalog)
+    cached = get_cached_treatment(knowledge_cache, disease_name, target_language)
+    if cached is not None:
+        print(f"⚡ Cached treatment details for {disease_name} ({target_language})")
+        return cached
     
     # First try Gemini AI with timeout
     if gemini_text_model:
-        prompt = f"""You are an expert agricultural advisor for farmers in India. A farmer has identified '{disease_name}'. 
-
-        Provide a detailed action plan in {target_lang_name}. Organize your response into four sections with these exact English headings followed by {target_lang_name} content:
-
-        1. Symptoms: 
-        [Write a clear bulleted list of key symptoms in simple {target_lang_name}. Use simple bullet points (•) and avoid asterisks or markdown formatting.]
-
-        2. Organic Treatment: 
-        [Write a clear bulleted list of organic remedies in simple {target_lang_name}. Include specific instructions and quantities. Use simple bullet points (•) and avoid asterisks or markdown formatting.]
-
-        3. Chemical Treatment: 
-        [Write a clear bulleted list of recommended chemical treatments, including common brand names available in India, in simple {target_lang_name}. Use simple bullet points (•) and avoid asterisks or markdown formatting.]
-
-        4. Prevention Tips: 
-        [Write a clear bulleted list of preventive measures in simple {target_lang_name}. Use simple bullet points (•) and avoid asterisks or markdown formatting.]
-
-        IMPORTANT FORMATTING RULES: 
-        - Use simple, farmer-friendly language that is easy to understand and implement
-        - Do NOT use asterisks (*), markdown formatting, hashtags (#), or complex symbols
-        - Use simple bullet points (•) for lists only
-        - Write in clear, plain text format without any special formatting
-        - Keep sentences short and actionable
-        - Use proper spacing between sections
-        - Include specific quantities, timings, and brand names where applicable
-        - Write as if explaining to a farmer in person"""
+        prompt = build_treatment_prompt(disease_name, target_language)
         
         try:
             print(f"🤖 Calling Gemini AI for: {disease_name}")
             
-            # Add timeout using threading
-            import threading
-            result = [None]
-            error = [None]
+            # Timeout enforced by the shared LLM client
+            response_text = generate_text(prompt, caller='treatment', timeout=TREATMENT_TIMEOUT)
             
-            def call_gemini():
-                try:
-                    response = gemini_text_model.generate_content(prompt)
-                    result[0] = response
-                except Exception as e:
-                    error[0] = e
-            
-            thread = threading.Thread(target=call_gemini)
-            thread.daemon = True
-            thread.start()
-            thread.join(timeout=15)  # 15 second timeout - wait for Gemini response
-            
-            if thread.is_alive():
-                print(f"⏱️ Gemini AI timeout after 15s - using fallback data")
-            elif error[0]:
-                print(f"❌ Gemini API Error: {error[0]}")
-            elif result[0] and result[0].text:
+            if response_text:
                 print(f"✅ Gemini AI response received")
-                return parse_gemini_response(result[0].text)
+                details = parse_gemini_response(response_text)
+                # Don't keep a partly parsed answer for weeks
+                if is_complete(details):
+                    knowledge_cache.put('treatment', disease_name, target_language, TREATMENT_PROMPT_VERSION, details)
+                return details
             else:
                 print(f"⚠️ Gemini AI returned empty response")
+        except TimeoutError:
+            print(f"⏱️ Gemini AI timeout after {TREATMENT_TIMEOUT:.0f}s - using fallback data")
         except Exception as e:
             print(f"❌ Gemini (Text) API Error: {e}")
     
-    # Fallback to default treatment data
+    # Fallback to built-in treatment data (the catalog was checked above)
     print(f"🔄 Using fallback treatment data for: {disease_name}")
-    return get_default_treatment_details(disease_name, target_language)
+    return get_builtin_treatment_details(disease_name, target_language)
 
 def get_market_prices(crop_name, target_language='en'):
     """Get market prices from Gemini AI with fallback to default data"""
     
+    # Prices are cached for a few hours (KNOWLEDGE_MARKET_TTL)
+    cached = knowledge_cache.get('market', crop_name, target_language, MARKET_PROMPT_VERSION)
+    if cached is not None:
+        print(f"⚡ Cached market prices for {crop_name} ({target_language})")
+        return cached
+    
     # Language mapping for prompts
     language_names = {
         'en': 'English',
@@ -657,33 +679,18 @@ def get_market_prices(crop_name, target_language='en'):
         try:
             print(f"💰 Getting market prices from Gemini AI for: {crop_name}")
             
-            # Add timeout using threading
-            import threading
-            result = [None]
-            error = [None]
-            
-            def call_gemini():
-                try:
-                    response = gemini_search_model.generate_content(prompt)
-                    result[0] = response
-                except Exception as e:
-                    error[0] = e
-            
-            thread = threading.Thread(target=call_gemini)
-            thread.daemon = True
-            thread.start()
-            thread.join(timeout=15)  # 15 second timeout - wait for Gemini response
+            # Timeout enforced by the shared LLM client
+            response_text = generate_text(prompt, caller='market', timeout=MARKET_TIMEOUT)
             
-            if thread.is_alive():
-                print(f"⏱️ Gemini AI timeout after 15s for market prices - using fallback data")
-            elif error[0]:
-                print(f"❌ Gemini API Error: {error[0]}")
-            elif result[0] and result[0].text:
+            if response_text:
                 print(f"✅ Market prices received from Gemini AI")
-                cleaned_prices = clean_gemini_text(result[0].text)
+                cleaned_prices = clean_gemini_text(response_text)
+                knowledge_cache.put('market', crop_name, target_language, MARKET_PROMPT_VERSION, cleaned_prices)
                 return cleaned_prices
             else:
                 print(f"⚠️ Gemini AI returned empty response for market prices")
+        except TimeoutError:
+            print(f"⏱️ Gemini AI timeout after {MARKET_TIMEOUT:.0f}s for market prices - using fallback data")
         except Exception as e:
             print(f"❌ Gemini (Search) API Error: {e}")
     
@@ -715,55 +722,18 @@ def get_default_market_prices(crop_name, target_language='en'):
     
     return base_price
 
-def clean_gemini_text(text):
-    """Clean up Gemini AI response text by removing markdown formatting"""
-    if not text:
-        return text
-    
-    # Remove excessive asterisks and markdown formatting
-    text = re.sub(r'\*{2,}', '', text)  # Remove multiple asterisks
-    text = re.sub(r'\*([^*]+)\*', r'\1', text)  # Remove single asterisks around text
-    text = re.sub(r'#{1,6}\s*', '', text)  # Remove markdown headers
-    text = re.sub(r'`([^`]+)`', r'\1', text)  # Remove code formatting
-    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)  # Remove markdown links
-    
-    # Clean up bullet points and formatting
-    text = re.sub(r'^\s*[-•*]\s*', '• ', text, flags=re.MULTILINE)  # Standardize bullet points
-    text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)  # Remove excessive line breaks
-    text = re.sub(r'^\s+|\s+$', '', text)  # Remove leading/trailing whitespace
-    
-    # Fix common formatting issues
-    text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces with single space
-    text = re.sub(r'\n\s*', '\n', text)  # Clean up line breaks
-    
-    return text.strip()
-
-def parse_gemini_response(text):
-    """Parse Gemini AI response into structured format"""
-    details = {key: "Information not available." for key in ["symptoms", "organic_treatment", "chemical_treatment", "prevention_tips"]}
-    
-    # Clean the input text first
-    text = clean_gemini_text(text)
-    
-    patterns = {
-        "symptoms": r"Symptoms:(.*?)(Organic Treatment:|Chemical Treatment:|Prevention Tips:|$)",
-        "organic_treatment": r"Organic Treatment:(.*?)(Chemical Treatment:|Prevention Tips:|$)",
-        "chemical_treatment": r"Chemical Treatment:(.*?)(Prevention Tips:|$)",
-        "prevention_tips": r"Prevention Tips:(.*)"
-    }
-    
-    for key, pattern in patterns.items():
-        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-        if match: 
-            extracted_text = match.group(1).strip()
-            # Clean the extracted text
-            cleaned_text = clean_gemini_text(extracted_text)
-            details[key] = cleaned_text if cleaned_text else "Information not available."
-    
-    return details
-
 def get_default_treatment_details(disease_name, target_language='en'):
-    """Get default treatment details when Gemini AI is not available"""
+    """
+    Treatment details without calling Gemini: the pre-generated catalog
+    entry (see treatment_catalog.py) if there is one, else built-in data
+    """
+    cached = get_cached_treatment(knowledge_cache, disease_name, target_language)
+    if cached is not None:
+        return cached
+    return get_builtin_treatment_details(disease_name, target_language)
+
+def get_builtin_treatment_details(disease_name, target_language='en'):
+    """Get built-in treatment details when Gemini AI is not available"""
     
     # Check if plant is healthy
     if "healthy" in disease_name.lower():
@@ -800,34 +770,10 @@ def get_default_treatment_details(disease_name, target_language='en'):
 
 # --- 8. Image Preprocessing ---
 def preprocess_image(image_data, target_size=(128, 128)):
-    """Preprocess image for model prediction with memory optimization"""
+    """Preprocess a base64 image into a model input tensor (see image_pipeline)"""
     try:
-        # Handle data URL format
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
-        
-        # Decode base64 with error handling
-        image_bytes = base64.b64decode(image_data)
-        
-        # Open and process image
-        img = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to RGB if needed
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Resize to target size
-        img = img.resize(target_size, Image.LANCZOS)
-        
-        # Convert to numpy array and normalize
-        img_array = np.array(img, dtype=np.float32) / 255.0
-        
-        # Clean up
-        img.close()
-        
-        # Add batch dimension
-        return np.expand_dims(img_array, axis=0)
-    except Exception as e:
+        return process_image(decode_base64_image(image_data), target_size).tensor
+    except ValueError as e:
         print(f"❌ Image preprocessing error: {e}")
         raise ValueError(f"Failed to preprocess image: {str(e)}")
 
@@ -1052,12 +998,18 @@ def check_session():
 #         print(f"❌ OTP Error: {e}")
 #         return jsonify({'error': 'Failed to send OTP'}), 500
 
+def add_thumbnail_paths(predictions):
+    """Add thumbnail_path (None for uploads saved before the blob store) for history lists"""
+    for prediction in predictions:
+        prediction['thumbnail_path'] = thumbnail_url(prediction.get('image_path'))
+    return predictions
+
 @app.route('/api/user/<int:user_id>/predictions', methods=['GET'])
 def get_user_predictions(user_id):
     """Get user's prediction history"""
     try:
         limit = request.args.get('limit', 10, type=int)
-        predictions = db.get_user_predictions(user_id, limit)
+        predictions = add_thumbnail_paths(db.get_user_predictions(user_id, limit))
         
         return jsonify({
             'predictions': predictions,
@@ -1232,70 +1184,19 @@ def translate_text():
         print(f"❌ Translation error: {e}")
         return jsonify({'error': 'Translation failed'}), 500
 
-def translate_with_gemini(text, target_language):
-    """Translate text using Gemini AI"""
+def translate_with_gemini(text, target_language, timeout=1):
+    """Translate text using Gemini AI (remembered translations skip the call)"""
     try:
-        # Language mapping
-        language_names = {
-            'en': 'English',
-            'hi': 'Hindi',
-            'kn': 'Kannada', 
-            'te': 'Telugu',
-            'ta': 'Tamil',
-            'ml': 'Malayalam',
-            'mr': 'Marathi',
-            'gu': 'Gujarati',
-            'bn': 'Bengali',
-            'pa': 'Punjabi'
-        }
-        
-        target_lang_name = language_names.get(target_language, 'English')
-        
         if target_language == 'en':
             return text  # No translation needed
         
-        # Use Gemini for translation with timeout
-        if genai and gemini_text_model:
-            prompt = f"""
-            Translate the following text to {target_lang_name}. 
-            Provide only the translation, no explanations or additional text.
-            Keep technical terms related to agriculture and plant diseases accurate.
-            
-            Text to translate: {text}
-            """
-            
-            # Add timeout using threading
-            import threading
-            result = [None]
-            error = [None]
-            
-            def call_gemini():
-                try:
-                    response = gemini_text_model.generate_content(prompt)
-                    result[0] = response
-                except Exception as e:
-                    error[0] = e
-            
-            thread = threading.Thread(target=call_gemini)
-            thread.daemon = True
-            thread.start()
-            thread.join(timeout=1)  # 1 second timeout for faster translation
-            
-            if thread.is_alive():
-                print(f"⏱️ Translation timeout - using fallback")
-                return get_fallback_translation(text, target_language)
-            elif error[0]:
-                print(f"❌ Translation error: {error[0]}")
-                return get_fallback_translation(text, target_language)
-            elif result[0] and result[0].text:
-                translated = result[0].text.strip()
-                print(f"🌐 Translated '{text[:50]}...' to {target_lang_name}")
-                return translated
-            else:
-                return get_fallback_translation(text, target_language)
-        else:
+        # Short timeout for fast language switching; /predict passes
+        # its own per-call timeout
+        translated, missing = translate_fields({'text': text}, target_language, timeout=timeout)
+        if missing:
             # Fallback to basic translations for common terms
             return get_fallback_translation(text, target_language)
+        return translated['text']
             
     except Exception as e:
         print(f"❌ Gemini translation error: {e}")
@@ -1411,10 +1312,209 @@ def get_fallback_translation(text, target_language):
     return translated if translated else text
 
 # --- 10. Prediction API Endpoint ---
+def enrich_prediction(predicted_class_name, confidence, target_language):
+    """
+    Build the /predict response for a classified image: treatment details,
+    market prices and translations
+
+    Returns:
+        tuple: (response dict, cacheable) - cacheable is False when a
+            fallback was used instead of a Gemini answer
+    """
+    formatted_disease_name = predicted_class_name.replace("___", " - ").replace("_", " ")
+    yield_impact = yield_impact_db.get(predicted_class_name, yield_impact_db['default'])
+    
+    # Extract crop name for market search
+    crop_name = predicted_class_name.split('___')[0].replace("_", " ")
+    
+    healthy = "healthy" in predicted_class_name
+    translate = target_language != 'en'
+
+    # Treatment details, market prices and translations run concurrently;
+    # anything that fails or misses its timeout gets its fallback value
+    calls = {
+        'details': EnrichmentCall(
+            get_gemini_treatment_details, (formatted_disease_name, target_language), TREATMENT_TIMEOUT,
+            lambda: get_default_treatment_details(formatted_disease_name, target_language)
+        )
+    }
+    if not healthy:
+        calls['market_prices'] = EnrichmentCall(
+            get_market_prices, (crop_name, target_language), MARKET_TIMEOUT,
+            lambda: get_default_market_prices(crop_name, target_language)
+        )
+    if translate:
+        calls['disease'] = EnrichmentCall(
+            translate_with_gemini, (formatted_disease_name, target_language, TRANSLATION_TIMEOUT), TRANSLATION_TIMEOUT,
+            lambda: get_fallback_translation(formatted_disease_name, target_language)
+        )
+        calls['yield_impact'] = EnrichmentCall(
+            translate_with_gemini, (yield_impact, target_language, TRANSLATION_TIMEOUT), TRANSLATION_TIMEOUT,
+            lambda: get_fallback_translation(yield_impact, target_language)
+        )
+
+    print(f"🤖 Getting treatment details{'' if healthy else ', market prices'}"
+          f"{' and translations' if translate else ''} in {target_language}...")
+    results, fallbacks = fan_out(calls)
+
+    treatment_details = results['details']
+    if treatment_details is None:
+        print(f"⚠️ Gemini returned None, using fallback")
+        treatment_details = get_default_treatment_details(formatted_disease_name, target_language)
+
+    if healthy:
+        # Healthy plant message in different languages
+        healthy_messages = {
+            'en': "Plant is healthy, no market rates needed.",
+            'hi': "पौधा स्वस्थ है, बाजार दर की आवश्यकता नहीं।",
+            'kn': "ಸಸ್ಯ ಆರೋಗ್ಯಕರವಾಗಿರುವುದರಿಂದ ಮಾರುಕಟ್ಟೆ ದರ ಅಗತ್ಯವಿಲ್ಲ।",
+            'te': "మొక్క ఆరోగ్యంగా ఉంది, మార్కెట్ రేట్లు అవసరం లేదు।",
+            'ta': "செடி ஆரோக்கியமாக உள்ளது, சந்தை விலைகள் தேவையில்லை।",
+            'ml': "ചെടി ആരോഗ്യകരമാണ്, മാർക്കറ്റ് നിരക്കുകൾ ആവശ്യമില്ല।",
+            'mr': "रोप निरोगी आहे, बाजार दर आवश्यक नाही।",
+            'gu': "છોડ સ્વસ્થ છે, બજાર દરોની જરૂર નથી।",
+            'bn': "গাছ সুস্থ, বাজার দরের প্রয়োজন নেই।",
+            'pa': "ਪੌਧਾ ਸਿਹਤਮੰਦ ਹੈ, ਮਾਰਕੀਟ ਰੇਟ ਦੀ ਲੋੜ ਨਹੀਂ।"
+        }
+        market_prices = healthy_messages.get(target_language, healthy_messages['en'])
+    else:
+        market_prices = results['market_prices']
+
+    translated_disease_name = results.get('disease') or formatted_disease_name
+    translated_yield_impact = results.get('yield_impact') or yield_impact
+    
+    response = {
+        'disease': translated_disease_name,
+        'original_disease': formatted_disease_name,
+        'confidence': confidence,
+        'yield_impact': translated_yield_impact,
+        'original_yield_impact': yield_impact,  # Store original for language switching
+        'details': treatment_details,  # Already in target language from Gemini
+        'market_prices': market_prices,  # Already in target language from Gemini
+        'language': target_language
+    }
+    
+    # Don't pin fallback answers in the prediction cache
+    cacheable = (
+        gemini_text_model is not None
+        and not fallbacks
+        and treatment_details != get_builtin_treatment_details(formatted_disease_name, target_language)
+        and market_prices != get_default_market_prices(crop_name, target_language)
+    )
+    return response, cacheable
+
+def record_prediction(response, user_id, image_path):
+    """Queue a finished prediction response for the user's history"""
+    treatment_details = response['details']
+    try:
+        queue_prediction(
+            db,
+            user_id=user_id,
+            disease_name=response['original_disease'],
+            confidence=response['confidence'],
+            yield_impact=response['original_yield_impact'],
+            symptoms=treatment_details.get('symptoms', ''),
+            organic_treatment=treatment_details.get('organic_treatment', ''),
+            chemical_treatment=treatment_details.get('chemical_treatment', ''),
+            prevention_tips=treatment_details.get('prevention_tips', ''),
+            market_prices=response['market_prices'],
+            image_path=image_path
+        )
+        print("💾 Prediction queued for saving")
+    except Exception as e:
+        print(f"⚠️ Failed to save prediction to database: {e}")
+
+def enrich_and_record(digest, phash, predicted_class_name, confidence, target_language, user_id, image_path):
+    """Enrich a classification, cache it and save it; runs inline or as a prediction job"""
+    response, cacheable = enrich_prediction(predicted_class_name, confidence, target_language)
+    if cacheable:
+        prediction_cache.put(digest, target_language, predicted_class_name, confidence, response, phash)
+    if user_id:
+        record_prediction(response, user_id, image_path)
+    return response
+
+def run_prediction(upload, user_id, target_language, job=False):
+    """
+    Classify a decoded upload, enrich it and save it; shared by /predict and /api/v2/predict
+
+    With job=True only the classifier runs in the request: the response
+    (202) carries the disease and confidence plus a job_id, and treatment
+    details, market prices and translations are filled in by a background
+    job polled at /api/predict/jobs/<job_id>.
+    """
+    # Store the upload once per distinct image (content-addressed, with a thumbnail)
+    image_path = None
+    if user_id:
+        try:
+            image_path = store_upload(upload)
+            print(f"📸 Image stored at: {image_path}")
+        except Exception as e:
+            print(f"❌ Error saving image: {e}")
+            image_path = None
+
+    # Repeat submissions of the same photo skip inference and Gemini (near-identical
+    # photos too, only if PREDICTION_CACHE_PHASH_DISTANCE opts in)
+    phash = perceptual_hash(upload.image) if prediction_cache.near_duplicates_enabled else None
+    response = prediction_cache.get(upload.digest, target_language, phash)
+    if response is not None:
+        print(f"⚡ Prediction cache hit: {response['original_disease']} ({target_language})")
+        if user_id:
+            record_prediction(response, user_id, image_path)
+        print(f"✅ Prediction completed successfully")
+        return jsonify(response)
+
+    classification = prediction_cache.get_classification(upload.digest)
+    if classification is not None:
+        predicted_class_name, confidence = classification
+        print(f"⚡ Cached classification: {predicted_class_name} (confidence: {confidence:.2f})")
+    else:
+        # Make prediction with error handling
+        try:
+            # Batched with concurrent requests by the inference engine
+            prediction = inference_engine.predict(upload.tensor)
+            
+            predicted_class_index = np.argmax(prediction[0])
+            confidence = float(prediction[0][predicted_class_index])
+            predicted_class_name = class_names[predicted_class_index]
+            
+            print(f"🎯 Prediction: {predicted_class_name} (confidence: {confidence:.2f})")
+        except Exception as pred_error:
+            print(f"❌ Model prediction error: {pred_error}")
+            traceback.print_exc()
+            return jsonify({'error': 'Failed to analyze image. Please try again.'}), 500
+
+    args = (upload.digest, phash, predicted_class_name, confidence, target_language, user_id, image_path)
+    if not job:
+        response = enrich_and_record(*args)
+        print(f"✅ Prediction completed successfully")
+        return jsonify(response)
+
+    # Classifier result now; Gemini enrichment finishes in the background
+    formatted_disease_name = predicted_class_name.replace("___", " - ").replace("_", " ")
+    yield_impact = yield_impact_db.get(predicted_class_name, yield_impact_db['default'])
+    response = {
+        'disease': formatted_disease_name,
+        'original_disease': formatted_disease_name,
+        'confidence': confidence,
+        'yield_impact': yield_impact,
+        'original_yield_impact': yield_impact,
+        'details': None,
+        'market_prices': None,
+        'language': target_language
+    }
+    job_id = submit_job(enrich_and_record, *args, initial=response)
+    response.update({
+        'job_id': job_id,
+        'status': 'pending',
+        'job_url': url_for('prediction_job', job_id=job_id)
+    })
+    print(f"✅ Classification returned, enrichment running as job {job_id}")
+    return jsonify(response), 202
+
 @app.route('/predict', methods=['POST'])
 def predict():
     # Check if any model is loaded
-    model_loaded = (use_tflite and interpreter is not None) or (not use_tflite and model is not None)
+    model_loaded = inference_engine is not None
     if not model_loaded: 
         return jsonify({'error': 'Local model not loaded.'}), 500
     
@@ -1430,182 +1530,162 @@ def predict():
         print(f"🔬 Starting prediction for user: {user_id}")
         print(f"📝 Target language: {target_language}")
         
-        # Process image with error handling
+        # Decode the upload once; the model tensor and the stored JPEG both come from it
         try:
-            processed_image = preprocess_image(data['image'])
-            print(f"📸 Image processed, shape: {processed_image.shape}")
+            upload = process_image(decode_base64_image(data['image']))
+            print(f"📸 Image processed, {upload.source_size[0]}x{upload.source_size[1]} -> shape: {upload.tensor.shape}")
         except Exception as img_error:
             print(f"❌ Image processing error: {img_error}")
             return jsonify({'error': 'Failed to process image. Please try again with a different image.'}), 400
         
-        # Make prediction with error handling
-        try:
-            if use_tflite and interpreter is not None:
-                # TFLite prediction
-                input_details = interpreter.get_input_details()
-                output_details = interpreter.get_output_details()
-                
-                # Set input tensor
-                interpreter.set_tensor(input_details[0]['index'], processed_image.astype(np.float32))
-                
-                # Run inference
-                interpreter.invoke()
-                
-                # Get output tensor
-                prediction = interpreter.get_tensor(output_details[0]['index'])
-            elif model is not None:
-                # H5 Keras model prediction
-                prediction = model.predict(processed_image, verbose=0)
-            else:
-                return jsonify({'error': 'No model available for prediction'}), 500
-            
-            predicted_class_index = np.argmax(prediction[0])
-            confidence = float(prediction[0][predicted_class_index])
-            predicted_class_name = class_names[predicted_class_index]
-            formatted_disease_name = predicted_class_name.replace("___", " - ").replace("_", " ")
-            
-            print(f"🎯 Prediction: {formatted_disease_name} (confidence: {confidence:.2f})")
-        except Exception as pred_error:
-            print(f"❌ Model prediction error: {pred_error}")
-            traceback.print_exc()
-            return jsonify({'error': 'Failed to analyze image. Please try again.'}), 500
-
-        yield_impact = yield_impact_db.get(predicted_class_name, yield_impact_db['default'])
-        
-        # Extract crop name for market search
-        crop_name = predicted_class_name.split('___')[0].replace("_", " ")
+        return run_prediction(upload, user_id, target_language, job=data.get('async') is True)
         
-        # Get treatment details and market prices in the selected language
-        print(f"🤖 Getting treatment details from Gemini AI in {target_language}...")
-        try:
-            treatment_details = get_gemini_treatment_details(formatted_disease_name, target_language)
-            if treatment_details is None:
-                print(f"⚠️ Gemini returned None, using fallback")
-                treatment_details = get_default_treatment_details(formatted_disease_name, target_language)
-        except Exception as treatment_error:
-            print(f"❌ Treatment details error: {treatment_error}")
-            treatment_details = get_default_treatment_details(formatted_disease_name, target_language)
-        
-        print(f"💰 Getting market prices for {crop_name} in {target_language}...")
+    except Exception as e:
+        print(f"❌ Prediction Endpoint Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'An internal error occurred: {str(e)}'}), 500
+
+@app.route('/api/v2/predict', methods=['POST'])
+def predict_v2():
+    """
+    Prediction from a binary upload: multipart/form-data (fields image,
+    user_id, language) or a raw image/* body (user_id and language in the
+    query string). The body is streamed to a temporary file with the size
+    limit enforced while reading, instead of being parsed as base64 JSON.
+    async=1 returns the classifier result at once with a job id (see
+    /api/predict/jobs/<job_id>).
+    """
+    if inference_engine is None:
+        return jsonify({'error': 'Local model not loaded.'}), 500
+
+    try:
         try:
-            if "healthy" not in predicted_class_name:
-                market_prices = get_market_prices(crop_name, target_language)
-            else:
-                # Healthy plant message in different languages
-                healthy_messages = {
-                    'en': "Plant is healthy, no market rates needed.",
-                    'hi': "पौधा स्वस्थ है, बाजार दर की आवश्यकता नहीं।",
-                    'kn': "ಸಸ್ಯ ಆರೋಗ್ಯಕರವಾಗಿರುವುದರಿಂದ ಮಾರುಕಟ್ಟೆ ದರ ಅಗತ್ಯವಿಲ್ಲ।",
-                    'te': "మొక్క ఆరోగ్యంగా ఉంది, మార్కెట్ రేట్లు అవసరం లేదు।",
-                    'ta': "செடி ஆரோக்கியமாக உள்ளது, சந்தை விலைகள் தேவையில்லை।",
-                    'ml': "ചെടി ആരോഗ്യകരമാണ്, മാർക്കറ്റ് നിരക്കുകൾ ആവശ്യമില്ല।",
-                    'mr': "रोप निरोगी आहे, बाजार दर आवश्यक नाही।",
-                    'gu': "છોડ સ્વસ્થ છે, બજાર દરોની જરૂર નથી।",
-                    'bn': "গাছ সুস্থ, বাজার দরের প্রয়োজন নেই।",
-                    'pa': "ਪੌਧਾ ਸਿਹਤਮੰਦ ਹੈ, ਮਾਰਕੀਟ ਰੇਟ ਦੀ ਲੋੜ ਨਹੀਂ।"
-                }
-                market_prices = healthy_messages.get(target_language, healthy_messages['en'])
-        except Exception as market_error:
-            print(f"❌ Market prices error: {market_error}")
-            market_prices = get_default_market_prices(crop_name, target_language)
-
-        # Save the uploaded image
-        image_path = None
-        if user_id:
-            try:
-                # Create uploads directory if it doesn't exist
-                import os
-                uploads_dir = 'static/uploads'
-                if not os.path.exists(uploads_dir):
-                    os.makedirs(uploads_dir)
-                
-                # Save the image with a unique filename
-                from datetime import datetime
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                image_filename = f"prediction_{user_id}_{timestamp}.jpg"
-                image_path = f"{uploads_dir}/{image_filename}"
-                
-                # Decode and save the base64 image
-                import base64
-                import io
-                from PIL import Image
-                
-                # Remove data URL prefix if present
-                if data['image'].startswith('data:image'):
-                    image_data = data['image'].split(',')[1]
-                else:
-                    image_data = data['image']
-                
-                # Decode base64 image
-                image_bytes = base64.b64decode(image_data)
-                image = Image.open(io.BytesIO(image_bytes))
-                
-                # Convert to RGB if necessary and save
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                image.save(image_path, 'JPEG', quality=85)
-                
-                # Use relative path for database storage
-                image_path = f"/static/uploads/{image_filename}"
-                print(f"📸 Image saved to: {image_path}")
-                
-            except Exception as e:
-                print(f"❌ Error saving image: {e}")
-                image_path = None
+            with spool_request(request.environ) as spooled:
+                fields = spooled.fields
+                user_id = fields.get('user_id') or request.args.get('user_id')
+                target_language = fields.get('language') or request.args.get('language', 'en')
+                job = (fields.get('async') or request.args.get('async', '')).lower() in ('1', 'true')
+                print(f"🔬 Starting prediction for user: {user_id} ({spooled.size / 1024:.0f} KB {spooled.content_type})")
+                upload = process_image(spooled.file)
+        except UploadTooLarge as e:
+            return jsonify({'error': str(e)}), 413
+        except UploadError as e:
+            return jsonify({'error': str(e)}), 400
+        except ValueError as img_error:
+            print(f"❌ Image processing error: {img_error}")
+            return jsonify({'error': 'Failed to process image. Please try again with a different image.'}), 400
+
+        # Form fields arrive as strings; the user id also ends up in the upload filename
+        user_id = int(user_id) if user_id and str(user_id).isdigit() else None
+        print(f"📸 Image processed, {upload.source_size[0]}x{upload.source_size[1]} -> shape: {upload.tensor.shape}")
+        return run_prediction(upload, user_id, target_language, job=job)
 
-        # Save prediction to database if user_id is provided
-        if user_id:
-            try:
-                prediction_id = db.save_prediction(
-                    user_id=user_id,
-                    disease_name=formatted_disease_name,
-                    confidence=confidence,
-                    yield_impact=yield_impact,
-                    symptoms=treatment_details.get('symptoms', ''),
-                    organic_treatment=treatment_details.get('organic_treatment', ''),
-                    chemical_treatment=treatment_details.get('chemical_treatment', ''),
-                    prevention_tips=treatment_details.get('prevention_tips', ''),
-                    market_prices=market_prices,
-                    image_path=image_path
-                )
-                print(f"💾 Prediction saved to database with ID: {prediction_id}")
-            except Exception as e:
-                print(f"⚠️ Failed to save prediction to database: {e}")
-
-        # Translate disease name and yield impact if not English
-        if target_language != 'en':
-            print(f"🌐 Translating disease name and yield impact to {target_language}...")
-            try:
-                translated_disease_name = translate_with_gemini(formatted_disease_name, target_language)
-                translated_yield_impact = translate_with_gemini(yield_impact, target_language)
-            except Exception as e:
-                print(f"⚠️ Translation failed for disease name/yield impact: {e}")
-                translated_disease_name = formatted_disease_name
-                translated_yield_impact = yield_impact
-        else:
-            translated_disease_name = formatted_disease_name
-            translated_yield_impact = yield_impact
-        
-        response = {
-            'disease': translated_disease_name,
-            'original_disease': formatted_disease_name,
-            'confidence': confidence,
-            'yield_impact': translated_yield_impact,
-            'original_yield_impact': yield_impact,  # Store original for language switching
-            'details': treatment_details,  # Already in target language from Gemini
-            'market_prices': market_prices,  # Already in target language from Gemini
-            'language': target_language
-        }
-        
-        print(f"✅ Prediction completed successfully")
-        return jsonify(response)
-        
     except Exception as e:
         print(f"❌ Prediction Endpoint Error: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({'error': f'An internal error occurred: {str(e)}'}), 500
 
+@app.route('/api/predict/jobs/<job_id>', methods=['GET'])
+def prediction_job(job_id):
+    """
+    Status and result of an async prediction. Always answers at once (a
+    request thread is never parked on a job); while the job is pending
+    or running, Retry-After tells the client when to poll again.
+    """
+    job = prediction_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    if job['status'] in ('done', 'error'):
+        return jsonify(job)
+    return jsonify(job), 200, {'Retry-After': str(JOB_POLL_INTERVAL)}
+
+# Each running batch holds a request thread for its whole run
+batch_slots = threading.BoundedSemaphore(BATCH_MAX_CONCURRENT)
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Score a zip of leaf photos in one call: a raw application/zip body or
+    a multipart 'archive' file, with user_id (required) and optional top_k
+    and format=jsonl|csv as query or form fields. Results stream back one
+    line per image as they are scored (see batch_predict.py for the CLI).
+    """
+    if inference_engine is None:
+        return jsonify({'error': 'Local model not loaded.'}), 500
+
+    try:
+        spooled = spool_request(request.environ, max_bytes=BATCH_UPLOAD_MAX_BYTES,
+                                field='archive', raw_types=ZIP_TYPES)
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except UploadError as e:
+        return jsonify({'error': str(e)}), 400
+
+    options = dict(request.args.items(), **spooled.fields)
+    user_id = options.get('user_id')
+    if not user_id:
+        spooled.close()
+        return jsonify({'error': 'user_id is required'}), 400
+    if not zipfile.is_zipfile(spooled.file):
+        spooled.close()
+        return jsonify({'error': 'Upload must be a zip archive of images'}), 400
+    spooled.file.seek(0)
+    try:
+        image_count = count_archive_images(spooled.file)
+    except zipfile.BadZipFile as e:
+        spooled.close()
+        return jsonify({'error': f'Invalid zip archive: {e}'}), 400
+    if image_count > BATCH_MAX_MEMBERS:
+        spooled.close()
+        return jsonify({'error': f'Archive has {image_count} images; the limit is {BATCH_MAX_MEMBERS}'}), 413
+    spooled.file.seek(0)
+
+    allowed, remaining, reset_time = check_rate_limit(user_id, 'batch_prediction')
+    if not allowed:
+        spooled.close()
+        limit_info = get_rate_limit_info('batch_prediction')
+        return jsonify({
+            'error': f'Rate limit exceeded. You can score {limit_info["calls"]} archives per {limit_info["window_minutes"]} minutes.',
+            'rate_limit_exceeded': True,
+            'remaining': remaining,
+            'reset_time': reset_time
+        }), 429
+    if not batch_slots.acquire(blocking=False):
+        spooled.close()
+        return jsonify({'error': 'Another batch is running, try again shortly'}), 503, {'Retry-After': '30'}
+    record_api_call(user_id, 'batch_prediction')
+
+    top_k = str(options.get('top_k', 3))
+    top_k = max(1, min(int(top_k), len(class_names))) if top_k.isdigit() else 3
+    output_format = 'csv' if options.get('format') == 'csv' else 'jsonl'
+    print(f"📦 Batch prediction for user {user_id}: {image_count} images, {spooled.size / (1024 * 1024):.1f} MB archive")
+
+    def generate():
+        sources = iter_image_sources(spooled.file, max_file_bytes=BATCH_MAX_MEMBER_BYTES)
+        results = score_images(sources, inference_engine.predict_batch, class_names,
+                               workers=BATCH_DECODE_WORKERS, top_k=top_k)
+        try:
+            yield from (csv_rows(results) if output_format == 'csv' else jsonl_rows(results))
+        except Exception as e:
+            # The 200 is already sent; end the body with an error line instead of truncating silently
+            print(f"❌ Batch prediction error: {e}")
+            yield error_row(f'Batch stopped early: {e}', output_format)
+
+    def finish():
+        spooled.close()
+        batch_slots.release()
+
+    response = Response(
+        generate(),
+        mimetype='text/csv' if output_format == 'csv' else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename=predictions.{output_format}'}
+    )
+    # Runs even if the client disconnects before the first line
+    response.call_on_close(finish)
+    return response
+
 # --- 10b. Fast Language Translation Endpoint ---
 @app.route('/translate-results', methods=['POST'])
 def translate_results():
@@ -1615,7 +1695,7 @@ def translate_results():
         
         disease_name = data.get('disease_name')
         yield_impact = data.get('yield_impact')
-        details = data.get('details', {})
+        details = data.get('details') or {}
         market_prices = data.get('market_prices')
         target_language = data.get('target_language', 'en')
         
@@ -1631,20 +1711,32 @@ def translate_results():
                 'language': 'en'
             })
         
-        # Get translated content from Gemini with timeout (or return original if fails)
-        translated_disease = translate_with_gemini(disease_name, target_language) or disease_name
-        translated_yield_impact = translate_with_gemini(yield_impact, target_language) or yield_impact
+        # All fields in one Gemini request; strings translated before come
+        # from the translation memory
+        fields = {
+            'disease': disease_name,
+            'yield_impact': yield_impact,
+            'symptoms': details.get('symptoms', ''),
+            'organic_treatment': details.get('organic_treatment', ''),
+            'chemical_treatment': details.get('chemical_treatment', ''),
+            'prevention_tips': details.get('prevention_tips', '')
+        }
+        healthy = isinstance(market_prices, str) and "healthy" in market_prices.lower()
+        if not healthy:
+            fields['market_prices'] = market_prices
+        
+        translated, missing = translate_fields(fields, target_language, timeout=TRANSLATION_BATCH_TIMEOUT)
+        for name in missing:
+            # Keep original if translation fails
+            translated[name] = get_fallback_translation(fields[name], target_language) or fields[name]
         
-        # Translate treatment details (keep original if translation fails)
+        translated_disease = translated['disease']
+        translated_yield_impact = translated['yield_impact']
         translated_details = {
-            'symptoms': translate_with_gemini(details.get('symptoms', ''), target_language) or details.get('symptoms', ''),
-            'organic_treatment': translate_with_gemini(details.get('organic_treatment', ''), target_language) or details.get('organic_treatment', ''),
-            'chemical_treatment': translate_with_gemini(details.get('chemical_treatment', ''), target_language) or details.get('chemical_treatment', ''),
-            'prevention_tips': translate_with_gemini(details.get('prevention_tips', ''), target_language) or details.get('prevention_tips', '')
+            key: translated[key] for key in ('symptoms', 'organic_treatment', 'chemical_treatment', 'prevention_tips')
         }
         
-        # Translate market prices if not a healthy message
-        if isinstance(market_prices, str) and "healthy" in market_prices.lower():
+        if healthy:
             # It's a healthy plant message
             healthy_messages = {
                 'en': "Plant is healthy, no market rates needed.",
@@ -1660,7 +1752,7 @@ def translate_results():
             }
             translated_market_prices = healthy_messages.get(target_language, healthy_messages['en'])
         else:
-            translated_market_prices = translate_with_gemini(market_prices, target_language) or market_prices
+            translated_market_prices = translated['market_prices']
         
         response = {
             'disease': translated_disease,
@@ -1668,7 +1760,7 @@ def translate_results():
             'details': translated_details,
             'market_prices': translated_market_prices,
             'language': target_language,
-            'note': 'Showing English content due to translation service limits. Please try again in a minute.' if translated_disease == disease_name else None
+            'note': 'Showing English content due to translation service limits. Please try again in a minute.' if missing else None
         }
         
         print(f"✅ Translation completed for {target_language}")
@@ -1688,19 +1780,24 @@ def get_user_prediction_history():
         # Get user_id from query params or session
         user_id = request.args.get('user_id')
         limit = int(request.args.get('limit', 20))
+        page_token = request.args.get('cursor')
         
         if not user_id:
             return jsonify({'error': 'User ID required'}), 400
         
         print(f"📋 Fetching prediction history for user: {user_id}")
         
-        # Get predictions from database
-        predictions = db.get_user_predictions(user_id, limit)
+        # Get predictions from database (keyset-paginated)
+        try:
+            predictions = add_thumbnail_paths(db.get_user_predictions(user_id, limit, page_token))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         print(f"✅ Found {len(predictions)} predictions")
         return jsonify({
             'predictions': predictions,
-            'count': len(predictions)
+            'count': len(predictions),
+            'next_cursor': next_page_token(predictions, limit)
         })
         
     except Exception as e:
@@ -1813,13 +1910,18 @@ def get_chat_history():
             return jsonify({'error': 'Please login to view chat history'}), 401
         
         limit = request.args.get('limit', 20, type=int)
+        page_token = request.args.get('cursor')
         
-        # Get chat history from database
-        messages = db.get_chat_history(user_id, limit)
+        # Get chat history from database (keyset-paginated, older pages via cursor)
+        try:
+            messages = db.get_chat_history(user_id, limit, page_token)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'messages': messages,
             'count': len(messages),
+            'next_cursor': next_page_token(messages, limit),
             'success': True
         })
     
@@ -2376,34 +2478,18 @@ def get_inbox():
         
         limit = request.args.get('limit', 50, type=int)
         
-        # Get inbox messages
-        inbox_messages = db.get_inbox(user_id, limit)
-        
-        # Transform to conversation format
-        conversations = []
-        for msg in inbox_messages:
-            # Determine the other user (not the current user)
-            if msg['sender_id'] == user_id:
-                other_user_id = msg['receiver_id']
-                # Get receiver info
-                other_user = db.get_user_by_id(other_user_id)
-                other_user_name = other_user['name'] if other_user else 'Unknown User'
-                other_user_location = other_user.get('location', '') if other_user else ''
-            else:
-                other_user_id = msg['sender_id']
-                other_user_name = msg.get('sender_name', 'Unknown User')
-                # Get sender location
-                other_user = db.get_user_by_id(other_user_id)
-                other_user_location = other_user.get('location', '') if other_user else ''
-            
-            conversations.append({
-                'other_user_id': other_user_id,
-                'other_user_name': other_user_name,
-                'other_user_location': other_user_location,
-                'last_message': msg['message_text'],
-                'last_message_time': msg['created_at'],
-                'unread_count': msg.get('unread_count', 0) if msg['sender_id'] != user_id else 0
-            })
+        # One query returns every conversation with the other user's details
+        conversations = [
+            {
+                'other_user_id': conv['other_user_id'],
+                'other_user_name': conv['other_user_name'],
+                'other_user_location': conv['other_user_location'],
+                'last_message': conv['last_message'],
+                'last_message_time': conv['last_message_time'],
+                'unread_count': conv['unread_count']
+            }
+            for conv in db.get_inbox_conversations(user_id, limit)
+        ]
         
         # Calculate total unread count
         unread_count = sum(conv['unread_count'] for conv in conversations)
@@ -2429,8 +2515,14 @@ def get_message_thread(other_user_id):
         if not user_id:
             return jsonify({'error': 'Not authenticated'}), 401
         
-        # Get conversation messages
-        messages = db.get_conversation(user_id, other_user_id)
+        limit = request.args.get('limit', 100, type=int)
+        page_token = request.args.get('cursor')
+        
+        # Get the newest page of the conversation (older pages via cursor)
+        try:
+            messages = db.get_conversation(user_id, other_user_id, limit, page_token)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Format messages for frontend
         formatted_messages = []
@@ -2446,6 +2538,7 @@ def get_message_thread(other_user_id):
         return jsonify({
             'messages': formatted_messages,
             'count': len(formatted_messages),
+            'next_cursor': next_page_token(messages, limit),
             'success': True
         })
     
@@ -2810,17 +2903,12 @@ def get_notification_counts():
                 'success': True
             })
         
-        # Get unread message count
-        inbox = db.get_inbox(user_id, limit=100)
-        unread_messages = sum(1 for conv in inbox if not conv.get('is_read', True))
-        
-        # Get pending friend request count
-        friend_requests = db.get_friend_requests(user_id)
-        pending_requests = sum(1 for req in friend_requests if req.get('status') == 'pending')
+        # Single primary-key read of the maintained counters
+        counts = db.get_notification_counts(validate_user_id(user_id))
         
         return jsonify({
-            'unread_messages': unread_messages,
-            'friend_requests': pending_requests,
+            'unread_messages': counts['unread_messages'],
+            'friend_requests': counts['pending_friend_requests'],
             'success': True
         })
     
@@ -2834,6 +2922,50 @@ def get_notification_counts():
             'error': str(e)
         }), 200  # Return 200 to avoid error handling on client
 
+@app.route('/api/events/stream', methods=['GET'])
+def event_stream():
+    """Server-Sent Events stream of the logged-in user's message and friend request events"""
+    # Session only: a user_id parameter would let anyone read another user's events
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    subscription = event_hub.subscribe(user_id)
+    if subscription is None:
+        # Each stream holds a request thread; past SSE_MAX_STREAMS the client polls instead
+        return jsonify({'error': 'Too many open event streams', 'poll': True}), 503, {'Retry-After': '60'}
+    # Close long-lived streams periodically; EventSource reconnects on its own
+    max_seconds = int(os.getenv('SSE_MAX_SECONDS', 300))
+    
+    def counts_event():
+        counts = db.get_notification_counts(user_id)
+        return format_sse({'type': 'counts', 'data': {
+            'unread_messages': counts['unread_messages'],
+            'friend_requests': counts['pending_friend_requests']
+        }})
+    
+    def generate():
+        yield 'retry: 3000\n\n'
+        yield counts_event()
+        
+        deadline = time.time() + max_seconds
+        while time.time() < deadline:
+            event = subscription.get(timeout=15)
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            yield format_sse(event)
+            # Every event changes a badge, so send fresh counts along with it
+            yield counts_event()
+    
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs even if the client disconnects before the generator starts
+    response.call_on_close(lambda: event_hub.unsubscribe(subscription))
+    return response
+
 # --- Privacy Settings Routes ---
 @app.route('/privacy-settings')
 def privacy_settings_page():
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Batch Prediction Module
+Scores a folder or zip of leaf photos with the disease model: images are
+read one at a time, decoded on a thread pool (JPEG draft mode, no stored
+copy), classified in batches and written as JSONL or CSV with the top-k
+classes. Only a bounded window of images is in memory at any time, so
+thousands of field photos can be scored in one run.
+
+Usage:
+    python batch_predict.py photos/ --output results.csv
+    python batch_predict.py photos.zip --output results.jsonl --top-k 5
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from image_pipeline import MODEL_INPUT_SIZE, process_image
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp'}
+
+# Decode just large enough for a good 128x128 model input
+DECODE_MAX_SIDE = 256
+
+CLASSES_PATH = 'class_names.json'
+
+# /api/predict/batch: largest zip accepted and decoder threads per request
+BATCH_UPLOAD_MAX_BYTES = int(os.getenv('BATCH_UPLOAD_MAX_BYTES', 500 * 1024 * 1024))
+BATCH_DECODE_WORKERS = int(os.getenv('BATCH_DECODE_WORKERS', 4))
+# The upload cap only bounds compressed bytes, so zip members are limited too
+BATCH_MAX_MEMBERS = int(os.getenv('BATCH_MAX_MEMBERS', 5000))
+BATCH_MAX_MEMBER_BYTES = int(os.getenv('BATCH_MAX_MEMBER_BYTES', 40 * 1024 * 1024))
+# Batches running at once per worker (each holds a request thread until done)
+BATCH_MAX_CONCURRENT = int(os.getenv('BATCH_MAX_CONCURRENT', 1))
+
+TOO_LARGE_ERROR = 'File is larger than the per-image size limit'
+
+
+def _is_image(name):
+    base = os.path.basename(name)
+    return os.path.splitext(base)[1].lower() in IMAGE_EXTENSIONS and not base.startswith('.')
+
+
+def _archive_images(archive):
+    return [
+        info for info in archive.infolist()
+        if not info.is_dir() and _is_image(info.filename) and not info.filename.startswith('__MACOSX/')
+    ]
+
+
+def count_archive_images(file):
+    """Number of images in a zip file object (reads only the central directory)"""
+    with zipfile.ZipFile(file) as archive:
+        return len(_archive_images(archive))
+
+
+def iter_image_sources(source, max_file_bytes=None):
+    """
+    Yield (name, bytes) for every image in a directory tree or zip archive
+
+    Args:
+        source: Directory path, zip path, or a seekable zip file object
+        max_file_bytes: Largest uncompressed image read into memory; bigger
+            files are yielded as (name, None) and reported as errors
+
+    Raises:
+        zipfile.BadZipFile, zlib.error: Corrupt archive (possibly mid-iteration)
+    """
+    if not isinstance(source, str) or not os.path.isdir(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in _archive_images(archive):
+                if max_file_bytes and info.file_size > max_file_bytes:
+                    yield info.filename, None
+                    continue
+                with archive.open(info) as member:
+                    # Never trust the header alone: stop one byte past the limit
+                    data = member.read(max_file_bytes + 1 if max_file_bytes else -1)
+                yield info.filename, (None if max_file_bytes and len(data) > max_file_bytes else data)
+        return
+
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for filename in sorted(files):
+            if _is_image(filename):
+                path = os.path.join(root, filename)
+                if max_file_bytes and os.path.getsize(path) > max_file_bytes:
+                    yield os.path.relpath(path, source), None
+                    continue
+                with open(path, 'rb') as f:
+                    yield os.path.relpath(path, source), f.read()
+
+
+def format_disease_name(class_name):
+    return class_name.replace("___", " - ").replace("_", " ")
+
+
+def _decode(item):
+    name, data = item
+    if data is None:
+        return {'file': name, 'error': TOO_LARGE_ERROR}, None
+    try:
+        upload = process_image(data, MODEL_INPUT_SIZE, stored_max_side=DECODE_MAX_SIDE)
+        return {'file': name, 'sha256': upload.digest}, upload.tensor[0]
+    except ValueError as e:
+        return {'file': name, 'error': str(e)}, None
+
+
+def score_images(sources, predict_batch, class_names, batch_size=32, workers=4, top_k=3):
+    """
+    Classify images from iter_image_sources()
+
+    Args:
+        sources: Iterable of (name, bytes)
+        predict_batch: Callable mapping (N, H, W, C) to (N, classes)
+            (InferenceEngine.predict_batch or RemoteInferenceClient.predict_batch)
+        class_names: Model class names
+        batch_size: Images per model call
+        workers: Decoder threads
+        top_k: Classes reported per image
+
+    Yields:
+        dict: One result per image, in input order; unreadable images
+            carry an 'error' instead of a prediction
+    """
+    window = batch_size + 2 * workers  # decoded or decoding images held at once
+    rows, tensors = [], []
+
+    def flush():
+        if tensors:
+            probabilities = predict_batch(np.stack(tensors))
+            scored = iter(probabilities)
+            for row in rows:
+                if 'error' in row:
+                    continue
+                scores = next(scored)
+                best = np.argsort(scores)[::-1][:top_k]
+                row['disease'] = format_disease_name(class_names[best[0]])
+                row['predicted_class'] = class_names[best[0]]
+                row['confidence'] = round(float(scores[best[0]]), 4)
+                row['top_k'] = [
+                    {'class': class_names[i], 'confidence': round(float(scores[i]), 4)} for i in best
+                ]
+        yield from rows
+        rows.clear()
+        tensors.clear()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        sources = iter(sources)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < window:
+                item = next(sources, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    pending.append(pool.submit(_decode, item))
+            if not pending:
+                break
+
+            row, tensor = pending.popleft().result()
+            rows.append(row)
+            if tensor is not None:
+                tensors.append(tensor)
+                if len(tensors) >= batch_size:
+                    yield from flush()
+        yield from flush()
+
+
+CSV_FIELDS = ['file', 'sha256', 'disease', 'predicted_class', 'confidence', 'top_k', 'error']
+
+
+def csv_rows(results):
+    """Yield CSV lines (header first) for score_images() results"""
+    buffer = _LineBuffer()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.pop()
+    for result in results:
+        row = dict(result)
+        if 'top_k' in row:
+            row['top_k'] = ';'.join(f"{c['class']}:{c['confidence']}" for c in row['top_k'])
+        writer.writerow(row)
+        yield buffer.pop()
+
+
+def jsonl_rows(results):
+    """Yield JSONL lines for score_images() results"""
+    for result in results:
+        yield json.dumps(result, ensure_ascii=False) + '\n'
+
+
+def error_row(message, output_format='jsonl'):
+    """A single output line reporting that the run stopped early"""
+    if output_format == 'csv':
+        buffer = _LineBuffer()
+        csv.DictWriter(buffer, fieldnames=CSV_FIELDS).writerow({'error': message})
+        return buffer.pop()
+    return json.dumps({'error': message}, ensure_ascii=False) + '\n'
+
+
+class _LineBuffer:
+    """Minimal file object so csv.writer output can be streamed line by line"""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def pop(self):
+        text = ''.join(self.parts)
+        self.parts.clear()
+        return text
+
+
+def load_predictor():
+    """
+    The same model backend app.py uses: the inference server when
+    INFERENCE_SERVER is set, otherwise the model loaded in-process
+
+    Returns:
+        tuple: (engine or client, model type)
+    """
+    server = os.getenv('INFERENCE_SERVER')
+    if server:
+        from inference_server import RemoteInferenceClient, get_authkey
+        return RemoteInferenceClient(server, get_authkey(), timeout=300), "Remote"
+
+    from model_backend import load_inference_engine
+    return load_inference_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a folder or zip of leaf photos')
+    parser.add_argument('source', help='Directory of images or .zip archive')
+    parser.add_argument('--output', '-o', help='Output file (.jsonl or .csv); default stdout')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='Output format (default from --output)')
+    parser.add_argument('--batch-size', type=int, default=32, help='Images per model call')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help='Decoder threads')
+    parser.add_argument('--top-k', type=int, default=3, help='Classes reported per image')
+    args = parser.parse_args()
+
+    output_format = args.format or ('csv' if args.output and args.output.endswith('.csv') else 'jsonl')
+
+    with open(CLASSES_PATH) as f:
+        class_names = json.load(f)
+    engine, model_type = load_predictor()
+    if engine is None:
+        print("❌ No model could be loaded", file=sys.stderr)
+        return 1
+    if hasattr(engine, 'max_batch_size'):
+        engine.max_batch_size = args.batch_size
+    print(f"🧠 Scoring {args.source} with {model_type} model", file=sys.stderr)
+
+    start = time.time()
+    scored = [0]
+
+    def with_progress(results):
+        for result in results:
+            scored[0] += 1
+            if scored[0] % 100 == 0:
+                print(f"📸 {scored[0]} images ({scored[0] / (time.time() - start):.1f}/s)", file=sys.stderr)
+            yield result
+
+    results = with_progress(score_images(iter_image_sources(args.source), engine.predict_batch, class_names,
+                                         batch_size=args.batch_size, workers=args.workers, top_k=args.top_k))
+    lines = csv_rows(results) if output_format == 'csv' else jsonl_rows(results)
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        out.writelines(lines)
+    finally:
+        if args.output:
+            out.close()
+
+    print(f"✅ Scored {scored[0]} images in {time.time() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark read latency while writes are in flight
+
+Simulates /api/chat/history readers (get_chat_history) running alongside a
+/predict-style writer (save_prediction + save_chat_message) and compares the
+default rollback journal with the WAL storage profile.
+
+Usage:
+    python benchmark_db_concurrency.py [--seconds 5] [--readers 4]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from database import DatabaseManager
+from migrate_database import migrate_database
+
+PROFILES = {
+    'rollback-journal': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -2000,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000
+    },
+    'wal': None  # use get_storage_profile() defaults
+}
+
+
+def setup_database(profile):
+    """Create a temp database with the full schema and some chat history"""
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = DatabaseManager(path, storage_profile=profile)
+        migrate_database(path)
+
+    user_id = db.get_user_by_email('demo@raithamitra.com')['id']
+    for i in range(200):
+        db.save_chat_message(user_id, f'Question {i}', f'Answer {i}', language='en')
+    return db, user_id
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile in milliseconds"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index] * 1000
+
+
+def run_phase(db, user_id, seconds, readers, with_writer):
+    """Run readers (and optionally a writer) for a fixed time, return read latencies"""
+    stop = threading.Event()
+    latencies = []
+    lock = threading.Lock()
+    writes = [0]
+
+    def reader():
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            db.get_chat_history(user_id, limit=50)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    def writer():
+        while not stop.is_set():
+            db.save_prediction(user_id, 'Tomato___Late_blight', 0.97, 'High', 'Spots',
+                               'Neem oil', 'Mancozeb', 'Rotate crops', '{}')
+            db.save_chat_message(user_id, 'What is late blight?', 'A fungal disease...', language='en')
+            writes[0] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    if with_writer:
+        threads.append(threading.Thread(target=writer))
+
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return latencies, writes[0]
+
+
+def print_row(label, latencies, writes):
+    print(f"  {label:<14} reads={len(latencies):>6}  "
+          f"p50={percentile(latencies, 50):7.2f}ms  "
+          f"p95={percentile(latencies, 95):7.2f}ms  "
+          f"max={percentile(latencies, 100):8.2f}ms  "
+          f"writes={writes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQLite read latency under writes')
+    parser.add_argument('--seconds', type=float, default=5, help='Duration of each phase')
+    parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("📊 Chat history read latency: idle vs. concurrent /predict writes")
+    print("=" * 70)
+
+    for name, profile in PROFILES.items():
+        db, user_id = setup_database(profile)
+        print(f"\n🗄️  Profile: {name}")
+
+        idle, _ = run_phase(db, user_id, args.seconds, args.readers, with_writer=False)
+        print_row('idle', idle, 0)
+
+        busy, writes = run_phase(db, user_id, args.seconds, args.readers, with_writer=True)
+        print_row('with writer', busy, writes)
+
+        if idle and busy:
+            ratio = statistics.median(busy) / statistics.median(idle)
+            print(f"  p50 slowdown under writes: {ratio:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
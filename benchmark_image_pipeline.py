@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark /predict image handling on multi-megapixel phone photos
+
+Compares the previous path (base64-decode and PIL-open the upload twice:
+full-resolution LANCZOS resize for the model, then a full-resolution JPEG
+re-encode for static/uploads) with image_pipeline (one decode using JPEG
+draft mode, tensor and stored copy from the same image).
+
+Usage:
+    python benchmark_image_pipeline.py [--runs 5] [--sizes 8,12,48]
+"""
+
+import argparse
+import base64
+import io
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from image_pipeline import decode_base64_image, process_image
+
+# Megapixels -> (width, height) of common phone camera outputs
+PHONE_SIZES = {
+    8: (3264, 2448),
+    12: (4032, 3024),
+    48: (8000, 6000),
+}
+
+
+def make_photo(size, seed=0):
+    """A JPEG with photo-like content (smooth colour fields plus sensor noise)"""
+    rng = np.random.default_rng(seed)
+    base = Image.fromarray(rng.integers(0, 255, (48, 64, 3), dtype=np.uint8)).resize(size, Image.BICUBIC)
+    pixels = np.asarray(base, dtype=np.int16) + rng.integers(-12, 12, (size[1], size[0], 3), dtype=np.int16)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, 'JPEG', quality=92)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def legacy_path(image_data, save_path):
+    """The previous /predict handling: two decodes at full resolution"""
+    img = Image.open(io.BytesIO(base64.b64decode(image_data.split(',')[1])))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img = img.resize((128, 128), Image.LANCZOS)
+    tensor = np.expand_dims(np.array(img, dtype=np.float32) / 255.0, axis=0)
+    img.close()
+
+    image = Image.open(io.BytesIO(base64.b64decode(image_data.split(',')[1])))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(save_path, 'JPEG', quality=85)
+    return tensor
+
+
+def pipeline_path(image_data, save_path):
+    upload = process_image(decode_base64_image(image_data))
+    upload.save(save_path)
+    return upload.tensor
+
+
+def measure(fn, image_data, runs, save_path):
+    """Median seconds and peak traced memory (MB) over `runs` calls"""
+    fn(image_data, save_path)  # warm up
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(image_data, save_path)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(image_data, save_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak / 1e6, os.path.getsize(save_path) / 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the /predict image pipeline')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per size and path')
+    parser.add_argument('--sizes', default='8,12,48', help='Photo sizes in megapixels (8, 12, 48)')
+    args = parser.parse_args()
+
+    save_path = os.path.join(tempfile.mkdtemp(), 'upload.jpg')
+
+    print("=" * 78)
+    print(f"/predict image handling, median of {args.runs} runs")
+    print("=" * 78)
+    print(f"{'photo':>12} {'path':>9} {'time ms':>9} {'peak MB':>9} {'stored KB':>10} {'max |diff|':>11}")
+
+    for megapixels in [int(s) for s in args.sizes.split(',')]:
+        size = PHONE_SIZES[megapixels]
+        image_data = make_photo(size)
+        label = f"{megapixels}MP"
+
+        legacy = measure(legacy_path, image_data, args.runs, save_path)
+        legacy_tensor = legacy_path(image_data, save_path)
+        pipeline = measure(pipeline_path, image_data, args.runs, save_path)
+        diff = float(np.abs(pipeline_path(image_data, save_path) - legacy_tensor).max())
+
+        print(f"{label:>12} {'legacy':>9} {legacy[0] * 1000:>9.1f} {legacy[1]:>9.1f} {legacy[2]:>10.0f}")
+        print(f"{'':>12} {'pipeline':>9} {pipeline[0] * 1000:>9.1f} {pipeline[1]:>9.1f} {pipeline[2]:>10.0f} "
+              f"{diff:>11.3f}   ({legacy[0] / pipeline[0]:.1f}x faster)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
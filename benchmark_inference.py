@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark inference throughput against batch size
+
+Runs concurrent /predict-style callers against the micro-batching engine
+for a range of max batch sizes and reports images/second, average batch
+size and caller latency. Uses the real TFLite (or H5) model; --synthetic
+swaps in a NumPy stand-in of similar shape (two dense layers over the
+flattened 128x128x3 input) for machines without TensorFlow.
+
+Usage:
+    python benchmark_inference.py [--seconds 5] [--clients 16] [--batch-sizes 1,2,4,8,16]
+                                  [--pool-size N] [--threads N]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import numpy as np
+
+from inference_engine import InferenceEngine, InterpreterPool, KerasRunner
+
+TFLITE_MODEL_PATH = 'crop_disease_detection_model.tflite'
+H5_MODEL_PATH = 'crop_disease_detection_model.h5'
+
+
+class SyntheticRunner:
+    """NumPy classifier stand-in: (N, 49152) -> 256 -> 38"""
+
+    def __init__(self, classes=38, hidden=256):
+        rng = np.random.default_rng(0)
+        self.w1 = rng.standard_normal((128 * 128 * 3, hidden), dtype=np.float32) * 0.01
+        self.w2 = rng.standard_normal((hidden, classes), dtype=np.float32) * 0.1
+
+    def __call__(self, batch):
+        hidden = np.maximum(batch.reshape(len(batch), -1) @ self.w1, 0)
+        logits = hidden @ self.w2
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+def load_runner(synthetic, pool_size, num_threads):
+    """Return (runner factory, description)"""
+    if synthetic:
+        runner = SyntheticRunner()
+        return (lambda: runner), 'synthetic NumPy model'
+
+    import tensorflow as tf
+
+    def load_interpreter():
+        interpreter = tf.lite.Interpreter(model_path=TFLITE_MODEL_PATH, num_threads=num_threads)
+        interpreter.allocate_tensors()
+        return interpreter
+
+    try:
+        load_interpreter()
+        return (lambda: InterpreterPool(load_interpreter, size=pool_size)), \
+            f'TFLite ({TFLITE_MODEL_PATH}, pool {pool_size} x {num_threads} threads)'
+    except Exception as e:
+        print(f"⚠️  TFLite model unavailable ({e}), trying H5")
+
+    model = tf.keras.models.load_model(H5_MODEL_PATH, compile=False)
+    return (lambda: KerasRunner(model)), f'H5 ({H5_MODEL_PATH})'
+
+
+def run_phase(runner, max_batch_size, max_wait_ms, clients, seconds, workers):
+    """Drive the engine with `clients` concurrent callers for `seconds`"""
+    engine = InferenceEngine(runner, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, workers=workers)
+    image = np.random.default_rng(1).random((1, 128, 128, 3), dtype=np.float32)
+    engine.predict(image)  # warm up (tensor allocation)
+
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.time() + seconds
+
+    def client():
+        local = []
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            engine.predict(image)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start_stats = engine.get_stats()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - started
+    stats = engine.get_stats()
+    engine.shutdown()
+
+    batches = stats['batches'] - start_stats['batches']
+    ordered = sorted(latencies)
+    return {
+        'throughput': len(latencies) / elapsed,
+        'avg_batch': len(latencies) / batches if batches else 0,
+        'p50_ms': statistics.median(ordered) * 1000 if ordered else 0,
+        'p95_ms': ordered[int(0.95 * (len(ordered) - 1))] * 1000 if ordered else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark micro-batched inference throughput')
+    parser.add_argument('--seconds', type=float, default=5, help='Duration of each phase')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent callers')
+    parser.add_argument('--batch-sizes', default='1,2,4,8,16', help='Max batch sizes to try')
+    parser.add_argument('--max-wait-ms', type=float, default=5, help='Batching window')
+    parser.add_argument('--pool-size', type=int, default=1, help='Interpreters (and engine workers)')
+    parser.add_argument('--threads', type=int, default=1, help='num_threads per interpreter')
+    parser.add_argument('--synthetic', action='store_true', help='Use a NumPy stand-in model')
+    args = parser.parse_args()
+
+    try:
+        make_runner, description = load_runner(args.synthetic, args.pool_size, args.threads)
+    except ImportError:
+        print("❌ TensorFlow is not installed; rerun with --synthetic")
+        return 1
+
+    print("=" * 70)
+    print(f"Inference throughput: {description}, {args.clients} clients, "
+          f"{args.max_wait_ms:g}ms window")
+    print("=" * 70)
+    print(f"{'max batch':>10} {'images/s':>10} {'avg batch':>10} {'p50 ms':>10} {'p95 ms':>10}")
+
+    baseline = None
+    for size in [int(s) for s in args.batch_sizes.split(',')]:
+        result = run_phase(make_runner(), size, args.max_wait_ms, args.clients, args.seconds, args.pool_size)
+        baseline = baseline or result['throughput']
+        print(f"{size:>10} {result['throughput']:>10.1f} {result['avg_batch']:>10.2f} "
+              f"{result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f}   "
+              f"({result['throughput'] / baseline:.2f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
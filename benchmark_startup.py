@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark model cold start and resident memory per inference backend
+
+Each backend is measured in a fresh Python process: time to import the
+interpreter, time to load the .tflite model and run one inference, and
+the process RSS afterwards. 'tensorflow' is the old app.py path
+(import tensorflow; tf.lite.Interpreter); 'litert' and 'tflite_runtime'
+are the lightweight paths in model_backend.py.
+
+Usage:
+    python benchmark_startup.py [--runs 3] [--model crop_disease_detection_model.tflite]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from model_backend import INTERPRETER_BACKENDS, TFLITE_MODEL_PATH
+
+SNIPPET = '''
+import json, time
+start = time.perf_counter()
+import numpy as np
+from model_backend import resolve_interpreter
+result = {{}}
+try:
+    name, Interpreter = resolve_interpreter({backend!r})
+    result['import_s'] = time.perf_counter() - start
+    interpreter = Interpreter(model_path={model!r})
+    interpreter.allocate_tensors()
+    details = interpreter.get_input_details()[0]
+    interpreter.set_tensor(details['index'], np.zeros(details['shape'], dtype=np.float32))
+    interpreter.invoke()
+    result['load_s'] = time.perf_counter() - start - result['import_s']
+except Exception as e:
+    result['error'] = str(e).splitlines()[0][:80]
+with open('/proc/self/status') as f:
+    result['rss_mb'] = next(int(line.split()[1]) for line in f if line.startswith('VmRSS')) / 1024
+print(json.dumps(result))
+'''
+
+
+def measure(backend, model, runs):
+    """Run the snippet `runs` times in fresh processes and return medians"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', SNIPPET.format(backend=backend, model=model)],
+            capture_output=True, text=True
+        )
+        lines = output.stdout.strip().splitlines()
+        if not lines:
+            return {'error': (output.stderr.strip().splitlines() or ['no output'])[-1][:80]}
+        sample = json.loads(lines[-1])
+        if 'error' in sample:
+            return sample
+        samples.append(sample)
+
+    return {key: statistics.median(s[key] for s in samples) for key in ('import_s', 'load_s', 'rss_mb')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark inference backend cold start and RSS')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh processes per backend')
+    parser.add_argument('--model', default=TFLITE_MODEL_PATH, help='TFLite model file')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"Cold start per backend ({args.model}, median of {args.runs} runs)")
+    print("=" * 70)
+    print(f"{'backend':>15} {'import s':>10} {'load+invoke s':>14} {'RSS MB':>10}")
+
+    for name, _, _ in INTERPRETER_BACKENDS:
+        result = measure(name, args.model, args.runs)
+        if 'error' in result:
+            print(f"{name:>15}   unavailable: {result['error']}")
+        else:
+            print(f"{name:>15} {result['import_s']:>10.2f} {result['load_s']:>14.2f} {result['rss_mb']:>10.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
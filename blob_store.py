@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Blob Store Module
+Content-addressed storage for uploaded crop photos. Each image is stored
+once under static/uploads/blobs/<aa>/<bb>/<sha256>.jpg (sharded by hash)
+and predictions.image_path references it, so identical uploads share one
+file and concurrent uploads can never collide. A small thumbnail is kept
+next to each blob for the history views, and unreferenced blobs are
+removed by the garbage collector:
+
+    python blob_store.py gc [--dry-run] [--min-age 86400]
+    python blob_store.py import-legacy [--dry-run]
+"""
+
+import argparse
+import glob
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image, features
+
+BLOB_ROOT = os.getenv('BLOB_STORE_ROOT', os.path.join('static', 'uploads', 'blobs'))
+BLOB_URL_PREFIX = '/static/uploads/blobs/'
+LEGACY_UPLOADS_DIR = os.path.join('static', 'uploads')
+
+THUMBNAIL_SIZE = (256, 256)
+THUMBNAIL_FORMAT, THUMBNAIL_EXT = ('WEBP', '.thumb.webp') if features.check('webp') else ('JPEG', '.thumb.jpg')
+STORED_QUALITY = 85
+
+
+class BlobStore:
+    """
+    Content-addressed image store
+
+    Blobs are addressed by the sha256 of the uploaded bytes and written
+    atomically (temp file + os.replace), so a second upload of the same
+    photo only adds a reference.
+    """
+
+    def __init__(self, root=BLOB_ROOT, url_prefix=BLOB_URL_PREFIX):
+        self.root = root
+        self.url_prefix = url_prefix
+
+    def _relative(self, digest, suffix):
+        return os.path.join(digest[:2], digest[2:4], digest + suffix)
+
+    def path_for(self, digest, suffix='.jpg'):
+        """Filesystem path of a blob (or its thumbnail with suffix=THUMBNAIL_EXT)"""
+        return os.path.join(self.root, self._relative(digest, suffix))
+
+    def url_for(self, digest, suffix='.jpg'):
+        return self.url_prefix + self._relative(digest, suffix).replace(os.sep, '/')
+
+    def _write_atomic(self, path, write):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _touch(self, path):
+        """Refresh an existing blob's mtime so gc's min_age protects the new reference"""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put_image(self, image, digest=None):
+        """
+        Store a PIL image (and its thumbnail) unless the blob already exists
+
+        Args:
+            image: RGB PIL image to store as JPEG
+            digest: sha256 of the uploaded bytes; hashed from the encoded
+                JPEG when not given
+
+        Returns:
+            str: URL to record in predictions.image_path
+        """
+        encoded = None
+        if digest is None:
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=STORED_QUALITY)
+            encoded = buffer.getvalue()
+            digest = hashlib.sha256(encoded).hexdigest()
+
+        path = self.path_for(digest)
+        if not self._touch(path):
+            if encoded is not None:
+                self._write_atomic(path, lambda f: f.write(encoded))
+            else:
+                self._write_atomic(path, lambda f: image.save(f, 'JPEG', quality=STORED_QUALITY))
+        if not os.path.exists(self.path_for(digest, THUMBNAIL_EXT)):
+            self._write_thumbnail(image, digest)
+        return self.url_for(digest)
+
+    def put_file(self, file_path):
+        """
+        Move an existing image file into the store
+
+        Returns:
+            str: URL of the blob
+        """
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if not self._touch(path):
+            self._write_atomic(path, lambda f: f.write(data))
+        if not os.path.exists(self.path_for(digest, THUMBNAIL_EXT)):
+            with Image.open(io.BytesIO(data)) as image:
+                self._write_thumbnail(image.convert('RGB'), digest)
+        return self.url_for(digest)
+
+    def _write_thumbnail(self, image, digest):
+        thumbnail = image.copy()
+        thumbnail.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+        self._write_atomic(
+            self.path_for(digest, THUMBNAIL_EXT),
+            lambda f: thumbnail.save(f, THUMBNAIL_FORMAT, quality=75)
+        )
+
+    def thumbnail_url(self, image_url):
+        """Thumbnail URL for a blob URL, or None for images outside the store"""
+        if not image_url or not image_url.startswith(self.url_prefix) or not image_url.endswith('.jpg'):
+            return None
+        return image_url[:-len('.jpg')] + THUMBNAIL_EXT
+
+    def iter_blobs(self):
+        """Yield (digest, path) for every stored blob"""
+        for path in glob.glob(os.path.join(self.root, '??', '??', '*.jpg')):
+            digest = os.path.basename(path)[:-len('.jpg')]
+            if '.' not in digest:
+                yield digest, path
+
+    def collect_garbage(self, referenced_urls, min_age=86400, dry_run=False):
+        """
+        Remove blobs (and thumbnails) that no prediction references
+
+        Args:
+            referenced_urls: image_path values still in use
+            min_age: Seconds a blob must have existed before it can be removed,
+                so uploads whose prediction row is still being written survive
+            dry_run: Only report what would be removed
+
+        Returns:
+            dict: scanned, removed, bytes_freed
+        """
+        referenced = set(referenced_urls)
+        cutoff = time.time() - min_age
+        stats = {'scanned': 0, 'removed': 0, 'bytes_freed': 0}
+
+        for digest, path in self.iter_blobs():
+            stats['scanned'] += 1
+            if self.url_for(digest) in referenced:
+                continue
+            try:
+                if os.path.getmtime(path) > cutoff:
+                    continue
+                for victim in (path, self.path_for(digest, THUMBNAIL_EXT)):
+                    if os.path.exists(victim):
+                        stats['bytes_freed'] += os.path.getsize(victim)
+                        if not dry_run:
+                            os.remove(victim)
+                stats['removed'] += 1
+            except FileNotFoundError:
+                continue
+
+        # Thumbnails whose blob is gone, and temp files left by a crash
+        for pattern in ('*' + THUMBNAIL_EXT, '.tmp-*'):
+            for path in glob.glob(os.path.join(self.root, '??', '??', pattern)):
+                digest = os.path.basename(path).split('.')[0]
+                if pattern.startswith('.tmp') or not os.path.exists(self.path_for(digest)):
+                    if os.path.getmtime(path) <= cutoff and not dry_run:
+                        os.remove(path)
+        return stats
+
+
+# Global blob store instance
+blob_store = BlobStore()
+
+
+def store_upload(upload):
+    """Store a DecodedImage (image_pipeline) and return its image_path URL"""
+    return blob_store.put_image(upload.image, upload.digest)
+
+
+def thumbnail_url(image_url):
+    """Thumbnail URL for an image_path, or None if it has no thumbnail"""
+    return blob_store.thumbnail_url(image_url)
+
+
+def import_legacy_uploads(db, uploads_dir=LEGACY_UPLOADS_DIR, dry_run=False):
+    """
+    Move static/uploads/prediction_*.jpg files into the blob store and
+    point their predictions at the blobs
+
+    Returns:
+        dict: files, blobs, rows_updated
+    """
+    stats = {'files': 0, 'blobs': 0, 'rows_updated': 0}
+    blobs = set()
+    for path in sorted(glob.glob(os.path.join(uploads_dir, 'prediction_*.jpg'))):
+        stats['files'] += 1
+        old_url = '/static/uploads/' + os.path.basename(path)
+        if dry_run:
+            with open(path, 'rb') as f:
+                blobs.add(hashlib.sha256(f.read()).hexdigest())
+            continue
+        new_url = blob_store.put_file(path)
+        blobs.add(new_url)
+        stats['rows_updated'] += db.update_prediction_image_path(old_url, new_url)
+        os.remove(path)
+    stats['blobs'] = len(blobs)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain the content-addressed upload store')
+    parser.add_argument('command', choices=['gc', 'import-legacy'])
+    parser.add_argument('--dry-run', action='store_true', help='Report without changing anything')
+    parser.add_argument('--min-age', type=int, default=86400,
+                        help='gc: only remove blobs older than this many seconds')
+    args = parser.parse_args()
+
+    from database import DatabaseManager
+    db = DatabaseManager()
+
+    if args.command == 'gc':
+        referenced = db.get_prediction_image_paths(BLOB_URL_PREFIX)
+        stats = blob_store.collect_garbage(referenced, min_age=args.min_age, dry_run=args.dry_run)
+        verb = 'Would remove' if args.dry_run else 'Removed'
+        print(f"🗑️ {verb} {stats['removed']} of {stats['scanned']} blobs "
+              f"({stats['bytes_freed'] / 1024:.0f} KB), {len(referenced)} referenced")
+    else:
+        stats = import_legacy_uploads(db, dry_run=args.dry_run)
+        print(f"📦 {stats['files']} legacy uploads -> {stats['blobs']} blobs, "
+              f"{stats['rows_updated']} predictions updated{' (dry run)' if args.dry_run else ''}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
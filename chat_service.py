@@ -7,16 +7,10 @@ import os
 import re
 import json
 from datetime import datetime
-import google.generativeai as genai
+from llm_client import generate_text, llm_available
 from database import DatabaseManager
+from write_behind import queue_chat_message
 
-# Initialize Gemini AI
-api_key = os.getenv('GEMINI_API_KEY')
-if api_key:
-    genai.configure(api_key=api_key)
-    gemini_model = genai.GenerativeModel('gemini-2.5-flash')
-else:
-    gemini_model = None
 
 db = DatabaseManager()
 
@@ -162,7 +156,7 @@ def generate_contextual_response(user_id, message, language='en'):
     Generate AI response with context using Gemini AI
     Returns the response text and extracted context
     """
-    if not gemini_model:
+    if not llm_available():
         return {
             'response': "I'm sorry, the AI service is currently unavailable. Please try again later.",
             'context': {},
@@ -217,10 +211,10 @@ INSTRUCTIONS:
 Respond to the farmer's question now:"""
         
         # Generate response
-        response = gemini_model.generate_content(prompt)
+        response_text = generate_text(prompt, caller='chat')
         
-        if response and response.text:
-            response_text = response.text.strip()
+        if response_text:
+            response_text = response_text.strip()
             
             # Clean up markdown formatting
             # Remove bold markers
@@ -232,8 +226,9 @@ Respond to the farmer's question now:"""
             # Remove any remaining asterisks
             response_text = response_text.replace('**', '').replace('*', '')
             
-            # Save to database
-            db.save_chat_message(
+            # Save to database (write-behind)
+            queue_chat_message(
+                db,
                 user_id=user_id,
                 message=message,
                 response=response_text,
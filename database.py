@@ -1,18 +1,115 @@
+import os
+import base64
 import sqlite3
 import json
+from contextlib import contextmanager
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from db_pool import get_pool, get_storage_profile, apply_storage_profile, start_maintenance
+from event_hub import publish_event
+from query_stats import instrument_connection
+
+def encode_page_token(created_at, row_id):
+    """Encode a (created_at, id) keyset position as an opaque page token"""
+    raw = json.dumps([created_at, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_page_token(token):
+    """Decode a page token into (created_at, id); raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, row_id = json.loads(raw)
+        return str(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Invalid page token')
+
+def next_page_token(rows, limit):
+    """Token for the page after rows, or None if rows was the last page"""
+    if not limit or len(rows) < limit:
+        return None
+    oldest = min(rows, key=lambda row: (row['created_at'], row['id']))
+    return encode_page_token(oldest['created_at'], oldest['id'])
 
 class DatabaseManager:
-    def __init__(self, db_path='raitha_mitra.db'):
+    def __init__(self, db_path='raitha_mitra.db', use_pool=None, pool_size=None, storage_profile=None):
         self.db_path = db_path
+        self.storage_profile = storage_profile if storage_profile is not None else get_storage_profile()
+        if use_pool is None:
+            use_pool = os.getenv('DB_POOL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        # All managers for the same file share one pool (see db_pool.get_pool)
+        self.pool = get_pool(db_path, pool_size, self.storage_profile) if use_pool else None
         self.init_database()
     
     def get_connection(self):
-        """Get database connection"""
+        """
+        Get database connection (pooled unless DB_POOL_ENABLED=false)
+        
+        Statements run through it are recorded in query_stats unless
+        QUERY_STATS_ENABLED=false.
+        """
+        if self.pool:
+            return instrument_connection(self.pool.get_connection())
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row  # Enable dict-like access
-        return conn
+        apply_storage_profile(conn, self.storage_profile)
+        return instrument_connection(conn)
+    
+    def _keyset_clause(self, page_token):
+        """
+        WHERE fragment and params for newest-first keyset pagination
+        
+        Rows are ordered by (created_at, id) DESC, so the next page starts
+        strictly below the position encoded in page_token.
+        """
+        if not page_token:
+            return '', ()
+        created_at, row_id = decode_page_token(page_token)
+        return 'AND (created_at, id) < (?, ?)', (created_at, row_id)
+    
+    def _insert_many(self, table, columns, rows):
+        """
+        Insert many rows with executemany in a single transaction
+        
+        Returns the new row ids in insertion order. The transaction holds the
+        write lock, so AUTOINCREMENT ids for the batch are contiguous.
+        """
+        if not rows:
+            return []
+        
+        placeholders = ', '.join('?' for _ in columns)
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(sql, rows)
+            last_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+        
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+    
+    def start_maintenance(self, interval=None):
+        """Start periodic WAL checkpoint / PRAGMA optimize (see db_pool.DatabaseMaintenance)"""
+        return start_maintenance(self.db_path, interval)
+    
+    @contextmanager
+    def connection(self):
+        """
+        Context manager for a database connection
+        
+        Commits on success and rolls back on error. Nested use on the same
+        thread shares one connection and only the outermost block commits.
+        """
+        conn = self.get_connection()
+        outermost = getattr(conn, 'outermost', True)
+        try:
+            yield conn
+            if outermost:
+                conn.commit()
+        except Exception:
+            if outermost:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
     
     def init_database(self):
         """Initialize database with required tables"""
@@ -51,12 +148,31 @@ class DatabaseManager:
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_predictions_user_date
+            ON predictions(user_id, created_at)
+        ''')
         
-
+        # Notification counters (kept up to date by the messaging/friend methods)
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'notification_counters'")
+        counters_existed = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notification_counters (
+                user_id INTEGER PRIMARY KEY,
+                unread_messages INTEGER NOT NULL DEFAULT 0,
+                pending_friend_requests INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
         
         conn.commit()
         conn.close()
         
+        # Backfill counters the first time the table appears on a migrated database
+        if not counters_existed:
+            self.rebuild_notification_counters()
+        
         # Create demo user
         self.create_demo_user()
     
@@ -78,19 +194,16 @@ class DatabaseManager:
     
     def create_user(self, name, email, mobile, password, location):
         """Create a new user"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         password_hash = generate_password_hash(password)
         
-        cursor.execute('''
-            INSERT INTO users (name, email, mobile, password_hash, location, verified)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (name, email, mobile, password_hash, location, True))
-        
-        user_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        # Duplicate email/mobile raises IntegrityError; the with-block still releases the connection
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO users (name, email, mobile, password_hash, location, verified)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (name, email, mobile, password_hash, location, True))
+            user_id = cursor.lastrowid
         
         return user_id
     
@@ -188,17 +301,42 @@ class DatabaseManager:
         
         return prediction_id
     
-    def get_user_predictions(self, user_id, limit=10):
-        """Get user's prediction history"""
+    def save_predictions_bulk(self, predictions):
+        """
+        Save several prediction results in one transaction
+        
+        Args:
+            predictions: list of dicts with save_prediction() keyword arguments
+        
+        Returns:
+            list: New prediction ids, in the same order as predictions
+        """
+        rows = [
+            (p['user_id'], p.get('image_path'), p['disease_name'], p['confidence'], p['yield_impact'],
+             p['symptoms'], p['organic_treatment'], p['chemical_treatment'],
+             p['prevention_tips'], p['market_prices'])
+            for p in predictions
+        ]
+        return self._insert_many(
+            'predictions',
+            ('user_id', 'image_path', 'disease_name', 'confidence', 'yield_impact',
+             'symptoms', 'organic_treatment', 'chemical_treatment', 'prevention_tips', 'market_prices'),
+            rows
+        )
+    
+    def get_user_predictions(self, user_id, limit=10, page_token=None):
+        """Get user's prediction history (newest first, keyset-paginated)"""
+        keyset, keyset_params = self._keyset_clause(page_token)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT * FROM predictions 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC 
+            WHERE user_id = ? {keyset}
+            ORDER BY created_at DESC, id DESC 
             LIMIT ?
-        ''', (user_id, limit))
+        ''', (user_id, *keyset_params, limit))
         
         predictions = cursor.fetchall()
         conn.close()
@@ -220,9 +358,37 @@ class DatabaseManager:
         
         predictions = cursor.fetchall()
         conn.close()
-        
+
         return [dict(pred) for pred in predictions]
-    
+
+    def get_prediction_image_paths(self, prefix):
+        """Distinct image_path values starting with prefix (blob store gc)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT DISTINCT image_path FROM predictions
+            WHERE image_path LIKE ? || '%'
+        ''', (prefix,))
+
+        paths = [row[0] for row in cursor.fetchall()]
+        conn.close()
+
+        return paths
+
+    def update_prediction_image_path(self, old_path, new_path):
+        """Point every prediction using old_path at new_path; returns rows updated"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('UPDATE predictions SET image_path = ? WHERE image_path = ?', (new_path, old_path))
+
+        updated = cursor.rowcount
+        conn.commit()
+        conn.close()
+
+        return updated
+
     # Chat message storage and retrieval methods
     def save_chat_message(self, user_id, message, response, context_data=None, language='en'):
         """Save chat message and AI response"""
@@ -242,17 +408,41 @@ class DatabaseManager:
         
         return message_id
     
-    def get_chat_history(self, user_id, limit=50):
-        """Get chat history for a user"""
+    def save_chat_messages_bulk(self, messages):
+        """
+        Save several chat messages in one transaction
+        
+        Args:
+            messages: list of dicts with save_chat_message() keyword arguments
+        
+        Returns:
+            list: New message ids, in the same order as messages
+        """
+        rows = [
+            (m['user_id'], m['message'], m['response'],
+             json.dumps(m['context_data']) if m.get('context_data') else None,
+             m.get('language', 'en'))
+            for m in messages
+        ]
+        return self._insert_many(
+            'chat_messages',
+            ('user_id', 'message', 'response', 'context_data', 'language'),
+            rows
+        )
+    
+    def get_chat_history(self, user_id, limit=50, page_token=None):
+        """Get chat history for a user (pages go back in time, each page oldest first)"""
+        keyset, keyset_params = self._keyset_clause(page_token)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT * FROM chat_messages
-            WHERE user_id = ?
-            ORDER BY created_at DESC
+            WHERE user_id = ? {keyset}
+            ORDER BY created_at DESC, id DESC
             LIMIT ?
-        ''', (user_id, limit))
+        ''', (user_id, *keyset_params, limit))
         
         messages = cursor.fetchall()
         conn.close()
@@ -332,6 +522,27 @@ class DatabaseManager:
         
         return activity_id
     
+    def save_farm_activities_bulk(self, activities):
+        """
+        Save several farm activities in one transaction
+        
+        Args:
+            activities: list of dicts with save_farm_activity() keyword arguments
+        
+        Returns:
+            list: New activity ids, in the same order as activities
+        """
+        rows = [
+            (a['user_id'], a['activity_type'], a['crop_type'], a['scheduled_date'],
+             a.get('description'), a.get('ai_generated', False))
+            for a in activities
+        ]
+        return self._insert_many(
+            'farm_activities',
+            ('user_id', 'activity_type', 'crop_type', 'scheduled_date', 'description', 'ai_generated'),
+            rows
+        )
+    
     def get_farm_schedule(self, user_id, start_date=None, end_date=None):
         """Get farm schedule for a date range"""
         conn = self.get_connection()
@@ -372,17 +583,19 @@ class DatabaseManager:
         
         return success
     
-    def get_activity_history(self, user_id, limit=50):
-        """Get activity history for a user"""
+    def get_activity_history(self, user_id, limit=50, page_token=None):
+        """Get activity history for a user (newest first, keyset-paginated)"""
+        keyset, keyset_params = self._keyset_clause(page_token)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT * FROM farm_activities
-            WHERE user_id = ?
-            ORDER BY created_at DESC
+            WHERE user_id = ? {keyset}
+            ORDER BY created_at DESC, id DESC
             LIMIT ?
-        ''', (user_id, limit))
+        ''', (user_id, *keyset_params, limit))
         
         activities = cursor.fetchall()
         conn.close()
@@ -469,6 +682,27 @@ class DatabaseManager:
         
         return expense_id
     
+    def save_expenses_bulk(self, expenses):
+        """
+        Save several farm expenses in one transaction
+        
+        Args:
+            expenses: list of dicts with save_expense() keyword arguments
+        
+        Returns:
+            list: New expense ids, in the same order as expenses
+        """
+        rows = [
+            (e['user_id'], e['category'], e['amount'], e['expense_date'],
+             e.get('description'), e.get('crop_related'))
+            for e in expenses
+        ]
+        return self._insert_many(
+            'farm_expenses',
+            ('user_id', 'category', 'amount', 'expense_date', 'description', 'crop_related'),
+            rows
+        )
+    
     def get_expenses(self, user_id, start_date=None, end_date=None):
         """Get expenses for a date range"""
         conn = self.get_connection()
@@ -515,6 +749,34 @@ class DatabaseManager:
         
         return score_id
     
+    def save_financial_scores_bulk(self, scores):
+        """
+        Save several financial health scores in one transaction
+        
+        Args:
+            scores: list of dicts with save_financial_score() keyword arguments
+        
+        Returns:
+            list: New score ids, in the same order as scores
+        """
+        rows = []
+        for score in scores:
+            breakdown = score.get('score_breakdown')
+            details = breakdown if isinstance(breakdown, dict) else {}
+            rows.append((
+                score['user_id'], score['overall_score'],
+                details.get('cost_efficiency_score'),
+                details.get('yield_performance_score'),
+                details.get('market_timing_score'),
+                json.dumps(breakdown) if breakdown else None
+            ))
+        return self._insert_many(
+            'financial_scores',
+            ('user_id', 'overall_score', 'cost_efficiency_score', 'yield_performance_score',
+             'market_timing_score', 'score_breakdown'),
+            rows
+        )
+    
     def get_latest_financial_score(self, user_id):
         """Get latest financial health score for a user"""
         conn = self.get_connection()
@@ -558,9 +820,15 @@ class DatabaseManager:
         ''', (sender_id, receiver_id, message_text))
         
         message_id = cursor.lastrowid
+        self._adjust_counter(cursor, receiver_id, 'unread_messages', 1)
         conn.commit()
         conn.close()
         
+        # Push to both participants (the sender may have other tabs open)
+        event = {'message_id': message_id, 'sender_id': sender_id, 'receiver_id': receiver_id}
+        publish_event(receiver_id, 'message', event)
+        publish_event(sender_id, 'message', event)
+        
         return message_id
     
     def get_inbox(self, user_id, limit=50):
@@ -593,40 +861,109 @@ class DatabaseManager:
         
         return [dict(msg) for msg in messages]
     
-    def get_conversation(self, user_id, other_user_id):
-        """Get conversation between two users"""
+    def get_inbox_conversations(self, user_id, limit=50):
+        """
+        Get one row per conversation in a single set-based query
+        
+        Each row has the other participant's id, name and location, the last
+        message and the number of unread messages from that participant.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
+            WITH conversations AS (
+                SELECT CASE WHEN sender_id = :user_id THEN receiver_id ELSE sender_id END AS other_user_id,
+                       MAX(id) AS last_message_id,
+                       SUM(CASE WHEN receiver_id = :user_id AND is_read = 0 THEN 1 ELSE 0 END) AS unread_count
+                FROM messages
+                WHERE sender_id = :user_id OR receiver_id = :user_id
+                GROUP BY other_user_id
+            )
+            SELECT c.other_user_id,
+                   COALESCE(u.name, 'Unknown User') AS other_user_name,
+                   COALESCE(u.location, '') AS other_user_location,
+                   m.message_text AS last_message,
+                   m.created_at AS last_message_time,
+                   m.sender_id AS last_sender_id,
+                   c.unread_count
+            FROM conversations c
+            JOIN messages m ON m.id = c.last_message_id
+            LEFT JOIN users u ON u.id = c.other_user_id
+            ORDER BY m.created_at DESC, m.id DESC
+            LIMIT :limit
+        ''', {'user_id': user_id, 'limit': limit})
+        
+        conversations = cursor.fetchall()
+        conn.close()
+        
+        return [dict(conv) for conv in conversations]
+    
+    def get_conversation(self, user_id, other_user_id, limit=None, page_token=None):
+        """
+        Get conversation between two users, oldest first
+        
+        With a limit, returns the newest `limit` messages before page_token.
+        Each direction is read from idx_messages_pair, so a page costs the same
+        however long the thread is.
+        """
+        keyset, keyset_params = self._keyset_clause(page_token)
+        limit_clause = 'LIMIT ?' if limit else ''
+        limit_params = (limit,) if limit else ()
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
             SELECT m.*, 
                    sender.name as sender_name,
                    receiver.name as receiver_name
-            FROM messages m
+            FROM (
+                SELECT * FROM (
+                    SELECT * FROM messages
+                    WHERE sender_id = ? AND receiver_id = ? {keyset}
+                    ORDER BY created_at DESC, id DESC {limit_clause}
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT * FROM messages
+                    WHERE sender_id = ? AND receiver_id = ? {keyset}
+                    ORDER BY created_at DESC, id DESC {limit_clause}
+                )
+            ) m
             JOIN users sender ON m.sender_id = sender.id
             JOIN users receiver ON m.receiver_id = receiver.id
-            WHERE (m.sender_id = ? AND m.receiver_id = ?)
-               OR (m.sender_id = ? AND m.receiver_id = ?)
-            ORDER BY m.created_at ASC
-        ''', (user_id, other_user_id, other_user_id, user_id))
+            ORDER BY m.created_at DESC, m.id DESC
+            {limit_clause}
+        ''', (user_id, other_user_id, *keyset_params, *limit_params,
+              other_user_id, user_id, *keyset_params, *limit_params,
+              *limit_params))
         
         messages = cursor.fetchall()
         conn.close()
         
-        return [dict(msg) for msg in messages]
+        return [dict(msg) for msg in reversed(messages)]
     
     def mark_message_read(self, message_id):
         """Mark a message as read"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # Only the call that flips is_read decrements the counter
         cursor.execute('''
             UPDATE messages
             SET is_read = 1
-            WHERE id = ?
+            WHERE id = ? AND is_read = 0
         ''', (message_id,))
         
-        success = cursor.rowcount > 0
+        if cursor.rowcount > 0:
+            cursor.execute('SELECT receiver_id FROM messages WHERE id = ?', (message_id,))
+            self._adjust_counter(cursor, cursor.fetchone()['receiver_id'], 'unread_messages', -1)
+            success = True
+        else:
+            # Already read still counts as success
+            cursor.execute('SELECT 1 FROM messages WHERE id = ?', (message_id,))
+            success = cursor.fetchone() is not None
         conn.commit()
         conn.close()
         
@@ -666,6 +1003,58 @@ class DatabaseManager:
         
         return result['count'] > 0
 
+    # Notification counter methods
+    def _adjust_counter(self, cursor, user_id, column, delta):
+        """Add delta to one of a user's notification counters (never below zero)"""
+        cursor.execute(f'''
+            INSERT INTO notification_counters (user_id, {column}) VALUES (?, MAX(?, 0))
+            ON CONFLICT(user_id) DO UPDATE SET
+                {column} = MAX({column} + ?, 0),
+                updated_at = CURRENT_TIMESTAMP
+        ''', (user_id, delta, delta))
+    
+    def get_notification_counts(self, user_id):
+        """Get unread message and pending friend request counts for a user"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT unread_messages, pending_friend_requests
+            FROM notification_counters
+            WHERE user_id = ?
+        ''', (user_id,))
+        
+        counts = cursor.fetchone()
+        conn.close()
+        
+        if not counts:
+            return {'unread_messages': 0, 'pending_friend_requests': 0}
+        return dict(counts)
+    
+    def rebuild_notification_counters(self):
+        """Recompute every user's notification counters from messages and friend_requests"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('messages', 'friend_requests')")
+        if len(cursor.fetchall()) < 2:
+            # Messaging tables are created by migrate_database.py
+            conn.close()
+            return False
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO notification_counters (user_id, unread_messages, pending_friend_requests)
+            SELECT u.id,
+                   (SELECT COUNT(*) FROM messages WHERE receiver_id = u.id AND is_read = 0),
+                   (SELECT COUNT(*) FROM friend_requests WHERE recipient_id = u.id AND status = 'pending')
+            FROM users u
+        ''')
+        
+        conn.commit()
+        conn.close()
+        
+        return True
+
     # Friend network methods
     def send_friend_request(self, requester_id, recipient_id):
         """Send a friend request"""
@@ -684,8 +1073,10 @@ class DatabaseManager:
             ''', (requester_id, recipient_id))
             
             request_id = cursor.lastrowid
+            self._adjust_counter(cursor, recipient_id, 'pending_friend_requests', 1)
             conn.commit()
             conn.close()
+            publish_event(recipient_id, 'friend_request', {'request_id': request_id, 'requester_id': requester_id})
             return request_id
         except sqlite3.IntegrityError:
             # Request already exists
@@ -697,27 +1088,23 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Get request details
+        # Update request status (only one concurrent accept/decline can win)
         cursor.execute('''
-            SELECT requester_id, recipient_id FROM friend_requests
+            UPDATE friend_requests
+            SET status = 'accepted', responded_at = CURRENT_TIMESTAMP
             WHERE id = ? AND status = 'pending'
         ''', (request_id,))
         
-        request = cursor.fetchone()
-        
-        if not request:
+        if cursor.rowcount == 0:
             conn.close()
             return False
         
+        # Get request details
+        cursor.execute('SELECT requester_id, recipient_id FROM friend_requests WHERE id = ?', (request_id,))
+        request = cursor.fetchone()
         requester_id = request['requester_id']
         recipient_id = request['recipient_id']
-        
-        # Update request status
-        cursor.execute('''
-            UPDATE friend_requests
-            SET status = 'accepted', responded_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (request_id,))
+        self._adjust_counter(cursor, recipient_id, 'pending_friend_requests', -1)
         
         # Create friendship (ensure user1_id < user2_id for consistency)
         user1_id = min(requester_id, recipient_id)
@@ -728,15 +1115,17 @@ class DatabaseManager:
                 INSERT INTO friendships (user1_id, user2_id)
                 VALUES (?, ?)
             ''', (user1_id, user2_id))
-            
-            conn.commit()
-            conn.close()
-            return True
         except sqlite3.IntegrityError:
             # Friendship already exists
-            conn.commit()
-            conn.close()
-            return True
+            pass
+        
+        conn.commit()
+        conn.close()
+        
+        event = {'request_id': request_id, 'requester_id': requester_id, 'recipient_id': recipient_id}
+        publish_event(requester_id, 'friend_request_accepted', event)
+        publish_event(recipient_id, 'friend_request_accepted', event)
+        return True
     
     def decline_friend_request(self, request_id):
         """Decline a friend request"""
@@ -750,6 +1139,9 @@ class DatabaseManager:
         ''', (request_id,))
         
         success = cursor.rowcount > 0
+        if success:
+            cursor.execute('SELECT recipient_id FROM friend_requests WHERE id = ?', (request_id,))
+            self._adjust_counter(cursor, cursor.fetchone()['recipient_id'], 'pending_friend_requests', -1)
         conn.commit()
         conn.close()
         
@@ -0,0 +1,457 @@
+"""
+Database Connection Pool Module
+Keeps long-lived SQLite connections so requests stop paying connect/teardown costs
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+# Values accepted for the enumerated PRAGMAs (anything else is rejected, never interpolated)
+PRAGMA_CHOICES = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA', '0', '1', '2', '3'},
+    'temp_store': {'DEFAULT', 'FILE', 'MEMORY', '0', '1', '2'}
+}
+INTEGER_PRAGMAS = {'mmap_size', 'cache_size', 'busy_timeout'}
+
+
+def validate_pragma(name, value):
+    """
+    Check a PRAGMA name/value pair before it is formatted into SQL
+
+    Returns:
+        str: Normalized value
+
+    Raises:
+        ValueError: Unknown PRAGMA or value outside its allowed set
+    """
+    if name in INTEGER_PRAGMAS:
+        return str(int(value))
+    if name in PRAGMA_CHOICES:
+        normalized = str(value).strip().upper()
+        if normalized not in PRAGMA_CHOICES[name]:
+            raise ValueError(f"invalid value {value!r} for PRAGMA {name}")
+        return normalized
+    raise ValueError(f"unsupported PRAGMA {name}")
+
+
+def get_storage_profile():
+    """
+    Build the PRAGMA profile from environment variables
+
+    Returns:
+        dict: PRAGMA name -> value, applied in order on every new connection
+    """
+    return {
+        'journal_mode': os.getenv('DB_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('DB_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': int(os.getenv('DB_MMAP_SIZE', 128 * 1024 * 1024)),
+        'cache_size': int(os.getenv('DB_CACHE_SIZE', -16000)),  # negative = KiB
+        'temp_store': os.getenv('DB_TEMP_STORE', 'MEMORY'),
+        'busy_timeout': int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
+    }
+
+
+def apply_storage_profile(conn, profile=None):
+    """
+    Apply a PRAGMA profile to a connection
+
+    Args:
+        conn: sqlite3 connection
+        profile: dict of PRAGMA name -> value (defaults to get_storage_profile())
+    """
+    if profile is None:
+        profile = get_storage_profile()
+
+    for name, value in profile.items():
+        if value is None:
+            continue
+        try:
+            conn.execute(f'PRAGMA {name} = {validate_pragma(name, value)}')
+        except (ValueError, sqlite3.Error) as e:
+            print(f"⚠️  Could not apply PRAGMA {name}={value}: {e}")
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled sqlite3 connection
+
+    Behaves like a sqlite3.Connection, except that close() hands the
+    connection back to the pool instead of closing it. Used as a context
+    manager it commits (outermost checkout only) or rolls back, then
+    releases the checkout.
+    """
+
+    def __init__(self, pool, entry, owner, outermost):
+        self._pool = pool
+        self._entry = entry
+        self._conn = entry[0]
+        self._owner = owner
+        self._released = False
+        self.outermost = outermost
+
+    def close(self):
+        """Return the connection to the pool"""
+        if not self._released:
+            self._released = True
+            self._pool.release(self._entry, self._owner)
+
+    def __getattr__(self, name):
+        if self._released:
+            raise sqlite3.ProgrammingError('Cannot operate on a closed database.')
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            if self.outermost and not self._released:
+                if exc_type is None:
+                    self._conn.commit()
+                else:
+                    self._conn.rollback()
+        finally:
+            self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Thread-aware pool of SQLite connections for a single database file
+
+    Each thread checks out one connection at a time; nested get_connection()
+    calls from the same thread (e.g. send_message -> is_blocked) reuse it.
+    Idle connections are kept open and health-checked before reuse.
+    Checkouts that are never closed are reclaimed by release_thread() (the
+    app calls it when each request ends) or once their thread has exited.
+    """
+
+    def __init__(self, db_path, pool_size=5, timeout=30.0, health_check_interval=60, storage_profile=None):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            pool_size: Maximum number of open connections
+            timeout: Seconds to wait for a free connection before failing
+            health_check_interval: Seconds an idle connection may sit before it is re-validated
+            storage_profile: PRAGMA profile for new connections (defaults to get_storage_profile())
+        """
+        self.db_path = db_path
+        self.storage_profile = storage_profile if storage_profile is not None else get_storage_profile()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self.lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        # Store: deque of (connection, last_used_timestamp)
+        self._idle = deque()
+        # Store: {thread: [connection, depth]}
+        self._checked_out = {}
+
+        self.stats = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'wait_timeouts': 0,
+            'leaked': 0
+        }
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _connect(self):
+        """Open a new connection with row_factory configured once"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        apply_storage_profile(conn, self.storage_profile)
+        self._count('created')
+        return conn
+
+    def _is_healthy(self, conn):
+        """Check that an idle connection is still usable"""
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _take_idle(self):
+        """Pop a healthy idle connection, or None if there is none"""
+        while True:
+            with self.lock:
+                if not self._idle:
+                    return None
+                conn, last_used = self._idle.pop()
+
+            if time.time() - last_used < self.health_check_interval or self._is_healthy(conn):
+                self._count('reused')
+                return conn
+
+            self._count('discarded')
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def get_connection(self):
+        """
+        Check out a connection for the current thread
+
+        Returns:
+            PooledConnection: proxy whose close() releases it back to the pool
+        """
+        owner = threading.current_thread()
+
+        with self.lock:
+            entry = self._checked_out.get(owner)
+            if entry:
+                entry[1] += 1
+                return PooledConnection(self, entry, owner, outermost=False)
+            dead = [thread for thread in self._checked_out if not thread.is_alive()]
+
+        for thread in dead:
+            self._reclaim(thread)
+
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count('wait_timeouts')
+            raise sqlite3.OperationalError(
+                f'Connection pool exhausted ({self.pool_size} connections in use)'
+            )
+
+        try:
+            conn = self._take_idle() or self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self.lock:
+            entry = self._checked_out[owner] = [conn, 1]
+
+        return PooledConnection(self, entry, owner, outermost=True)
+
+    def release(self, entry, owner):
+        """
+        Release one checkout of a connection
+
+        Args:
+            entry: [connection, depth] checkout record
+            owner: Thread that checked the connection out
+        """
+        with self.lock:
+            if self._checked_out.get(owner) is not entry:
+                return  # already reclaimed
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self._checked_out[owner]
+
+        self._return(entry[0])
+
+    def _return(self, conn):
+        """Put a fully released connection back in the idle queue (or close it)"""
+        # Never hand out a connection with a half-finished transaction
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+
+        with self.lock:
+            if healthy and len(self._idle) < self.pool_size:
+                self._idle.append((conn, time.time()))
+                conn = None
+
+        if conn is not None:
+            self._count('discarded')
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+        self._slots.release()
+
+    def _reclaim(self, owner):
+        """Force-release a checkout its owner never closed"""
+        with self.lock:
+            entry = self._checked_out.pop(owner, None)
+            if entry is None:
+                return False
+            self.stats['leaked'] += 1
+
+        print(f"⚠️  Reclaimed a database connection leaked by thread {owner.name} "
+              f"({entry[1]} open checkout(s))")
+        self._return(entry[0])
+        return True
+
+    def release_thread(self):
+        """
+        Release whatever the current thread still has checked out
+
+        Called at the end of every request so a connection leaked by an
+        exception path never carries over to the next request on the thread.
+
+        Returns:
+            bool: True if a leaked checkout was reclaimed
+        """
+        return self._reclaim(threading.current_thread())
+
+    def close_all(self):
+        """Close all idle connections (checked-out ones are closed on release)"""
+        with self.lock:
+            idle = list(self._idle)
+            self._idle.clear()
+
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def get_stats(self):
+        """
+        Get pool usage statistics
+
+        Returns:
+            dict: Counters plus current idle/in-use sizes
+        """
+        with self.lock:
+            return {
+                **self.stats,
+                'pool_size': self.pool_size,
+                'idle': len(self._idle),
+                'in_use': len(self._checked_out)
+            }
+
+
+# Pools are shared per database file so every DatabaseManager instance
+# (app.py and each service module) draws from the same connections
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, pool_size=None, storage_profile=None):
+    """
+    Get (or create) the shared pool for a database file
+
+    Args:
+        db_path: Path to the SQLite database file
+        pool_size: Pool size; defaults to DB_POOL_SIZE (gunicorn.conf.py sets it to --threads)
+        storage_profile: PRAGMA profile; defaults to get_storage_profile()
+
+    Returns:
+        ConnectionPool: Shared pool instance
+    """
+    key = os.path.abspath(db_path)
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            if pool_size is None:
+                pool_size = int(os.getenv('DB_POOL_SIZE', 5))
+            pool = ConnectionPool(
+                db_path,
+                pool_size=pool_size,
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+                health_check_interval=int(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 60)),
+                storage_profile=storage_profile
+            )
+            _pools[key] = pool
+        return pool
+
+
+class DatabaseMaintenance:
+    """
+    Background task that keeps a WAL database healthy
+
+    Periodically runs a passive WAL checkpoint (so the -wal file does not grow
+    without bound) and PRAGMA optimize (so the query planner has fresh stats).
+    """
+
+    def __init__(self, db_path, interval=300):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            interval: Seconds between maintenance runs
+        """
+        self.db_path = db_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_result = None
+
+    def run_once(self):
+        """
+        Run one checkpoint + optimize pass
+
+        Returns:
+            dict: Checkpoint result (busy, wal_frames, checkpointed_frames)
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            busy, wal_frames, checkpointed = conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+            conn.execute('PRAGMA optimize')
+            self.last_result = {
+                'busy': busy,
+                'wal_frames': wal_frames,
+                'checkpointed_frames': checkpointed,
+                'ran_at': time.time()
+            }
+            return self.last_result
+        finally:
+            conn.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                print(f"⚠️  Database maintenance failed: {e}")
+
+    def start(self):
+        """Start the background thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='db-maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+_maintenance = {}
+
+
+def start_maintenance(db_path, interval=None):
+    """
+    Start the shared maintenance task for a database file
+
+    Args:
+        db_path: Path to the SQLite database file
+        interval: Seconds between runs; defaults to DB_MAINTENANCE_INTERVAL (0 disables)
+
+    Returns:
+        DatabaseMaintenance or None if disabled
+    """
+    if interval is None:
+        interval = int(os.getenv('DB_MAINTENANCE_INTERVAL', 300))
+    if interval <= 0:
+        return None
+
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        task = _maintenance.get(key)
+        if task is None:
+            task = DatabaseMaintenance(db_path, interval)
+            _maintenance[key] = task
+    task.start()
+    return task
@@ -0,0 +1,99 @@
+"""
+Database Test Helpers
+Throwaway databases for the test scripts. Every file lives in its own temp
+directory, and all of them are removed when the test process exits.
+"""
+
+import atexit
+import contextlib
+import importlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+import database
+import db_pool
+from database import DatabaseManager
+from migrate_database import migrate_database
+
+_temp_dirs = []
+
+
+def temp_db_path(filename='test.db'):
+    """
+    Path for a throwaway database file
+
+    Returns:
+        str: File path inside a new temp directory (removed at exit)
+    """
+    directory = tempfile.mkdtemp(prefix='raitha_mitra_test_')
+    _temp_dirs.append(directory)
+    return os.path.join(directory, filename)
+
+
+def make_db(filename='test.db', migrate=True, **kwargs):
+    """
+    Create a DatabaseManager on a throwaway database file
+
+    Args:
+        filename: Database file name (shows up in error messages)
+        migrate: Also run migrate_database() on the new file
+        **kwargs: Passed to DatabaseManager (use_pool, pool_size, ...)
+
+    Returns:
+        DatabaseManager: Manager for the new database (setup output silenced)
+    """
+    path = temp_db_path(filename)
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = DatabaseManager(path, **kwargs)
+        if migrate:
+            migrate_database(path)
+    return db
+
+
+@contextlib.contextmanager
+def service_module(name, db):
+    """
+    Import a service module with its module-level DatabaseManager() bound to db
+
+    Service modules open the default raitha_mitra.db at import time; importing
+    them here keeps the tracked database untouched. A module imported for the
+    first time is dropped from sys.modules again afterwards.
+
+    Args:
+        name: Module name (e.g. 'farm_service')
+        db: DatabaseManager the module should use
+
+    Yields:
+        module: The service module with module.db set to db
+    """
+    fresh = name not in sys.modules
+    if fresh:
+        original_class = database.DatabaseManager
+        database.DatabaseManager = lambda *args, **kwargs: db
+        try:
+            module = importlib.import_module(name)
+        finally:
+            database.DatabaseManager = original_class
+    else:
+        module = sys.modules[name]
+
+    original_db = module.db
+    module.db = db
+    try:
+        yield module
+    finally:
+        module.db = original_db
+        if fresh:
+            sys.modules.pop(name, None)
+
+
+@atexit.register
+def _remove_temp_dirs():
+    for directory in _temp_dirs:
+        for key, pool in list(db_pool._pools.items()):
+            if key.startswith(directory):
+                pool.close_all()
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,100 @@
+"""
+Enrichment Module
+Runs the Gemini calls behind a prediction (treatment details, market
+prices, translations) concurrently on one shared, bounded thread pool,
+with a timeout per call and one overall deadline. A call that fails or
+runs out of time is replaced by its fallback, so a prediction takes as
+long as its slowest call instead of the sum of all of them.
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+# One enrichment call: fn(*args), allowed timeout seconds, fallback() if it fails
+EnrichmentCall = namedtuple('EnrichmentCall', 'fn args timeout fallback')
+
+
+class EnrichmentExecutor:
+    """
+    Shared bounded pool that runs enrichment calls side by side
+
+    The Gemini requests themselves go through llm_client, which enforces
+    their timeouts; this pool only waits on them together.
+    """
+
+    def __init__(self, max_workers=16, deadline=20.0):
+        """
+        Args:
+            max_workers: Calls in flight at once across all requests
+            deadline: Default overall seconds for fan_out()
+        """
+        self.deadline = deadline
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enrichment')
+        self.lock = threading.Lock()
+        self.stats = {'fan_outs': 0, 'timeouts': 0, 'errors': 0}
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def fan_out(self, calls, deadline=None):
+        """
+        Run several calls concurrently and collect what finishes in time
+
+        Args:
+            calls: dict of name -> EnrichmentCall
+            deadline: Overall seconds for all calls (default self.deadline)
+
+        Returns:
+            tuple: (dict of name -> result or fallback value,
+                    list of names that used their fallback)
+        """
+        self._count('fan_outs')
+        deadline = self.deadline if deadline is None else deadline
+        start = time.monotonic()
+        futures = {name: self.executor.submit(call.fn, *call.args) for name, call in calls.items()}
+
+        results, fallbacks = {}, []
+        for name, future in futures.items():
+            call = calls[name]
+            remaining = start + min(call.timeout, deadline) - time.monotonic()
+            try:
+                results[name] = future.result(timeout=max(remaining, 0))
+                continue
+            except FutureTimeout:
+                future.cancel()
+                self._count('timeouts')
+                print(f"⏱️ Enrichment '{name}' timed out after {time.monotonic() - start:.1f}s - using fallback")
+            except Exception as e:
+                self._count('errors')
+                print(f"❌ Enrichment '{name}' failed: {e}")
+
+            fallbacks.append(name)
+            try:
+                results[name] = call.fallback()
+            except Exception as e:
+                print(f"⚠️ Enrichment fallback '{name}' failed: {e}")
+                results[name] = None
+
+        print(f"⚡ Enrichment finished in {time.monotonic() - start:.2f}s ({len(calls)} calls, {len(fallbacks)} fallbacks)")
+        return results, fallbacks
+
+    def get_stats(self):
+        """Fan-out, timeout and error counts"""
+        with self.lock:
+            return dict(self.stats)
+
+
+# Global enrichment executor instance
+enrichment_executor = EnrichmentExecutor(
+    max_workers=int(os.getenv('ENRICHMENT_WORKERS', 16)),
+    deadline=float(os.getenv('ENRICHMENT_DEADLINE', 20))
+)
+
+
+def fan_out(calls, deadline=None):
+    """Run enrichment calls concurrently on the shared pool"""
+    return enrichment_executor.fan_out(calls, deadline)
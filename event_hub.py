@@ -0,0 +1,271 @@
+"""
+Event Hub Module
+In-process pub/sub for pushing message and friend-request events to
+connected clients (Server-Sent Events), with an optional SQLite broker
+so events published in one gunicorn worker reach clients on the others
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+class Subscription:
+    """A single client's event queue"""
+
+    def __init__(self, user_id, max_events=100):
+        self.user_id = user_id
+        self.events = queue.Queue(maxsize=max_events)
+
+    def get(self, timeout=None):
+        """
+        Wait for the next event
+
+        Returns:
+            dict or None if the timeout expired
+        """
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # Slow client: drop the oldest event rather than block publishers
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                pass
+            self.events.put_nowait(event)
+
+
+class EventHub:
+    """
+    Pub/sub hub keyed by user id
+
+    With broker='memory' events are delivered straight to subscribers in this
+    process. With broker='sqlite' events are appended to an event_log table
+    and every worker polls it, so all workers see every event.
+
+    Every open SSE stream holds a request thread, so subscriptions per
+    process are capped (max_subscriptions); clients that are turned away
+    poll instead.
+    """
+
+    def __init__(self, broker='memory', broker_path='raitha_mitra_events.db',
+                 poll_interval=0.25, retention_seconds=300, max_subscriptions=None):
+        """
+        Args:
+            broker: 'memory' (single process) or 'sqlite' (shared across workers)
+            broker_path: SQLite file used as the shared event log
+            poll_interval: Seconds between event_log polls
+            retention_seconds: How long events are kept in the event_log
+            max_subscriptions: Open subscriptions allowed in this process (None = unlimited)
+        """
+        self.broker = broker
+        self.broker_path = broker_path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self.max_subscriptions = max_subscriptions
+
+        self.lock = threading.Lock()
+        # Store: {user_id: set(Subscription)}
+        self.subscribers = {}
+        self.rejected = 0
+
+        self._poller = None
+        self._last_event_id = None
+        self._last_prune = 0
+        # Long-lived connection for publish(), created on first use
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+
+        if self.broker == 'sqlite':
+            self._init_broker()
+
+    def _broker_connection(self, check_same_thread=True):
+        conn = sqlite3.connect(self.broker_path, timeout=10, check_same_thread=check_same_thread)
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    def _init_broker(self):
+        conn = self._broker_connection()
+        try:
+            # journal_mode is stored in the file, so it only needs setting once
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS event_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    event_type TEXT NOT NULL,
+                    payload TEXT,
+                    created_at REAL NOT NULL
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def subscribe(self, user_id):
+        """
+        Register a client for a user's events
+
+        Args:
+            user_id: User whose events the client wants
+
+        Returns:
+            Subscription: call unsubscribe() with it when the client goes away,
+            or None if max_subscriptions are already open
+        """
+        subscription = Subscription(int(user_id))
+        with self.lock:
+            open_count = sum(len(subs) for subs in self.subscribers.values())
+            if self.max_subscriptions is not None and open_count >= self.max_subscriptions:
+                self.rejected += 1
+                return None
+            self.subscribers.setdefault(subscription.user_id, set()).add(subscription)
+
+        if self.broker == 'sqlite':
+            self._ensure_poller()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a client's subscription"""
+        with self.lock:
+            subs = self.subscribers.get(subscription.user_id)
+            if subs:
+                subs.discard(subscription)
+                if not subs:
+                    del self.subscribers[subscription.user_id]
+
+    def publish(self, user_id, event_type, data=None):
+        """
+        Publish an event to a user
+
+        Args:
+            user_id: Recipient user id
+            event_type: Event name (e.g. 'message', 'friend_request')
+            data: JSON-serializable payload
+        """
+        if self.broker == 'sqlite':
+            with self._publish_lock:
+                if self._publish_conn is None:
+                    self._publish_conn = self._broker_connection(check_same_thread=False)
+                try:
+                    self._publish_conn.execute(
+                        'INSERT INTO event_log (user_id, event_type, payload, created_at) VALUES (?, ?, ?, ?)',
+                        (int(user_id), event_type, json.dumps(data or {}), time.time())
+                    )
+                    self._publish_conn.commit()
+                except sqlite3.Error:
+                    # Reconnect on the next publish
+                    self._publish_conn.close()
+                    self._publish_conn = None
+                    raise
+        else:
+            self._dispatch(int(user_id), {'type': event_type, 'data': data or {}})
+
+    def _dispatch(self, user_id, event):
+        with self.lock:
+            subs = list(self.subscribers.get(user_id, ()))
+        for subscription in subs:
+            subscription.put(event)
+
+    def _ensure_poller(self):
+        with self.lock:
+            if self._poller and self._poller.is_alive():
+                return
+            self._poller = threading.Thread(target=self._poll_loop, name='event-hub-poller', daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self):
+        conn = self._broker_connection()
+        try:
+            # Only deliver events published after this poller started; a
+            # restarted poller must not replay what came in while it was stopped
+            self._last_event_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM event_log').fetchone()[0]
+
+            while True:
+                with self.lock:
+                    if not self.subscribers:
+                        self._poller = None
+                        return
+
+                self.poll_once(conn)
+                time.sleep(self.poll_interval)
+        except sqlite3.Error as e:
+            print(f"⚠️  Event hub poller stopped: {e}")
+            with self.lock:
+                self._poller = None
+        finally:
+            conn.close()
+
+    def poll_once(self, conn):
+        """Deliver new event_log rows to local subscribers"""
+        rows = conn.execute(
+            'SELECT id, user_id, event_type, payload FROM event_log WHERE id > ? ORDER BY id',
+            (self._last_event_id or 0,)
+        ).fetchall()
+
+        for event_id, user_id, event_type, payload in rows:
+            self._last_event_id = event_id
+            self._dispatch(user_id, {'type': event_type, 'data': json.loads(payload or '{}')})
+
+        now = time.time()
+        if now - self._last_prune > self.retention_seconds:
+            conn.execute('DELETE FROM event_log WHERE created_at < ?', (now - self.retention_seconds,))
+            conn.commit()
+            self._last_prune = now
+
+        return len(rows)
+
+    def get_stats(self):
+        """
+        Get hub statistics
+
+        Returns:
+            dict: Broker type and subscriber counts
+        """
+        with self.lock:
+            return {
+                'broker': self.broker,
+                'users': len(self.subscribers),
+                'subscriptions': sum(len(subs) for subs in self.subscribers.values()),
+                'max_subscriptions': self.max_subscriptions,
+                'rejected': self.rejected
+            }
+
+
+# Global event hub instance
+event_hub = EventHub(
+    broker=os.getenv('EVENT_BROKER', 'memory'),
+    broker_path=os.getenv('EVENT_BROKER_PATH', 'raitha_mitra_events.db'),
+    poll_interval=float(os.getenv('EVENT_POLL_INTERVAL', 0.25)),
+    # Keep this well below the gunicorn --threads count so streams cannot take every request thread
+    max_subscriptions=int(os.getenv('SSE_MAX_STREAMS', 4)) or None
+)
+
+
+def publish_event(user_id, event_type, data=None):
+    """
+    Publish an event without letting delivery problems affect the caller
+
+    Returns:
+        bool: True if the event was published
+    """
+    try:
+        event_hub.publish(user_id, event_type, data)
+        return True
+    except Exception as e:
+        print(f"⚠️  Failed to publish {event_type} event: {e}")
+        return False
+
+
+def format_sse(event):
+    """Format an event dict as a Server-Sent Events message"""
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
@@ -6,16 +6,9 @@ Handles autonomous farm planning, task recommendations, and schedule generation
 import os
 import json
 from datetime import datetime, timedelta
-import google.generativeai as genai
+from llm_client import generate_text, llm_available
 from database import DatabaseManager
 
-# Initialize Gemini AI
-api_key = os.getenv('GEMINI_API_KEY')
-if api_key:
-    genai.configure(api_key=api_key)
-    gemini_model = genai.GenerativeModel('gemini-2.5-flash')
-else:
-    gemini_model = None
 
 db = DatabaseManager()
 
@@ -161,7 +154,7 @@ def get_task_recommendations(crop, season, weather=None):
     Get AI-powered task recommendations based on crop, season, and weather
     Returns list of recommended tasks
     """
-    if not gemini_model:
+    if not llm_available():
         return get_default_task_recommendations(crop, season)
     
     try:
@@ -192,11 +185,11 @@ Format your response as a JSON array with this structure:
 
 Focus on practical, season-appropriate tasks."""
         
-        response = gemini_model.generate_content(prompt)
+        response_text = generate_text(prompt, caller='farm')
         
-        if response and response.text:
+        if response_text:
             # Try to extract JSON from response
-            text = response.text.strip()
+            text = response_text.strip()
             # Remove markdown code blocks if present
             text = text.replace('```json', '').replace('```', '').strip()
             
@@ -257,7 +250,7 @@ def generate_weekly_schedule(user_id, crop_type, growth_stage=None):
     Generate AI-powered weekly schedule for farm activities
     Returns a list of scheduled tasks for the week
     """
-    if not gemini_model:
+    if not llm_available():
         return generate_default_schedule(user_id, crop_type, growth_stage)
     
     try:
@@ -302,10 +295,10 @@ Format as JSON:
 
 Include only 1-2 ESSENTIAL tasks per day. Keep it simple and manageable."""
         
-        response = gemini_model.generate_content(prompt)
+        response_text = generate_text(prompt, caller='farm')
         
-        if response and response.text:
-            text = response.text.strip()
+        if response_text:
+            text = response_text.strip()
             text = text.replace('```json', '').replace('```', '').strip()
             
             try:
@@ -317,6 +310,7 @@ Include only 1-2 ESSENTIAL tasks per day. Keep it simple and manageable."""
                 # Save tasks to database with correct dates
                 today = datetime.now().date()
                 current_day = today.weekday()  # 0=Monday, 6=Sunday
+                activities = []
                 
                 for day_schedule in schedule:
                     day_name = day_schedule.get('day', 'Monday')
@@ -330,14 +324,16 @@ Include only 1-2 ESSENTIAL tasks per day. Keep it simple and manageable."""
                     task_date = today + timedelta(days=days_ahead)
                     
                     for task in day_schedule.get('tasks', []):
-                        db.save_farm_activity(
-                            user_id=user_id,
-                            activity_type=task.get('activity_type', 'monitoring'),
-                            crop_type=crop_type,
-                            scheduled_date=task_date.strftime('%Y-%m-%d'),
-                            description=task.get('description', ''),
-                            ai_generated=True
-                        )
+                        activities.append({
+                            'user_id': user_id,
+                            'activity_type': task.get('activity_type', 'monitoring'),
+                            'crop_type': crop_type,
+                            'scheduled_date': task_date.strftime('%Y-%m-%d'),
+                            'description': task.get('description', ''),
+                            'ai_generated': True
+                        })
+                
+                db.save_farm_activities_bulk(activities)
                 
                 return schedule
             
@@ -355,6 +351,7 @@ def _apply_cached_schedule(user_id, crop_type, cached_schedule):
     """
     today = datetime.now().date()
     current_day = today.weekday()  # 0=Monday, 6=Sunday
+    activities = []
     
     for day_schedule in cached_schedule:
         day_name = day_schedule.get('day', 'Monday')
@@ -368,14 +365,16 @@ def _apply_cached_schedule(user_id, crop_type, cached_schedule):
         task_date = today + timedelta(days=days_ahead)
         
         for task in day_schedule.get('tasks', []):
-            db.save_farm_activity(
-                user_id=user_id,
-                activity_type=task.get('activity_type', 'monitoring'),
-                crop_type=crop_type,
-                scheduled_date=task_date.strftime('%Y-%m-%d'),
-                description=task.get('description', ''),
-                ai_generated=True
-            )
+            activities.append({
+                'user_id': user_id,
+                'activity_type': task.get('activity_type', 'monitoring'),
+                'crop_type': crop_type,
+                'scheduled_date': task_date.strftime('%Y-%m-%d'),
+                'description': task.get('description', ''),
+                'ai_generated': True
+            })
+    
+    db.save_farm_activities_bulk(activities)
     
     return cached_schedule
 
@@ -390,6 +389,7 @@ def generate_default_schedule(user_id, crop_type, growth_stage):
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     
     schedule = []
+    activities = []
     
     # Simple weekly pattern - only 1 task per day
     weekly_pattern = [
@@ -417,14 +417,16 @@ def generate_default_schedule(user_id, crop_type, growth_stage):
             "tasks": [task]  # Only 1 task per day
         })
         
-        # Save to database
-        db.save_farm_activity(
-            user_id=user_id,
-            activity_type=task['activity_type'],
-            crop_type=crop_type,
-            scheduled_date=task_date.strftime('%Y-%m-%d'),
-            description=task['description'],
-            ai_generated=True
-        )
+        activities.append({
+            'user_id': user_id,
+            'activity_type': task['activity_type'],
+            'crop_type': crop_type,
+            'scheduled_date': task_date.strftime('%Y-%m-%d'),
+            'description': task['description'],
+            'ai_generated': True
+        })
+    
+    # Save to database in one transaction
+    db.save_farm_activities_bulk(activities)
     
     return schedule
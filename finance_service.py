@@ -6,16 +6,10 @@ Handles financial health scoring, cost analysis, and profit projections
 import os
 import json
 from datetime import datetime, timedelta
-import google.generativeai as genai
+from llm_client import generate_text, llm_available
 from database import DatabaseManager
+from write_behind import queue_financial_score
 
-# Initialize Gemini AI
-api_key = os.getenv('GEMINI_API_KEY')
-if api_key:
-    genai.configure(api_key=api_key)
-    gemini_model = genai.GenerativeModel('gemini-2.5-flash')
-else:
-    gemini_model = None
 
 db = DatabaseManager()
 
@@ -168,7 +162,7 @@ def generate_recommendations(score_breakdown):
     Generate AI-powered recommendations based on financial score breakdown
     Returns list of actionable recommendations
     """
-    if not gemini_model:
+    if not llm_available():
         return generate_default_recommendations(score_breakdown)
     
     try:
@@ -203,10 +197,10 @@ Format as JSON array:
 
 Keep it concise and practical for Indian farmers."""
         
-        response = gemini_model.generate_content(prompt)
+        response_text = generate_text(prompt, caller='finance')
         
-        if response and response.text:
-            text = response.text.strip()
+        if response_text:
+            text = response_text.strip()
             text = text.replace('```json', '').replace('```', '').strip()
             
             try:
@@ -432,8 +426,9 @@ def calculate_health_score(user_id):
     recommendations = generate_recommendations(score_breakdown)
     score_breakdown['recommendations'] = recommendations
     
-    # Save score to database
-    db.save_financial_score(
+    # Save score to database (write-behind)
+    queue_financial_score(
+        db,
         user_id=user_id,
         overall_score=overall_score,
         score_breakdown=score_breakdown
@@ -0,0 +1,68 @@
+"""
+Gunicorn configuration
+When INFERENCE_SERVER is set, the master starts inference_server.py once
+at boot, so the model stays loaded while web workers are recycled by
+--max-requests (workers then never import TensorFlow themselves). The
+master generates a per-boot INFERENCE_SERVER_AUTHKEY shared by the server
+and the workers, and restarts the server if it exits.
+The master also runs the SQLite checkpoint/optimize task, so it runs once
+per deployment instead of once per worker, and sizes the SQLite connection
+pool to --threads (DB_POOL_SIZE overrides)
+"""
+
+import os
+import secrets
+import subprocess
+import sys
+import threading
+
+from db_pool import start_maintenance
+
+DB_PATH = 'raitha_mitra.db'
+INFERENCE_CHECK_INTERVAL = int(os.getenv('INFERENCE_SERVER_CHECK_INTERVAL', 5))
+
+inference_process = None
+stopping = threading.Event()
+
+
+def start_inference_server(server, address):
+    global inference_process
+    inference_process = subprocess.Popen([sys.executable, 'inference_server.py', '--socket', address])
+    server.log.info(f"Started inference server (pid {inference_process.pid}) on {address}")
+
+
+def watch_inference_server(server, address):
+    """Restart the inference server whenever it exits (until gunicorn stops)"""
+    while not stopping.wait(INFERENCE_CHECK_INTERVAL):
+        if inference_process.poll() is not None:
+            server.log.warning(f"Inference server exited ({inference_process.returncode}), restarting")
+            start_inference_server(server, address)
+
+
+def on_starting(server):
+    # Inherited by the workers, which then skip db.start_maintenance()
+    os.environ['DB_MAINTENANCE_OWNER'] = 'gunicorn'
+    # One pooled SQLite connection per request thread unless set explicitly
+    os.environ.setdefault('DB_POOL_SIZE', str(server.cfg.threads))
+    address = os.getenv('INFERENCE_SERVER')
+    if address:
+        # Inherited by the server process and the workers; new for every boot
+        os.environ.setdefault('INFERENCE_SERVER_AUTHKEY', secrets.token_hex(32))
+        start_inference_server(server, address)
+        threading.Thread(target=watch_inference_server, args=(server, address),
+                         name='inference-watchdog', daemon=True).start()
+
+
+def when_ready(server):
+    if start_maintenance(DB_PATH):
+        server.log.info(f"Started database maintenance for {DB_PATH}")
+
+
+def on_exit(server):
+    stopping.set()
+    if inference_process and inference_process.poll() is None:
+        inference_process.terminate()
+        try:
+            inference_process.wait(10)
+        except subprocess.TimeoutExpired:
+            inference_process.kill()
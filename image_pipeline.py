@@ -0,0 +1,113 @@
+"""
+Image Pipeline Module
+Decodes an uploaded photo once and derives both the model input tensor
+and the stored JPEG from that single decoded image. JPEGs are decoded
+straight to a reduced size with draft() (libjpeg DCT scaling), so a
+12MP phone photo is never expanded to full resolution.
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+MODEL_INPUT_SIZE = (128, 128)
+
+# Uploads with more pixels than this are rejected before decoding
+MAX_INPUT_PIXELS = int(os.getenv('IMAGE_MAX_INPUT_PIXELS', 50_000_000))
+
+# Longest side of the copy kept in static/uploads (0 keeps full resolution)
+STORED_MAX_SIDE = int(os.getenv('IMAGE_STORED_MAX_SIDE', 1280))
+STORED_QUALITY = 85
+
+
+class DecodedImage:
+    """An upload decoded once: the model tensor plus the image to store"""
+
+    __slots__ = ('tensor', 'image', 'source_size', 'source_format', 'digest')
+
+    def __init__(self, tensor, image, source_size, source_format, digest=None):
+        self.tensor = tensor
+        self.image = image
+        self.source_size = source_size
+        self.source_format = source_format
+        self.digest = digest  # sha256 of the uploaded bytes
+
+    def save(self, path, quality=STORED_QUALITY):
+        """Write the stored copy as JPEG"""
+        self.image.save(path, 'JPEG', quality=quality)
+        return path
+
+
+def decode_base64_image(image_data):
+    """
+    Turn a base64 string (optionally a data: URL) into bytes
+
+    Raises:
+        ValueError: If the payload is not valid base64
+    """
+    if ',' in image_data:
+        image_data = image_data.split(',', 1)[1]
+    try:
+        return base64.b64decode(image_data)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid base64 image data: {e}")
+
+
+def process_image(image_bytes, target_size=MODEL_INPUT_SIZE, stored_max_side=STORED_MAX_SIDE):
+    """
+    Decode an upload once into a model tensor and a storable image
+
+    Args:
+        image_bytes: Raw image file bytes, or a binary file object (e.g. a spooled upload)
+        target_size: Model input (width, height)
+        stored_max_side: Longest side of the stored copy (0 = full resolution)
+
+    Returns:
+        DecodedImage: tensor is (1, H, W, 3) float32 in [0, 1]
+
+    Raises:
+        ValueError: If the image cannot be decoded or is too large
+    """
+    try:
+        if hasattr(image_bytes, 'read'):
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: image_bytes.read(1024 * 1024), b''):
+                digest.update(chunk)
+            image_bytes.seek(0)
+            digest = digest.hexdigest()
+            img = Image.open(image_bytes)
+        else:
+            digest = hashlib.sha256(image_bytes).hexdigest()
+            img = Image.open(io.BytesIO(image_bytes))
+        source_size, source_format = img.size, img.format
+
+        # The header gives the size without decoding any pixels
+        if source_size[0] * source_size[1] > MAX_INPUT_PIXELS:
+            raise ValueError(f"Image too large ({source_size[0]}x{source_size[1]})")
+
+        if stored_max_side and img.format == 'JPEG':
+            # Decode at the smallest 1/2, 1/4 or 1/8 scale still >= the stored size
+            img.draft('RGB', (stored_max_side, stored_max_side))
+
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.load()
+
+        if stored_max_side and max(img.size) > stored_max_side:
+            img.thumbnail((stored_max_side, stored_max_side), Image.LANCZOS)
+
+        # reducing_gap does a fast box reduction first, then LANCZOS for the last step
+        model_input = img.resize(target_size, Image.LANCZOS, reducing_gap=3.0)
+        tensor = np.asarray(model_input, dtype=np.float32)[np.newaxis] / 255.0
+        model_input.close()
+
+        return DecodedImage(tensor, img, source_size, source_format, digest)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Failed to decode image: {e}")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Index Advisor
+Runs EXPLAIN QUERY PLAN over every SQL statement in database.py, app.py and
+the service modules, against a scratch database built from the real schema,
+and reports full-table scans and temp-table sorts.
+
+Usage:
+    python index_advisor.py            # report
+    python index_advisor.py --strict   # exit 1 on any scan not in ALLOWED_SCANS
+"""
+
+import argparse
+import ast
+import contextlib
+import io
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+MODULES = [
+    'database.py',
+    'app.py',
+    'chat_service.py',
+    'farm_service.py',
+    'yield_service.py',
+    'finance_service.py',
+    'map_service.py'
+]
+
+# Scans that are intentional: (module, function) -> reason
+ALLOWED_SCANS = {
+    ('database.py', 'get_all_predictions'): 'analytics over every prediction',
+    ('database.py', 'rebuild_notification_counters'): 'one-off backfill over all users',
+    ('database.py', 'get_regional_farmers'): 'location LIKE match over users',
+    ('database.py', 'get_nearby_farmers'): 'bounding-box filter over users',
+    ('database.py', 'update_regional_stats'): 'periodic aggregate over users',
+    ('database.py', 'get_prediction_image_paths'): 'blob store gc reads every referenced image',
+    ('database.py', 'update_prediction_image_path'): 'one-off legacy upload import',
+    ('app.py', 'search_users'): 'name/location LIKE search over users',
+    ('app.py', 'get_friend_suggestions'): 'suggestions rank all farmers',
+    ('app.py', 'get_map_stats'): 'global map statistics',
+    ('app.py', 'get_farmers_map_data'): 'map markers for all located farmers',
+    ('map_service.py', 'aggregate_farmer_locations'): 'map aggregate over all users',
+    ('map_service.py', 'get_regional_stats'): 'regional aggregate over users',
+    ('map_service.py', 'find_nearby_farmers'): 'distance filter over located users',
+    ('map_service.py', 'get_trending_topics'): 'regional aggregate over users',
+    ('map_service.py', 'get_all_regions_summary'): 'GROUP BY location over all users',
+}
+
+SCAN_PATTERN = re.compile(r'^SCAN (\w+)')
+ALIAS_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+
+
+def build_scratch_database():
+    """Create an empty database with the full application schema"""
+    from database import DatabaseManager
+    from migrate_database import migrate_database
+
+    path = os.path.join(tempfile.mkdtemp(), 'index_advisor.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        DatabaseManager(path, use_pool=False)
+        migrate_database(path)
+    return path
+
+
+def _sql_text(node):
+    """Return SQL text for a string or f-string node (placeholders blanked)"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        return ''.join(
+            part.value if isinstance(part, ast.Constant) else ''
+            for part in node.values
+        )
+    return None
+
+
+def extract_statements(module_path):
+    """
+    Find every literal SQL statement passed to execute()/executemany()
+
+    Returns:
+        list: (module, function, line, sql) tuples
+    """
+    with open(module_path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=module_path)
+
+    statements = []
+    module = os.path.basename(module_path)
+
+    def visit(node, function):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                visit(child, child.name)
+                continue
+            if (isinstance(child, ast.Call) and isinstance(child.func, ast.Attribute)
+                    and child.func.attr in ('execute', 'executemany') and child.args):
+                sql = _sql_text(child.args[0])
+                if sql and sql.strip():
+                    statements.append((module, function, child.lineno, ' '.join(sql.split())))
+            visit(child, function)
+
+    visit(tree, '<module>')
+    return statements
+
+
+def _dummy_params(sql):
+    """None for every bind parameter so the statement can be planned"""
+    named = re.findall(r':(\w+)', sql)
+    if named:
+        return {name: None for name in named}
+    return [None] * sql.count('?')
+
+
+def _table_aliases(sql):
+    """Map aliases (and bare table names) used in FROM/JOIN clauses to tables"""
+    aliases = {}
+    for table, alias in ALIAS_PATTERN.findall(sql):
+        aliases[table] = table
+        if alias and alias.upper() not in ('WHERE', 'JOIN', 'LEFT', 'INNER', 'ON', 'GROUP', 'ORDER', 'LIMIT', 'UNION'):
+            aliases[alias] = table
+    return aliases
+
+
+def explain(conn, sql):
+    """
+    Get the query plan for a statement
+
+    Returns:
+        list of plan detail strings, or None if the statement cannot be planned
+    """
+    try:
+        rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', _dummy_params(sql)).fetchall()
+    except sqlite3.Error:
+        return None
+    return [row[3] for row in rows]
+
+
+def analyze(db_path=None, modules=None):
+    """
+    Plan every statement and collect scans
+
+    Args:
+        db_path: Database to plan against (defaults to a fresh scratch schema)
+        modules: Module files to scan (defaults to MODULES)
+
+    Returns:
+        dict: 'scans' (disallowed), 'allowed', 'sorts', 'skipped' lists and 'planned' count
+    """
+    db_path = db_path or build_scratch_database()
+    conn = sqlite3.connect(db_path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    report = {'scans': [], 'allowed': [], 'sorts': [], 'skipped': [], 'planned': 0}
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    for module in modules or MODULES:
+        for module_name, function, line, sql in extract_statements(os.path.join(base_dir, module)):
+            if sql.upper().startswith(('CREATE', 'DROP', 'PRAGMA', 'ALTER', 'INSERT')):
+                continue
+
+            plan = explain(conn, sql)
+            if plan is None:
+                report['skipped'].append((module_name, function, line, sql))
+                continue
+            report['planned'] += 1
+
+            aliases = _table_aliases(sql)
+            for detail in plan:
+                match = SCAN_PATTERN.match(detail)
+                finding = (module_name, function, line, detail, sql)
+                if match and aliases.get(match.group(1), match.group(1)) in tables:
+                    if (module_name, function) in ALLOWED_SCANS:
+                        report['allowed'].append(finding)
+                    else:
+                        report['scans'].append(finding)
+                elif detail.startswith('USE TEMP B-TREE'):
+                    report['sorts'].append(finding)
+
+    conn.close()
+    return report
+
+
+def print_report(report, verbose=False):
+    print("=" * 70)
+    print("🔎 INDEX ADVISOR")
+    print("=" * 70)
+    print(f"Planned {report['planned']} statements "
+          f"({len(report['skipped'])} skipped: dynamic SQL or references to missing tables)")
+
+    if report['scans']:
+        print(f"\n❌ Full-table scans ({len(report['scans'])}):")
+        for module, function, line, detail, sql in report['scans']:
+            print(f"  {module}:{line} {function}() -> {detail}")
+            print(f"      {sql[:140]}")
+    else:
+        print("\n✅ No unexpected full-table scans")
+
+    if report['sorts']:
+        print(f"\n⚠️  Temp B-tree sorts ({len(report['sorts'])}):")
+        for module, function, line, detail, _ in report['sorts']:
+            print(f"  {module}:{line} {function}() -> {detail}")
+
+    if verbose and report['allowed']:
+        print(f"\nℹ️  Allowed scans ({len(report['allowed'])}):")
+        for module, function, line, detail, _ in report['allowed']:
+            print(f"  {module}:{line} {function}() -> {detail} ({ALLOWED_SCANS[(module, function)]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report full-table scans in application SQL')
+    parser.add_argument('--db', help='Plan against this database instead of a fresh schema')
+    parser.add_argument('--strict', action='store_true', help='Exit 1 on any disallowed scan')
+    parser.add_argument('--verbose', action='store_true', help='Also list allowed scans')
+    args = parser.parse_args()
+
+    report = analyze(args.db)
+    print_report(report, args.verbose)
+    return 1 if args.strict and report['scans'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,399 @@
+"""
+Inference Engine Module
+Micro-batching front end for the disease classifier: concurrent predict()
+calls are collected into dynamic batches, run as one (N, 128, 128, 3)
+tensor by worker threads that each own an interpreter from a pool, and
+the results are scattered back to the waiting callers
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+class TFLiteRunner:
+    """
+    Runs batches on a TFLite interpreter
+
+    The input tensor is resized to the batch size when it changes. Models
+    whose batch dimension cannot be resized fall back to one invoke() per
+    image (still on the thread that holds this interpreter).
+    """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        input_details = interpreter.get_input_details()[0]
+        self.input_index = input_details['index']
+        self.output_index = interpreter.get_output_details()[0]['index']
+        self.input_shape = [int(dim) for dim in input_details['shape']]
+        self.resizable = True
+
+    def _resize(self, batch_size):
+        self.interpreter.resize_tensor_input(self.input_index, [batch_size] + self.input_shape[1:])
+        self.interpreter.allocate_tensors()
+        self.input_shape[0] = batch_size
+
+    def _invoke(self, batch):
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).copy()
+
+    def __call__(self, batch):
+        if self.resizable and len(batch) != self.input_shape[0]:
+            try:
+                self._resize(len(batch))
+            except (RuntimeError, ValueError) as e:
+                print(f"⚠️  TFLite model does not support batching ({e}); invoking per image")
+                self.resizable = False
+                self._resize(1)
+
+        if len(batch) == self.input_shape[0]:
+            return self._invoke(batch)
+        return np.concatenate([self._invoke(batch[i:i + 1]) for i in range(len(batch))])
+
+
+class InterpreterPool:
+    """
+    Pool of pre-allocated TFLite interpreters
+
+    TFLite interpreters are not thread-safe, so each batch checks one out
+    for its exclusive use. Calling the pool runs a batch on whichever
+    interpreter is free, making it usable as an engine runner.
+    """
+
+    def __init__(self, factory, size=2, interpreters=None, timeout=30.0):
+        """
+        Args:
+            factory: Creates a new tf.lite.Interpreter with tensors allocated
+            size: Number of interpreters
+            interpreters: Already-loaded interpreters to include in the pool
+            timeout: Seconds to wait for a free interpreter
+        """
+        self.timeout = timeout
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+
+        interpreters = list(interpreters or [])
+        while len(interpreters) < size:
+            interpreters.append(factory())
+
+        self.size = len(interpreters)
+        for interpreter in interpreters:
+            self.idle.put(TFLiteRunner(interpreter))
+
+        self.stats = {'acquisitions': 0, 'timeouts': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+        self.wait_samples = deque(maxlen=1000)
+
+    @contextmanager
+    def acquire(self):
+        """Check out an interpreter's runner for exclusive use"""
+        start = time.perf_counter()
+        try:
+            runner = self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self.lock:
+                self.stats['timeouts'] += 1
+            raise TimeoutError(f"No interpreter free within {self.timeout}s")
+
+        waited = time.perf_counter() - start
+        with self.lock:
+            self.stats['acquisitions'] += 1
+            self.stats['total_wait'] += waited
+            self.stats['max_wait'] = max(self.stats['max_wait'], waited)
+            self.wait_samples.append(waited)
+
+        try:
+            yield runner
+        finally:
+            self.idle.put(runner)
+
+    def __call__(self, batch):
+        with self.acquire() as runner:
+            return runner(batch)
+
+    def get_stats(self):
+        """
+        Get pool statistics
+
+        Returns:
+            dict: Size, idle count and wait-time metrics (ms)
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            samples = sorted(self.wait_samples)
+        acquisitions = stats['acquisitions']
+        return {
+            'size': self.size,
+            'idle': self.idle.qsize(),
+            'acquisitions': acquisitions,
+            'timeouts': stats['timeouts'],
+            'avg_wait_ms': round(stats['total_wait'] / acquisitions * 1000, 3) if acquisitions else 0,
+            'p95_wait_ms': round(samples[int(0.95 * (len(samples) - 1))] * 1000, 3) if samples else 0,
+            'max_wait_ms': round(stats['max_wait'] * 1000, 3)
+        }
+
+
+class KerasRunner:
+    """Runs batches on a Keras model"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, batch):
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class InferenceRequest:
+    """One caller's image and, once the batch has run, its result"""
+
+    __slots__ = ('image', 'result', 'error', 'done')
+
+    def __init__(self, image):
+        self.image = image
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceEngine:
+    """
+    Dynamic micro-batcher in front of a model runner
+
+    A batch is dispatched when it reaches max_batch_size or when max_wait_ms
+    has passed since its first request arrived, whichever comes first. Up to
+    `workers` batches run at once; the runner must be safe for that many
+    concurrent calls (an InterpreterPool of the same size is).
+    """
+
+    def __init__(self, runner, max_batch_size=8, max_wait_ms=5, timeout=30.0, batching=True, workers=1):
+        """
+        Args:
+            runner: Callable mapping an (N, H, W, C) float32 array to (N, classes)
+            max_batch_size: Largest batch handed to the runner
+            max_wait_ms: How long the first request in a batch waits for company
+            timeout: Seconds a caller waits for its result
+            batching: False runs each request directly (at most `workers` at a time)
+            workers: Batches run concurrently
+        """
+        self.runner = runner
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+        self.batching = batching
+        self.workers = max(1, workers)
+
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        # An InterpreterPool limits (and measures) concurrency itself
+        self.slots = nullcontext() if isinstance(runner, InterpreterPool) else threading.BoundedSemaphore(self.workers)
+        self._workers = []
+
+        self.stats = {'requests': 0, 'batches': 0, 'errors': 0}
+        self.batch_sizes = defaultdict(int)
+
+    def predict(self, image):
+        """
+        Classify one preprocessed image
+
+        Args:
+            image: (H, W, C) or (1, H, W, C) array
+
+        Returns:
+            np.ndarray: (1, classes) probabilities, like interpreter.get_tensor()
+        """
+        image = np.asarray(image, dtype=np.float32)
+        if image.ndim == 4:
+            if image.shape[0] != 1:
+                raise ValueError(f"predict() takes one image, got batch of {image.shape[0]}")
+            image = image[0]
+
+        if not self.batching:
+            with self.slots:
+                result = self.runner(image[np.newaxis])
+            self._record_batch(1)
+            return result
+
+        self._ensure_worker()
+        request = InferenceRequest(image)
+        self.requests.put(request)
+
+        if not request.done.wait(self.timeout):
+            raise TimeoutError(f"Inference did not complete within {self.timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.result[np.newaxis]
+
+    def predict_batch(self, images):
+        """
+        Classify many preprocessed images at once (offline/batch scoring)
+
+        Runs the model directly in chunks of max_batch_size instead of
+        queueing one request per image behind the micro-batcher.
+
+        Args:
+            images: (N, H, W, C) array
+
+        Returns:
+            np.ndarray: (N, classes) probabilities
+        """
+        images = np.asarray(images, dtype=np.float32)
+        outputs = []
+        for start in range(0, len(images), self.max_batch_size):
+            chunk = images[start:start + self.max_batch_size]
+            with self.slots:
+                outputs.append(np.asarray(self.runner(chunk)))
+            self._record_batch(len(chunk))
+        if not outputs:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(outputs)
+
+    def _ensure_worker(self):
+        with self.lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            while len(self._workers) < self.workers:
+                worker = threading.Thread(target=self._run, name=f'inference-batcher-{len(self._workers)}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _collect_batch(self):
+        first = self.requests.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self.requests.get(timeout=remaining)
+                else:
+                    item = self.requests.get_nowait()  # take whatever is already queued
+            except queue.Empty:
+                break
+            if item is None:
+                self.requests.put(None)  # stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+
+            try:
+                outputs = self.runner(np.stack([request.image for request in batch]))
+                for request, output in zip(batch, outputs):
+                    request.result = output
+            except Exception as e:
+                print(f"❌ Inference batch of {len(batch)} failed: {e}")
+                with self.lock:
+                    self.stats['errors'] += 1
+                for request in batch:
+                    request.error = e
+            finally:
+                self._record_batch(len(batch))
+                for request in batch:
+                    request.done.set()
+
+    def _record_batch(self, size):
+        with self.lock:
+            self.stats['requests'] += size
+            self.stats['batches'] += 1
+            self.batch_sizes[size] += 1
+
+    def shutdown(self, timeout=5.0):
+        """Stop the workers after the queued requests have run"""
+        with self.lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self.requests.put(None)
+        for worker in workers:
+            worker.join(timeout)
+
+    def get_stats(self):
+        """
+        Get batching statistics
+
+        Returns:
+            dict: Request/batch counts, average batch size and size histogram
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            batch_sizes = dict(sorted(self.batch_sizes.items()))
+        batches = stats['batches']
+        result = {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'workers': self.workers,
+            'requests': stats['requests'],
+            'batches': batches,
+            'errors': stats['errors'],
+            'avg_batch_size': round(stats['requests'] / batches, 2) if batches else 0,
+            'batch_sizes': batch_sizes
+        }
+        if hasattr(self.runner, 'get_stats'):
+            result['pool'] = self.runner.get_stats()
+        return result
+
+
+def get_pool_config():
+    """
+    Interpreter pool size and threads per interpreter
+
+    INTERPRETER_POOL_SIZE defaults to 2. INTERPRETER_NUM_THREADS defaults
+    to an even share of the CPUs so the pool does not oversubscribe them.
+
+    Returns:
+        tuple: (pool_size, num_threads)
+    """
+    pool_size = max(1, int(os.getenv('INTERPRETER_POOL_SIZE', 2)))
+    num_threads = int(os.getenv('INTERPRETER_NUM_THREADS', 0)) or max(1, (os.cpu_count() or 1) // pool_size)
+    return pool_size, num_threads
+
+
+def create_inference_engine(interpreter=None, model=None, interpreter_factory=None):
+    """
+    Build the engine for whichever model app.py loaded
+
+    Configured by INFERENCE_MAX_BATCH_SIZE (default 8), INFERENCE_MAX_WAIT_MS
+    (default 5), INFERENCE_BATCHING_ENABLED (default true) and, for TFLite,
+    INTERPRETER_POOL_SIZE / INTERPRETER_POOL_TIMEOUT.
+
+    Args:
+        interpreter: Loaded TFLite interpreter (becomes the first pool member)
+        model: Keras model, used when there is no interpreter
+        interpreter_factory: Creates further interpreters for the pool
+
+    Returns:
+        InferenceEngine or None if no model is loaded
+    """
+    if interpreter is not None:
+        pool_size, _ = get_pool_config()
+        runner = InterpreterPool(
+            interpreter_factory,
+            size=pool_size if interpreter_factory else 1,
+            interpreters=[interpreter],
+            timeout=float(os.getenv('INTERPRETER_POOL_TIMEOUT', 30))
+        )
+        workers = runner.size
+    elif model is not None:
+        runner = KerasRunner(model)
+        workers = 1
+    else:
+        return None
+
+    return InferenceEngine(
+        runner,
+        max_batch_size=int(os.getenv('INFERENCE_MAX_BATCH_SIZE', 8)),
+        max_wait_ms=float(os.getenv('INFERENCE_MAX_WAIT_MS', 5)),
+        batching=os.getenv('INFERENCE_BATCHING_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        workers=workers
+    )
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Inference Server Module
+A small pool of long-lived processes that hold the disease model and serve
+predictions to web workers over a local Unix socket, so web workers never
+import TensorFlow or load the model themselves
+
+Each worker process accepts connections on the shared socket and runs its
+own micro-batching InferenceEngine. The TFLite model is loaded by path,
+which TFLite memory-maps, so all worker processes share one copy of the
+weights in the page cache.
+
+Usage:
+    INFERENCE_SERVER_AUTHKEY=<secret> python inference_server.py [--socket /tmp/raitha_mitra_inference.sock] [--workers 1]
+
+Web workers use it when INFERENCE_SERVER is set to the socket path
+(gunicorn.conf.py starts the server automatically in that case, with a
+fresh INFERENCE_SERVER_AUTHKEY for each boot). Messages are pickled, so the
+server refuses to start without an authkey and creates its socket owner-only.
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+DEFAULT_SOCKET = '/tmp/raitha_mitra_inference.sock'
+
+
+def get_authkey():
+    """Shared secret for the socket (INFERENCE_SERVER_AUTHKEY), or None if unset"""
+    authkey = os.getenv('INFERENCE_SERVER_AUTHKEY')
+    return authkey.encode() if authkey else None
+
+
+def load_engine():
+    """Load the disease model (TFLite first, H5 fallback) behind an InferenceEngine"""
+    from model_backend import load_inference_engine
+
+    # Keras H5 weights are read into each process (no memory mapping)
+    engine, model_type = load_inference_engine()
+    if engine is None:
+        raise RuntimeError("No model could be loaded")
+    return engine
+
+
+def _serve_connection(conn, engine):
+    """Answer one web worker connection until it closes"""
+    with conn:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+
+            try:
+                if message[0] == 'predict':
+                    reply = ('ok', engine.predict(message[1]))
+                elif message[0] == 'predict_batch':
+                    reply = ('ok', engine.predict_batch(message[1]))
+                elif message[0] == 'stats':
+                    reply = ('ok', dict(engine.get_stats(), pid=os.getpid()))
+                else:
+                    reply = ('error', f"Unknown operation {message[0]!r}")
+            except Exception as e:
+                reply = ('error', str(e))
+
+            try:
+                conn.send(reply)
+            except OSError:
+                return
+
+
+def _worker_main(listener, engine_factory):
+    """Worker process: load the model once, then serve connections"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the supervisor handles shutdown
+    engine = engine_factory()
+    print(f"🧠 Inference worker {os.getpid()} ready")
+
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError:
+            return  # listener closed
+        except Exception as e:
+            print(f"⚠️  Inference worker {os.getpid()} rejected a connection: {e}")
+            continue
+        threading.Thread(target=_serve_connection, args=(conn, engine), daemon=True).start()
+
+
+class InferenceServer:
+    """
+    Supervisor for the inference worker processes
+
+    Workers are forked after the socket is bound and accept on it directly
+    (pre-fork model). Workers that die are restarted.
+    """
+
+    def __init__(self, address=DEFAULT_SOCKET, workers=1, authkey=None, engine_factory=load_engine):
+        """
+        Args:
+            address: Unix socket path
+            workers: Number of worker processes
+            authkey: Optional shared secret clients must present
+            engine_factory: Builds the InferenceEngine inside each worker
+        """
+        self.address = address
+        self.workers = max(1, workers)
+        self.authkey = authkey
+        self.engine_factory = engine_factory
+
+        self.context = multiprocessing.get_context('fork')
+        self.listener = None
+        self.processes = {}
+        self.stopping = threading.Event()
+
+    def start(self):
+        """Bind the socket and fork the workers"""
+        if os.path.exists(self.address):
+            os.unlink(self.address)  # stale socket from a previous run
+        # Create the socket owner-only from the start (a chmod after bind leaves a window)
+        previous_umask = os.umask(0o177)
+        try:
+            self.listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(previous_umask)
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+        print(f"✅ Inference server listening on {self.address} with {self.workers} worker(s)")
+
+    def _spawn(self, slot):
+        process = self.context.Process(
+            target=_worker_main,
+            args=(self.listener, self.engine_factory),
+            name=f'inference-worker-{slot}',
+            daemon=True
+        )
+        process.start()
+        self.processes[slot] = process
+
+    def supervise(self, check_interval=1.0):
+        """Restart dead workers until stop() is called"""
+        while not self.stopping.wait(check_interval):
+            for slot, process in list(self.processes.items()):
+                if not process.is_alive():
+                    print(f"⚠️  Inference worker {process.pid} exited ({process.exitcode}), restarting")
+                    self._spawn(slot)
+
+    def stop(self, timeout=10):
+        """Stop the workers and remove the socket"""
+        self.stopping.set()
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout)
+        if self.listener:
+            self.listener.close()
+            self.listener = None
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+class RemoteInferenceClient:
+    """
+    Web-worker side of the inference server
+
+    Drop-in for InferenceEngine: predict() takes one preprocessed image and
+    returns (1, classes) probabilities, predict_batch() takes (N, H, W, C).
+    Each thread keeps its own connection.
+    """
+
+    def __init__(self, address=DEFAULT_SOCKET, authkey=None, timeout=30.0, connect_timeout=30.0):
+        """
+        Args:
+            address: Unix socket path of the inference server
+            authkey: Shared secret, if the server uses one
+            timeout: Seconds to wait for a reply
+            connect_timeout: Seconds to keep retrying while the server starts
+        """
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        deadline = time.monotonic() + self.connect_timeout
+        delay = 0.1
+        while True:
+            try:
+                conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+                break
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"Inference server not reachable at {self.address}: {e}")
+                time.sleep(delay)  # server still loading the model
+                delay = min(delay * 2, 1.0)
+
+        self.local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self.local, 'conn', None)
+        self.local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _call(self, message):
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.send(message)
+                if not conn.poll(self.timeout):
+                    self._drop_connection()  # a late reply would answer the next request
+                    raise TimeoutError(f"Inference server did not reply within {self.timeout}s")
+                status, payload = conn.recv()
+                break
+            except TimeoutError:
+                raise
+            except (EOFError, OSError) as e:
+                # The worker holding this connection restarted; retry on a new one
+                self._drop_connection()
+                if attempt == 1:
+                    raise ConnectionError(f"Inference server connection lost: {e}")
+
+        if status == 'error':
+            raise RuntimeError(payload)
+        return payload
+
+    def predict(self, image):
+        """Classify one preprocessed image on the inference server"""
+        return self._call(('predict', np.asarray(image, dtype=np.float32)))
+
+    def predict_batch(self, images):
+        """Classify an (N, H, W, C) batch on the inference server"""
+        return self._call(('predict_batch', np.asarray(images, dtype=np.float32)))
+
+    def get_stats(self):
+        """Stats of the worker process serving this thread's connection"""
+        return dict(self._call(('stats',)), server=self.address)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve disease model predictions over a Unix socket')
+    parser.add_argument('--socket', default=os.getenv('INFERENCE_SERVER', DEFAULT_SOCKET), help='Socket path')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('INFERENCE_SERVER_WORKERS', 1)),
+                        help='Worker processes')
+    args = parser.parse_args()
+
+    authkey = get_authkey()
+    if not authkey:
+        print("❌ INFERENCE_SERVER_AUTHKEY is not set; refusing to unpickle requests from unauthenticated clients")
+        return 1
+
+    server = InferenceServer(args.socket, args.workers, authkey)
+
+    def handle_signal(signum, frame):
+        server.stopping.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    server.start()
+    try:
+        server.supervise()
+    finally:
+        server.stop()
+        print("👋 Inference server stopped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
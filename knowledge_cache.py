@@ -0,0 +1,174 @@
+"""
+Knowledge Cache Module
+Caches Gemini treatment details, market prices and translations keyed
+by (kind, subject, language, prompt version). There are only 38 disease
+classes and 10 languages, so almost every prediction can reuse text
+generated before.
+In-memory LRU tier in front of a SQLite tier shared by all workers (see
+tiered_cache.py); each kind has its own TTL (market prices go stale much
+faster than treatments) and bumping a prompt version makes the old
+entries unreachable.
+"""
+
+import json
+import os
+import time
+
+from tiered_cache import TieredCache
+
+# Kinds not listed never expire: 'catalog' (pre-generated by treatment_catalog.py)
+# is left out on purpose and replaced by bumping TREATMENT_PROMPT_VERSION
+DEFAULT_TTLS = {
+    'treatment': 30 * 86400,
+    'market': 6 * 3600,
+    'translation': 90 * 86400
+}
+
+
+class KnowledgeCache(TieredCache):
+    """
+    Two-tier cache of generated knowledge
+
+    Memory tier: LRU of (kind, subject, language, version) -> entry.
+    Disk tier: SQLite table with the same key, kept across restarts.
+    """
+
+    NAME = 'Knowledge cache'
+    TABLE = 'knowledge_cache'
+    SCHEMA = (
+        '''
+        CREATE TABLE IF NOT EXISTS knowledge_cache (
+            kind TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            language TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (kind, subject, language, version)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_knowledge_cache_created ON knowledge_cache(kind, created_at)'
+    )
+
+    def __init__(self, db_path='knowledge_cache.db', max_entries=1024, ttls=None, enabled=True):
+        """
+        Args:
+            db_path: SQLite file shared by all workers
+            max_entries: Entries kept in memory
+            ttls: dict of kind -> seconds (kinds not listed never expire)
+            enabled: False turns every lookup into a miss
+        """
+        super().__init__(db_path, max_entries, enabled)
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.stats = {}
+
+    def _count(self, kind, key):
+        with self.lock:
+            counters = self.stats.setdefault(kind, {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0})
+            counters[key] += 1
+
+    def _expired(self, kind, created_at, now):
+        ttl = self.ttls.get(kind)
+        return ttl is not None and now - created_at > ttl
+
+    def get(self, kind, subject, language, version):
+        """
+        Look up generated text
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        key = (kind, subject, language, version)
+        now = time.time()
+        entry = self._memory_get(key, lambda entry: not self._expired(kind, entry['created_at'], now))
+        if entry is not None:
+            self._count(kind, 'memory_hits')
+            return entry['value']
+
+        row = self._query(
+            'SELECT value, created_at FROM knowledge_cache '
+            'WHERE kind = ? AND subject = ? AND language = ? AND version = ?',
+            key
+        )
+        if row is not None and not self._expired(kind, row[1], now):
+            entry = {'value': json.loads(row[0]), 'created_at': row[1]}
+            self._remember(key, entry)
+            self._count(kind, 'disk_hits')
+            return entry['value']
+
+        self._count(kind, 'misses')
+        return None
+
+    def put(self, kind, subject, language, version, value):
+        """Store generated text in both tiers"""
+        if not self.enabled:
+            return
+
+        key = (kind, subject, language, version)
+        now = time.time()
+        self._remember(key, {'value': value, 'created_at': now})
+        self._count(kind, 'stores')
+        self._write(
+            'INSERT OR REPLACE INTO knowledge_cache (kind, subject, language, version, value, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            key + (json.dumps(value), now),
+            now=now
+        )
+
+    def _prune(self, conn, now):
+        """Drop expired rows"""
+        for kind, ttl in self.ttls.items():
+            conn.execute('DELETE FROM knowledge_cache WHERE kind = ? AND created_at <= ?', (kind, now - ttl))
+
+    def invalidate(self, kind, keep_version=None, subject=None):
+        """
+        Remove entries of one kind
+
+        Args:
+            keep_version: Keep entries of this prompt version (drop older ones)
+            subject: Only this subject (e.g. one disease or crop)
+
+        Returns:
+            int: Rows removed from the disk tier
+        """
+        query = 'DELETE FROM knowledge_cache WHERE kind = ? AND version IS NOT ?'
+        params = [kind, keep_version]
+        if subject is not None:
+            query += ' AND subject = ?'
+            params.append(subject)
+
+        self._forget(lambda key: key[0] == kind and key[3] != keep_version and (subject is None or key[1] == subject))
+        return self._write(query, params)
+
+    def get_stats(self):
+        """Hits, misses and hit ratio per kind"""
+        with self.lock:
+            stats = {'memory_entries': len(self.memory)}
+            counters_by_kind = {kind: dict(counters) for kind, counters in self.stats.items()}
+        for kind, kind_stats in counters_by_kind.items():
+            hits = kind_stats['memory_hits'] + kind_stats['disk_hits']
+            lookups = hits + kind_stats['misses']
+            kind_stats['hit_rate'] = round(hits / lookups, 3) if lookups else 0.0
+            stats[kind] = kind_stats
+        return stats
+
+
+# Global knowledge cache instance
+knowledge_cache = KnowledgeCache(
+    db_path=os.getenv('KNOWLEDGE_CACHE_DB', 'knowledge_cache.db'),
+    max_entries=int(os.getenv('KNOWLEDGE_CACHE_SIZE', 1024)),
+    ttls={
+        'treatment': int(os.getenv('KNOWLEDGE_TREATMENT_TTL', DEFAULT_TTLS['treatment'])),
+        'market': int(os.getenv('KNOWLEDGE_MARKET_TTL', DEFAULT_TTLS['market'])),
+        'translation': int(os.getenv('KNOWLEDGE_TRANSLATION_TTL', DEFAULT_TTLS['translation']))
+    },
+    enabled=os.getenv('KNOWLEDGE_CACHE_ENABLED', 'true').lower() == 'true'
+)
+
+
+def get_knowledge_cache_stats():
+    """Get knowledge cache statistics"""
+    return knowledge_cache.get_stats()
@@ -0,0 +1,189 @@
+"""
+LLM Client Module
+One shared Gemini client for the whole app. Calls run on a bounded worker
+pool with a request timeout passed down to the HTTP call (so a timed-out
+call is aborted rather than left running), one configured model whose
+connection is reused, and a concurrency limit per caller so a burst of
+chat traffic cannot starve disease predictions.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import google.generativeai as genai
+import requests
+from google.api_core import exceptions as google_exceptions
+
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
+
+# Calls in flight per caller; callers not listed get DEFAULT_CALLER_LIMIT
+CALLER_LIMITS = {
+    'treatment': 6,
+    'market': 6,
+    'translation': 8,
+    'chat': 4,
+    'farm': 2,
+    'yield': 2,
+    'finance': 2,
+    'catalog': 16  # offline treatment_catalog.py job, paced by its own rate budget
+}
+DEFAULT_CALLER_LIMIT = 4
+
+# Extra seconds the pool waits past the request timeout before giving up
+TIMEOUT_GRACE = 1.0
+
+# What the SDK raises when the request timeout expires (gRPC and REST transports)
+SDK_TIMEOUT_ERRORS = (google_exceptions.DeadlineExceeded, requests.exceptions.Timeout, TimeoutError)
+
+
+class LLMTimeout(TimeoutError):
+    """The call (or the wait for a free slot) took longer than its timeout"""
+
+
+class LLMClient:
+    """
+    Shared, bounded Gemini client
+
+    generate() blocks the caller for at most its timeout. What is left of
+    that timeout when a worker picks the call up is sent with the request,
+    so the worker is released when it expires instead of waiting on a hung
+    connection. The pool is sized to the sum of the caller limits, so calls
+    within their caller's limit do not queue behind other callers.
+    """
+
+    def __init__(self, api_key=None, model_name=GEMINI_MODEL, max_workers=None, timeout=30.0, caller_limits=None):
+        """
+        Args:
+            api_key: Gemini API key (None leaves the client unconfigured)
+            model_name: Gemini model for all callers
+            max_workers: LLM calls in flight across the process; defaults to
+                the sum of the caller limits plus DEFAULT_CALLER_LIMIT
+            timeout: Default seconds per call
+            caller_limits: dict of caller -> concurrent calls
+        """
+        self.model_name = model_name
+        self.timeout = timeout
+        self.model = None
+        self.caller_limits = dict(CALLER_LIMITS if caller_limits is None else caller_limits)
+        if max_workers is None:
+            max_workers = sum(self.caller_limits.values()) + DEFAULT_CALLER_LIMIT
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self.semaphores = {}
+        self.lock = threading.Lock()
+        self.stats = {'calls': 0, 'timeouts': 0, 'errors': 0, 'busy': 0}
+        if api_key:
+            self.configure(api_key)
+
+    def configure(self, api_key, model=None):
+        """
+        Configure the API key and create the shared model
+
+        Args:
+            model: Prebuilt model object (tests); created from model_name if None
+        """
+        if model is None:
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(self.model_name)
+        self.model = model
+        return self.model
+
+    @property
+    def available(self):
+        return self.model is not None
+
+    def _semaphore(self, caller):
+        with self.lock:
+            if caller not in self.semaphores:
+                limit = self.caller_limits.get(caller, DEFAULT_CALLER_LIMIT)
+                self.semaphores[caller] = threading.BoundedSemaphore(limit)
+            return self.semaphores[caller]
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _call(self, prompt, deadline):
+        # The request gets whatever is left once a worker starts it
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeout('Deadline passed before a worker was free')
+        response = self.model.generate_content(prompt, request_options={'timeout': remaining})
+        return response.text if response else ''
+
+    def generate(self, prompt, caller='default', timeout=None):
+        """
+        Generate text for a prompt
+
+        Args:
+            prompt: Prompt text
+            caller: Caller name for the per-caller concurrency limit
+            timeout: Seconds for the whole call, including waiting for a slot
+
+        Returns:
+            str: Response text ('' for an empty response)
+
+        Raises:
+            LLMTimeout: No slot or worker, or no answer, within timeout
+            RuntimeError: Client not configured
+            Exception: API errors are passed through
+        """
+        if self.model is None:
+            raise RuntimeError('Gemini client not configured')
+
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        semaphore = self._semaphore(caller)
+        if not semaphore.acquire(timeout=timeout):
+            self._count('busy')
+            raise LLMTimeout(f"Too many concurrent '{caller}' LLM calls")
+
+        try:
+            self._count('calls')
+            future = self.executor.submit(self._call, prompt, deadline)
+            try:
+                return future.result(timeout=max(deadline - time.monotonic(), 0) + TIMEOUT_GRACE)
+            except LLMTimeout:
+                self._count('busy')  # a worker picked it up only after its deadline
+                raise
+            except FutureTimeout:
+                if future.cancel():
+                    # Never started: every worker was busy
+                    self._count('busy')
+                    raise LLMTimeout(f"No free LLM worker for '{caller}' call within {timeout}s")
+                self._count('timeouts')
+                raise LLMTimeout(f"'{caller}' LLM call timed out after {timeout}s")
+            except SDK_TIMEOUT_ERRORS as e:
+                self._count('timeouts')
+                raise LLMTimeout(f"'{caller}' LLM call timed out after {timeout}s") from e
+            except Exception:
+                self._count('errors')
+                raise
+        finally:
+            semaphore.release()
+
+    def get_stats(self):
+        """Call, timeout, error and busy (caller limit or worker pool full) counts"""
+        with self.lock:
+            stats = dict(self.stats)
+        stats['configured'] = self.available
+        return stats
+
+
+# Global client instance
+llm_client = LLMClient(
+    api_key=os.getenv('GEMINI_API_KEY'),
+    max_workers=int(os.getenv('LLM_WORKERS', 0)) or None,
+    timeout=float(os.getenv('LLM_TIMEOUT', 30))
+)
+
+
+def generate_text(prompt, caller='default', timeout=None):
+    """Generate text with the global client (see LLMClient.generate)"""
+    return llm_client.generate(prompt, caller=caller, timeout=timeout)
+
+
+def llm_available():
+    """Whether the global client has a configured model"""
+    return llm_client.available
@@ -397,25 +397,20 @@ def update_regional_stats(region_name, region_type='district'):
     """
     stats = get_regional_stats(region_name)
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
     # Prepare top crops as JSON
     top_crops_json = json.dumps([crop['crop'] for crop in stats['top_crops'][:3]])
     
-    # Update or insert regional stats
-    cursor.execute('''
-        INSERT INTO regional_stats (region_name, region_type, farmer_count, active_farmers, top_crops, last_updated)
-        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        ON CONFLICT(region_name, region_type) DO UPDATE SET
-            farmer_count = excluded.farmer_count,
-            active_farmers = excluded.active_farmers,
-            top_crops = excluded.top_crops,
-            last_updated = CURRENT_TIMESTAMP
-    ''', (region_name, region_type, stats['farmer_count'], stats['active_farmers'], top_crops_json))
-    
-    conn.commit()
-    conn.close()
+    # Update or insert regional stats (committed when the block exits)
+    with db.connection() as conn:
+        conn.execute('''
+            INSERT INTO regional_stats (region_name, region_type, farmer_count, active_farmers, top_crops, last_updated)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(region_name, region_type) DO UPDATE SET
+                farmer_count = excluded.farmer_count,
+                active_farmers = excluded.active_farmers,
+                top_crops = excluded.top_crops,
+                last_updated = CURRENT_TIMESTAMP
+        ''', (region_name, region_type, stats['farmer_count'], stats['active_farmers'], top_crops_json))
     
     return True
 
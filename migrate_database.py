@@ -110,6 +110,12 @@ def migrate_database(db_path='raitha_mitra.db'):
         ''')
         print("  ✅ Index idx_farm_user_date created")
         
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_farm_user_created 
+            ON farm_activities(user_id, created_at)
+        ''')
+        print("  ✅ Index idx_farm_user_created created")
+        
         # ============================================================
         # 4. YIELD PREDICTIONS TABLE
         # ============================================================
@@ -209,6 +215,13 @@ def migrate_database(db_path='raitha_mitra.db'):
         ''')
         print("  ✅ Index idx_messages_sender created")
         
+        # Keyset pagination of a single conversation (one direction per seek)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_messages_pair 
+            ON messages(sender_id, receiver_id, created_at)
+        ''')
+        print("  ✅ Index idx_messages_pair created")
+        
         # ============================================================
         # 8. BLOCKED USERS TABLE
         # ============================================================
@@ -280,6 +293,48 @@ def migrate_database(db_path='raitha_mitra.db'):
         ''')
         print("  ✅ regional_stats table created")
         
+        # ============================================================
+        # 12. NOTIFICATION COUNTERS TABLE
+        # ============================================================
+        print("\n🔔 Creating notification_counters table...")
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'notification_counters'")
+        counters_existed = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notification_counters (
+                user_id INTEGER PRIMARY KEY,
+                unread_messages INTEGER NOT NULL DEFAULT 0,
+                pending_friend_requests INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        ''')
+        print("  ✅ notification_counters table created")
+        
+        if not counters_existed:
+            # Backfill from existing messages and friend requests
+            cursor.execute('''
+                INSERT OR REPLACE INTO notification_counters (user_id, unread_messages, pending_friend_requests)
+                SELECT u.id,
+                       (SELECT COUNT(*) FROM messages WHERE receiver_id = u.id AND is_read = 0),
+                       (SELECT COUNT(*) FROM friend_requests WHERE recipient_id = u.id AND status = 'pending')
+                FROM users u
+            ''')
+            print(f"  ✅ Backfilled counters for {cursor.rowcount} users")
+        
+        # ============================================================
+        # 13. QUERY PLAN INDEXES (found by index_advisor.py)
+        # ============================================================
+        print("\n🔎 Creating query plan indexes...")
+        plan_indexes = [
+            ('idx_yield_user_date', 'yield_predictions(user_id, created_at)'),
+            ('idx_financial_scores_user_date', 'financial_scores(user_id, calculated_at)'),
+            ('idx_friend_requests_recipient', 'friend_requests(recipient_id, status, created_at)'),
+            ('idx_friendships_user2', 'friendships(user2_id, user1_id)')
+        ]
+        for index_name, target in plan_indexes:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {target}')
+            print(f"  ✅ Index {index_name} created")
+        
         # Commit all changes
         conn.commit()
         
@@ -296,6 +351,8 @@ def migrate_database(db_path='raitha_mitra.db'):
         print("  - Created friend_requests table")
         print("  - Created friendships table")
         print("  - Created regional_stats table")
+        print("  - Created notification_counters table")
+        print("  - Created query plan indexes for yield, score, friend and friendship lookups")
         
         return True
         
@@ -325,7 +382,8 @@ def verify_migration(db_path='raitha_mitra.db'):
         'blocked_users',
         'friend_requests',
         'friendships',
-        'regional_stats'
+        'regional_stats',
+        'notification_counters'
     ]
     
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -0,0 +1,106 @@
+"""
+Model Backend Module
+Loads the disease model with the lightest available runtime: the LiteRT
+(ai_edge_litert) or tflite_runtime interpreter, so full TensorFlow is
+never imported for the .tflite model. TensorFlow is optional
+(requirements-dev.txt): it is only used when INFERENCE_BACKEND=tensorflow
+is set explicitly, or imported lazily to load the Keras H5 fallback when
+the .tflite file is missing
+"""
+
+import os
+import time
+
+from inference_engine import create_inference_engine, get_pool_config
+
+TFLITE_MODEL_PATH = 'crop_disease_detection_model.tflite'
+H5_MODEL_PATH = 'crop_disease_detection_model.h5'
+
+# Interpreter providers in order of preference: (name, module, attribute)
+INTERPRETER_BACKENDS = [
+    ('litert', 'ai_edge_litert.interpreter', 'Interpreter'),
+    ('tflite_runtime', 'tflite_runtime.interpreter', 'Interpreter'),
+    ('tensorflow', 'tensorflow', None),
+]
+
+# Backends tried by INFERENCE_BACKEND=auto (TensorFlow must be asked for by name)
+AUTO_BACKENDS = ('litert', 'tflite_runtime')
+
+
+def resolve_interpreter(preferred=None):
+    """
+    Find a TFLite Interpreter class
+
+    Args:
+        preferred: Backend name to require ('litert', 'tflite_runtime' or
+            'tensorflow'); defaults to INFERENCE_BACKEND, 'auto' tries the
+            AUTO_BACKENDS in order
+
+    Returns:
+        tuple: (backend name, Interpreter class)
+
+    Raises:
+        ImportError: If no (or not the preferred) backend is installed
+    """
+    preferred = preferred or os.getenv('INFERENCE_BACKEND', 'auto')
+    if preferred == 'auto':
+        candidates = [b for b in INTERPRETER_BACKENDS if b[0] in AUTO_BACKENDS]
+    else:
+        candidates = [b for b in INTERPRETER_BACKENDS if b[0] == preferred]
+    if not candidates:
+        raise ImportError(f"Unknown inference backend {preferred!r}")
+
+    errors = []
+    for name, module_name, attribute in candidates:
+        try:
+            module = __import__(module_name, fromlist=[attribute or 'lite'])
+        except ImportError as e:
+            errors.append(f"{name}: {e}")
+            continue
+        return name, getattr(module, attribute) if attribute else module.lite.Interpreter
+
+    raise ImportError(f"No TFLite interpreter available ({'; '.join(errors)})")
+
+
+def load_inference_engine(tflite_path=TFLITE_MODEL_PATH, h5_path=H5_MODEL_PATH):
+    """
+    Load the disease model behind a micro-batching InferenceEngine
+
+    The .tflite model is preferred; the Keras H5 model (which needs full
+    TensorFlow) is only loaded if the .tflite file is missing or unusable.
+
+    Returns:
+        tuple: (InferenceEngine or None, model type description)
+    """
+    if os.path.exists(tflite_path):
+        try:
+            start = time.time()
+            backend, Interpreter = resolve_interpreter()
+            _, num_threads = get_pool_config()
+
+            def load_interpreter():
+                interpreter = Interpreter(model_path=tflite_path, num_threads=num_threads)
+                interpreter.allocate_tensors()
+                return interpreter
+
+            print(f"📦 Loading TFLite model from: {tflite_path} ({backend})")
+            interpreter = load_interpreter()
+            print(f"✅ TFLite model loaded successfully in {time.time() - start:.2f}s")
+            print(f"🧠 Model input shape: {interpreter.get_input_details()[0]['shape']}")
+            print(f"📊 Model output shape: {interpreter.get_output_details()[0]['shape']}")
+            return create_inference_engine(interpreter, interpreter_factory=load_interpreter), f"TFLite ({backend})"
+        except Exception as e:
+            print(f"⚠️ Error loading TFLite model: {e}")
+
+    if os.path.exists(h5_path):
+        try:
+            print(f"📦 Loading H5 model from: {h5_path}")
+            import tensorflow as tf
+            model = tf.keras.models.load_model(h5_path, compile=False)
+            print(f"✅ H5 model loaded successfully")
+            print(f"🧠 Model input shape: {model.input_shape}")
+            return create_inference_engine(model=model), "H5"
+        except Exception as e:
+            print(f"❌ Error loading H5 model: {e}")
+
+    return None, "None"
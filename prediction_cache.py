@@ -0,0 +1,243 @@
+"""
+Prediction Cache Module
+Caches /predict results keyed by the upload's content hash and language:
+an in-memory LRU tier in front of a persistent SQLite tier (see
+tiered_cache.py), so repeat submissions skip inference and Gemini calls.
+Matching near-duplicates by perceptual hash (dHash) is off by default:
+leaf photos have very similar 9x8 thumbnails, so a near-duplicate hit
+could hand a farmer another plant's diagnosis. Set
+PREDICTION_CACHE_PHASH_DISTANCE >= 0 only where re-encoded copies of the
+same photo are common and that risk is acceptable.
+"""
+
+import json
+import os
+import time
+
+from PIL import Image
+
+from tiered_cache import TieredCache
+
+
+def perceptual_hash(image):
+    """
+    64-bit difference hash (dHash) of a PIL image
+
+    Each bit says whether a pixel of the 9x8 greyscale thumbnail is brighter
+    than its right neighbour, so re-encoding and resizing barely change it.
+    """
+    pixels = list(image.convert('L').resize((9, 8), Image.BILINEAR).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            value = (value << 1) | (left > pixels[row * 9 + col + 1])
+    return value
+
+
+class PredictionCache(TieredCache):
+    """
+    Two-tier cache of prediction responses
+
+    Memory tier: LRU of (content_hash, language) -> entry.
+    Disk tier: SQLite table with the same key, shared by all workers and
+    kept across restarts. Entries expire after ttl seconds (market prices
+    in the payload go stale).
+    """
+
+    NAME = 'Prediction cache'
+    TABLE = 'prediction_cache'
+    SCHEMA = (
+        '''
+        CREATE TABLE IF NOT EXISTS prediction_cache (
+            content_hash TEXT NOT NULL,
+            language TEXT NOT NULL,
+            phash INTEGER,
+            class_name TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (content_hash, language)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_prediction_cache_phash ON prediction_cache(phash, language)',
+        'CREATE INDEX IF NOT EXISTS idx_prediction_cache_created ON prediction_cache(created_at)'
+    )
+
+    def __init__(self, db_path='prediction_cache.db', max_entries=512, max_rows=5000,
+                 ttl=86400, max_distance=-1, enabled=True):
+        super().__init__(db_path, max_entries, enabled)
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.max_distance = max_distance  # dHash bits that may differ (-1, the default, disables near-duplicates)
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'near_duplicate_hits': 0,
+            'classification_hits': 0,
+            'misses': 0,
+            'stores': 0
+        }
+
+    @property
+    def near_duplicates_enabled(self):
+        return self.max_distance >= 0
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _find_near_duplicate(self, language, phash, now):
+        """Closest in-memory entry for `language` within max_distance bits"""
+        best, best_distance = None, self.max_distance + 1
+        for (_, entry_language), entry in self._memory_items():
+            if entry_language != language or entry['phash'] is None or now - entry['created_at'] > self.ttl:
+                continue
+            distance = (entry['phash'] ^ phash).bit_count()
+            if distance < best_distance:
+                best, best_distance = entry, distance
+        return best
+
+    def get(self, content_hash, language, phash=None):
+        """
+        Look up a cached response
+
+        Returns:
+            dict or None: The cached response payload
+        """
+        if not self.enabled:
+            return None
+
+        key = (content_hash, language)
+        now = time.time()
+        entry = self._memory_get(key, lambda entry: now - entry['created_at'] <= self.ttl)
+        if entry is not None:
+            self._count('memory_hits')
+            return entry['payload']
+
+        row = self._query(
+            'SELECT phash, class_name, confidence, payload, created_at FROM prediction_cache '
+            'WHERE content_hash = ? AND language = ? AND created_at > ?',
+            (content_hash, language, now - self.ttl)
+        )
+        if row is None and phash is not None and self.near_duplicates_enabled:
+            row = self._query(
+                'SELECT phash, class_name, confidence, payload, created_at FROM prediction_cache '
+                'WHERE phash = ? AND language = ? AND created_at > ? ORDER BY created_at DESC LIMIT 1',
+                (_to_signed(phash), language, now - self.ttl)
+            )
+
+        if row is not None:
+            entry = self._entry(row)
+            self._remember(key, entry)
+            self._count('disk_hits')
+            return entry['payload']
+
+        if phash is not None and self.near_duplicates_enabled:
+            entry = self._find_near_duplicate(language, phash, now)
+            if entry is not None:
+                self._count('near_duplicate_hits')
+                return entry['payload']
+
+        self._count('misses')
+        return None
+
+    def get_classification(self, content_hash):
+        """
+        Classifier output cached for this image in any language
+
+        Returns:
+            tuple or None: (class_name, confidence)
+        """
+        if not self.enabled:
+            return None
+
+        for (entry_hash, _), entry in self._memory_items():
+            if entry_hash == content_hash:
+                self._count('classification_hits')
+                return entry['class_name'], entry['confidence']
+
+        row = self._query(
+            'SELECT class_name, confidence FROM prediction_cache WHERE content_hash = ? LIMIT 1',
+            (content_hash,)
+        )
+        if row is not None:
+            self._count('classification_hits')
+            return row[0], row[1]
+        return None
+
+    def put(self, content_hash, language, class_name, confidence, payload, phash=None):
+        """Store a response in both tiers"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        self._remember((content_hash, language), {
+            'phash': phash,
+            'class_name': class_name,
+            'confidence': confidence,
+            'payload': payload,
+            'created_at': now
+        })
+        self._count('stores')
+        self._write(
+            'INSERT OR REPLACE INTO prediction_cache '
+            '(content_hash, language, phash, class_name, confidence, payload, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (content_hash, language, _to_signed(phash) if phash is not None else None,
+             class_name, confidence, json.dumps(payload), now),
+            now=now
+        )
+
+    def _prune(self, conn, now):
+        """Drop expired rows and trim the table to max_rows (oldest first)"""
+        conn.execute('DELETE FROM prediction_cache WHERE created_at <= ?', (now - self.ttl,))
+        conn.execute(
+            'DELETE FROM prediction_cache WHERE rowid IN ('
+            'SELECT rowid FROM prediction_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_rows,)
+        )
+
+    def _entry(self, row):
+        phash, class_name, confidence, payload, created_at = row
+        return {
+            'phash': _to_unsigned(phash) if phash is not None else None,
+            'class_name': class_name,
+            'confidence': confidence,
+            'payload': json.loads(payload),
+            'created_at': created_at
+        }
+
+    def get_stats(self):
+        """Hit/miss counters and tier sizes"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self.memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['near_duplicate_hits'] + stats['misses']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+def _to_signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+# Global prediction cache instance
+prediction_cache = PredictionCache(
+    db_path=os.getenv('PREDICTION_CACHE_DB', 'prediction_cache.db'),
+    max_entries=int(os.getenv('PREDICTION_CACHE_SIZE', 512)),
+    max_rows=int(os.getenv('PREDICTION_CACHE_MAX_ROWS', 5000)),
+    ttl=int(os.getenv('PREDICTION_CACHE_TTL', 86400)),
+    max_distance=int(os.getenv('PREDICTION_CACHE_PHASH_DISTANCE', -1)),
+    enabled=os.getenv('PREDICTION_CACHE_ENABLED', 'true').lower() == 'true'
+)
+
+
+def get_prediction_cache_stats():
+    """Get prediction cache statistics"""
+    return prediction_cache.get_stats()
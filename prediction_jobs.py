@@ -0,0 +1,190 @@
+"""
+Prediction Jobs Module
+Runs slow prediction enrichment (Gemini treatment details, market prices,
+translations) on a background executor so /predict can answer with the
+classifier result right away. Job records live in SQLite, so a client
+polling /api/predict/jobs/<id> can be served by any gunicorn worker.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'error'
+
+
+class JobStore:
+    """
+    Background executor with job status and results kept in SQLite
+
+    Jobs run in the process that submitted them; the status row is what
+    other workers read. A job whose row stops updating for stale_after
+    seconds (its worker was restarted mid-job) is reported as failed.
+    """
+
+    def __init__(self, db_path='prediction_jobs.db', max_workers=4, ttl=3600, stale_after=300):
+        """
+        Args:
+            db_path: SQLite file shared by all workers
+            max_workers: Jobs that run at once in this process
+            ttl: Seconds finished jobs are kept
+            stale_after: Seconds after which an unfinished job counts as lost
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prediction-job')
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.initialized = False
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0}
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self.local.conn = conn
+            with self.lock:
+                if not self.initialized:
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS prediction_jobs (
+                            job_id TEXT PRIMARY KEY,
+                            status TEXT NOT NULL,
+                            result TEXT,
+                            error TEXT,
+                            created_at REAL NOT NULL,
+                            updated_at REAL NOT NULL
+                        )
+                    ''')
+                    conn.execute('CREATE INDEX IF NOT EXISTS idx_prediction_jobs_updated ON prediction_jobs(updated_at)')
+                    conn.commit()
+                    self.initialized = True
+        return conn
+
+    def _update(self, job_id, status, result=None, error=None):
+        conn = self._connection()
+        conn.execute(
+            'UPDATE prediction_jobs SET status = ?, result = COALESCE(?, result), error = ?, updated_at = ? WHERE job_id = ?',
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+        )
+        conn.commit()
+
+    def submit(self, fn, *args, initial=None):
+        """
+        Run fn(*args) in the background
+
+        Args:
+            fn: Callable returning a JSON-serializable result
+            initial: Partial result returned while the job is pending
+
+        Returns:
+            str: Job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            'INSERT INTO prediction_jobs (job_id, status, result, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+            (job_id, PENDING, json.dumps(initial) if initial is not None else None, now, now)
+        )
+        conn.commit()
+
+        with self.lock:
+            self.stats['submitted'] += 1
+            prune = self.stats['submitted'] % 100 == 0
+        if prune:
+            self.prune()
+
+        self.executor.submit(self._run, job_id, fn, args)
+        return job_id
+
+    def _run(self, job_id, fn, args):
+        try:
+            self._update(job_id, RUNNING)
+            result = fn(*args)
+            self._update(job_id, DONE, result=result)
+            with self.lock:
+                self.stats['completed'] += 1
+        except Exception as e:
+            print(f"❌ Prediction job {job_id} failed: {e}")
+            with self.lock:
+                self.stats['failed'] += 1
+            try:
+                self._update(job_id, FAILED, error=str(e))
+            except sqlite3.Error as db_error:
+                print(f"⚠️ Could not record job failure: {db_error}")
+
+    def get(self, job_id):
+        """
+        Current state of a job
+
+        Returns:
+            dict or None: job_id, status, result, error (None if unknown)
+        """
+        row = self._connection().execute(
+            'SELECT status, result, error, created_at, updated_at FROM prediction_jobs WHERE job_id = ?',
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        status, result, error, created_at, updated_at = row
+        if status in (PENDING, RUNNING) and time.time() - updated_at > self.stale_after:
+            status, error = FAILED, 'Job was interrupted, please try again'
+        return {
+            'job_id': job_id,
+            'status': status,
+            'result': json.loads(result) if result else None,
+            'error': error,
+            'elapsed': round((updated_at if status in (DONE, FAILED) else time.time()) - created_at, 2)
+        }
+
+    def wait(self, job_id, timeout=30.0, poll_interval=0.2):
+        """
+        Poll until the job finishes or timeout expires; returns get()
+
+        For scripts and tests: request handlers answer with get() at once
+        instead of parking a request thread here.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in (DONE, FAILED) or time.monotonic() >= deadline:
+                return job
+            time.sleep(poll_interval)
+
+    def prune(self):
+        """Delete jobs last updated more than ttl seconds ago"""
+        conn = self._connection()
+        conn.execute('DELETE FROM prediction_jobs WHERE updated_at < ?', (time.time() - self.ttl,))
+        conn.commit()
+
+    def get_stats(self):
+        """Jobs submitted/completed/failed by this process"""
+        with self.lock:
+            stats = dict(self.stats)
+        stats['running'] = stats['submitted'] - stats['completed'] - stats['failed']
+        return stats
+
+
+# Global job store instance
+prediction_jobs = JobStore(
+    db_path=os.getenv('PREDICTION_JOBS_DB', 'prediction_jobs.db'),
+    max_workers=int(os.getenv('PREDICTION_JOB_WORKERS', 4)),
+    ttl=int(os.getenv('PREDICTION_JOB_TTL', 3600))
+)
+
+
+def submit_job(fn, *args, initial=None):
+    """Submit a background job on the global job store"""
+    return prediction_jobs.submit(fn, *args, initial=initial)
+
+
+def get_job(job_id):
+    """Get a job from the global job store"""
+    return prediction_jobs.get(job_id)
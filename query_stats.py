@@ -0,0 +1,335 @@
+"""
+Query Stats Module
+Instruments DatabaseManager connections to record every SQL statement's
+duration and row count, keeps per-statement and per-route aggregates, and
+writes statements slower than a threshold to a slow-query log
+"""
+
+import os
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+
+from flask import g, has_request_context, request
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape so executions can be grouped
+
+    Collapses whitespace, replaces literals with ? and placeholder
+    lists such as IN (?, ?, ?) with (...).
+    """
+    sql = ' '.join(sql.split())
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    return _PLACEHOLDER_LIST.sub('(...)', sql)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class QueryStats:
+    """
+    In-memory SQL statement statistics
+
+    Keeps the last `sample_size` durations per normalized statement and per
+    route so p50/p95 reflect recent traffic.
+    """
+
+    def __init__(self, enabled=True, slow_query_ms=100, slow_log_path='slow_queries.log',
+                 sample_size=500, max_statements=500):
+        """
+        Args:
+            enabled: Wrap connections at all
+            slow_query_ms: Statements at or above this duration go to the slow log
+            slow_log_path: Slow-query log file ('' prints to stdout instead)
+            sample_size: Durations kept per statement / route for percentiles
+            max_statements: Distinct statements tracked before grouping the rest as '<other>'
+        """
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.slow_log_path = slow_log_path
+        self.sample_size = sample_size
+        self.max_statements = max_statements
+
+        self.lock = threading.Lock()
+        self.log_lock = threading.Lock()
+        # Store: {normalized_sql: {'count', 'total', 'max', 'rows', 'samples'}}
+        self.statements = {}
+        # Store: {endpoint: {'requests', 'queries': deque, 'durations': deque}}
+        self.routes = {}
+
+    def _new_entry(self):
+        return {'count': 0, 'total': 0.0, 'max': 0.0, 'rows': 0, 'samples': deque(maxlen=self.sample_size)}
+
+    def record(self, sql, elapsed, rows):
+        """
+        Record one executed statement
+
+        Args:
+            sql: Statement text as executed
+            elapsed: Seconds spent executing and fetching
+            rows: Rows fetched (SELECT) or affected (DML)
+        """
+        normalized = normalize_sql(sql)
+
+        with self.lock:
+            entry = self.statements.get(normalized)
+            if entry is None:
+                if len(self.statements) >= self.max_statements:
+                    normalized = '<other>'
+                entry = self.statements.setdefault(normalized, self._new_entry())
+            entry['count'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            entry['rows'] += max(rows, 0)
+            entry['samples'].append(elapsed)
+
+        if has_request_context():
+            g.query_count = g.get('query_count', 0) + 1
+            g.query_time = g.get('query_time', 0.0) + elapsed
+
+        if elapsed * 1000 >= self.slow_query_ms:
+            self._log_slow(sql, elapsed, rows)
+
+    def _log_slow(self, sql, elapsed, rows):
+        route = f"{request.method} {request.path}" if has_request_context() else '-'
+        line = (f"{datetime.now().isoformat(timespec='seconds')}\t{elapsed * 1000:.1f}ms\t"
+                f"{rows} rows\t{route}\t{' '.join(sql.split())}")
+        if not self.slow_log_path:
+            print(f"🐢 Slow query: {line}")
+            return
+        try:
+            with self.log_lock, open(self.slow_log_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            print(f"⚠️  Could not write slow query log: {e}")
+
+    def record_request(self, endpoint, query_count, query_time):
+        """Record the SQL totals of one finished request"""
+        with self.lock:
+            route = self.routes.get(endpoint)
+            if route is None:
+                route = self.routes[endpoint] = {
+                    'requests': 0,
+                    'queries': deque(maxlen=self.sample_size),
+                    'durations': deque(maxlen=self.sample_size)
+                }
+            route['requests'] += 1
+            route['queries'].append(query_count)
+            route['durations'].append(query_time)
+
+    def get_stats(self, limit=50):
+        """
+        Get aggregate statistics
+
+        Args:
+            limit: Max statements / routes to return (heaviest first)
+
+        Returns:
+            dict: Per-statement and per-route aggregates (times in ms)
+        """
+        with self.lock:
+            statements = [(sql, dict(entry), sorted(entry['samples'])) for sql, entry in self.statements.items()]
+            routes = [(endpoint, dict(route), sorted(route['queries']), sorted(route['durations']))
+                      for endpoint, route in self.routes.items()]
+
+        statement_stats = sorted((
+            {
+                'sql': sql,
+                'count': entry['count'],
+                'total_ms': round(entry['total'] * 1000, 2),
+                'p50_ms': round(_percentile(samples, 50) * 1000, 2),
+                'p95_ms': round(_percentile(samples, 95) * 1000, 2),
+                'max_ms': round(entry['max'] * 1000, 2),
+                'avg_rows': round(entry['rows'] / entry['count'], 1)
+            }
+            for sql, entry, samples in statements
+        ), key=lambda s: s['total_ms'], reverse=True)
+
+        route_stats = sorted((
+            {
+                'endpoint': endpoint,
+                'requests': route['requests'],
+                'p50_queries': _percentile(queries, 50),
+                'p95_queries': _percentile(queries, 95),
+                'max_queries': queries[-1] if queries else 0,
+                'p50_ms': round(_percentile(durations, 50) * 1000, 2),
+                'p95_ms': round(_percentile(durations, 95) * 1000, 2)
+            }
+            for endpoint, route, queries, durations in routes
+        ), key=lambda r: r['p95_queries'], reverse=True)
+
+        return {
+            'enabled': self.enabled,
+            'slow_query_ms': self.slow_query_ms,
+            'statements': statement_stats[:limit],
+            'routes': route_stats[:limit]
+        }
+
+    def reset(self):
+        """Clear all collected statistics"""
+        with self.lock:
+            self.statements.clear()
+            self.routes.clear()
+
+
+class InstrumentedCursor:
+    """
+    Proxy around a sqlite3 cursor that times each statement
+
+    A statement's time covers execute() plus every fetch until the cursor is
+    exhausted, re-executed or closed, since SQLite produces rows lazily.
+    """
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+        self._pending = None  # [sql, elapsed, rows]
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending:
+            sql, elapsed, rows = pending
+            if not rows and self._cursor.rowcount > 0:
+                rows = self._cursor.rowcount  # INSERT/UPDATE/DELETE
+            self._stats.record(sql, elapsed, rows)
+
+    def _run(self, method, sql, params):
+        self._finish()
+        self._pending = [sql, 0.0, 0]
+        start = time.perf_counter()
+        try:
+            method(sql, params)
+        finally:
+            self._pending[1] += time.perf_counter() - start
+        return self
+
+    def execute(self, sql, params=()):
+        return self._run(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        self._run(self._cursor.executemany, sql, seq_of_params)
+        self._finish()
+        return self
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        if self._pending:
+            self._pending[1] += time.perf_counter() - start
+        return result
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        if row is None:
+            self._finish()
+        elif self._pending:
+            self._pending[2] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._fetch(self._cursor.fetchmany, size or self._cursor.arraysize)
+        if self._pending:
+            self._pending[2] += len(rows)
+        if len(rows) < (size or self._cursor.arraysize):
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        if self._pending:
+            self._pending[2] += len(rows)
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection:
+    """Proxy around a sqlite3 (or pooled) connection that hands out InstrumentedCursors"""
+
+    def __init__(self, conn, stats):
+        self._wrapped = conn
+        self._stats = stats
+        self._cursors = weakref.WeakSet()
+
+    def cursor(self):
+        cursor = InstrumentedCursor(self._wrapped.cursor(), self._stats)
+        self._cursors.add(cursor)
+        return cursor
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def close(self):
+        for cursor in list(self._cursors):
+            cursor._finish()
+        self._wrapped.close()
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def __enter__(self):
+        # Keep statements inside the block instrumented; the wrapped
+        # connection still decides commit/rollback (and pool release)
+        self._wrapped.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return self._wrapped.__exit__(exc_type, exc_value, tb)
+
+
+# Global query stats instance
+query_stats = QueryStats(
+    enabled=os.getenv('QUERY_STATS_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+    slow_query_ms=float(os.getenv('SLOW_QUERY_MS', 100)),
+    slow_log_path=os.getenv('SLOW_QUERY_LOG', 'slow_queries.log')
+)
+
+
+def instrument_connection(conn):
+    """Wrap a connection for query stats (no-op when QUERY_STATS_ENABLED=false)"""
+    if not query_stats.enabled:
+        return conn
+    return InstrumentedConnection(conn, query_stats)
+
+
+def get_query_stats(limit=50):
+    """Get aggregate query statistics"""
+    return query_stats.get_stats(limit)
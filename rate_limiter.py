@@ -38,6 +38,10 @@ class RateLimiter:
             'financial_score': {
                 'calls': 30,  # 30 score calculations
                 'window': 3600  # per hour
+            },
+            'batch_prediction': {
+                'calls': 10,  # 10 zip archives
+                'window': 3600  # per hour
             }
         }
     
@@ -47,7 +51,7 @@ class RateLimiter:
         
         Args:
             user_id: User ID
-            api_type: Type of API call ('chat', 'schedule', 'yield_prediction', 'financial_score')
+            api_type: Type of API call ('chat', 'schedule', 'yield_prediction', 'financial_score', 'batch_prediction')
             
         Returns:
             tuple: (allowed: bool, remaining: int, reset_time: int)
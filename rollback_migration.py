@@ -40,7 +40,8 @@ def rollback_database(db_path='raitha_mitra.db'):
             'blocked_users',
             'friend_requests',
             'friendships',
-            'regional_stats'
+            'regional_stats',
+            'notification_counters'
         ]
         
         for table in tables_to_drop:
@@ -722,7 +722,7 @@ class AuthManager {
                                             <span class="text-sm text-gray-500">${new Date(prediction.created_at).toLocaleDateString()}</span>
                                         </div>
                                         <p class="text-sm text-gray-600 mb-2">Confidence: ${(prediction.confidence * 100).toFixed(1)}%</p>
-                                        ${prediction.image_path ? `<img src="${prediction.image_path}" alt="Crop image" class="w-20 h-20 object-cover rounded mb-2">` : ''}
+                                        ${prediction.image_path ? `<img src="${prediction.thumbnail_path || prediction.image_path}" alt="Crop image" class="w-20 h-20 object-cover rounded mb-2" loading="lazy">` : ''}
                                         <p class="text-xs text-gray-500">Yield Impact: ${prediction.yield_impact || 'Not determined'}</p>
                                         <div class="mt-2 text-xs text-blue-600">
                                             <i class="fas fa-eye mr-1"></i>Click to view detailed treatment information
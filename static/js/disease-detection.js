@@ -367,13 +367,49 @@ function resetState() {
   }
 }
 
+// Send the canvas image as a binary multipart upload to /api/v2/predict,
+// falling back to the base64 JSON /predict endpoint on servers without it.
+// Both run as async jobs: the classifier result comes back at once and the
+// treatment details follow from /api/predict/jobs/<id>
+async function postPrediction(userId, language) {
+  const blob = await new Promise((resolve) =>
+    canvas.toBlob(resolve, "image/jpeg", 0.92)
+  );
+
+  if (blob) {
+    const formData = new FormData();
+    formData.append("image", blob, "photo.jpg");
+    if (userId) formData.append("user_id", userId);
+    formData.append("language", language);
+    formData.append("async", "1");
+
+    const response = await fetch("/api/v2/predict", {
+      method: "POST",
+      body: formData,
+    });
+    if (response.status !== 404 && response.status !== 405) {
+      return response;
+    }
+    console.log("ℹ️ /api/v2/predict unavailable, using /predict");
+  }
+
+  return fetch("/predict", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      image: canvas.toDataURL("image/jpeg"),
+      user_id: userId,
+      language: language, // Use selected language
+      async: true,
+    }),
+  });
+}
+
 async function analyzeImage() {
   if (!canvas) return;
 
   loader.classList.remove("hidden");
 
-  const imageDataURL = canvas.toDataURL("image/jpeg");
-
   // Get user data for the prediction
   const userData = JSON.parse(localStorage.getItem("userData") || "{}");
   const userId = userData.id;
@@ -387,15 +423,7 @@ async function analyzeImage() {
 
     console.log(`📝 Using language: ${selectedLanguage}`);
 
-    const response = await fetch("/predict", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        image: imageDataURL,
-        user_id: userId,
-        language: selectedLanguage, // Use selected language
-      }),
-    });
+    const response = await postPrediction(userId, selectedLanguage);
 
     if (!response.ok) {
       const errorData = await response.json();
@@ -414,6 +442,10 @@ async function analyzeImage() {
     };
 
     displayResults(data);
+
+    if (data.job_id) {
+      await waitForPredictionJob(data);
+    }
   } catch (error) {
     console.error("❌ Analysis Error:", error);
     loader.classList.add("hidden");
@@ -424,6 +456,47 @@ async function analyzeImage() {
   }
 }
 
+// Poll an async prediction job until the treatment details are ready.
+// The server answers at once; Retry-After says how long to wait between polls.
+async function waitForPredictionJob(partial) {
+  const deadline = Date.now() + 120000;
+  let delay = 1000;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, delay));
+
+    let job;
+    try {
+      const response = await fetch(partial.job_url);
+      if (!response.ok) break;
+      const retryAfter = parseInt(response.headers.get("Retry-After"), 10);
+      delay = retryAfter > 0 ? retryAfter * 1000 : Math.min(delay * 1.5, 5000);
+      job = await response.json();
+    } catch (error) {
+      console.warn("⚠️ Job poll failed, retrying:", error);
+      delay = Math.min(delay * 2, 5000);
+      continue;
+    }
+
+    if (job.status === "done") {
+      console.log("✅ Treatment details ready:", job.result);
+      currentPredictionData = {
+        ...job.result,
+        original_yield_impact:
+          job.result.original_yield_impact || job.result.yield_impact,
+      };
+      displayResults(job.result);
+      return;
+    }
+    if (job.status === "error") {
+      console.error("❌ Prediction job failed:", job.error);
+      break;
+    }
+  }
+
+  // Keep the classifier result; show fallbacks instead of the loading text
+  displayResults({ ...partial, job_id: null });
+}
+
 // Fast language switching for existing results
 async function switchResultsLanguage(newLanguage) {
   if (isLanguageSwitching || !currentPredictionData) return;
@@ -542,22 +615,32 @@ function cleanDisplayText(text) {
 }
 
 function displayResults(data) {
+  // Async jobs arrive without details first; show a loading note until they do
+  const details = data.details || {};
+  const pending = data.job_id && !data.details ? "⏳ Loading..." : null;
+
   // Update result elements with cleaned content
   const elements = {
     diseaseName: cleanDisplayText(data.disease) || "N/A",
     yieldImpact: cleanDisplayText(data.yield_impact) || "N/A",
     marketPrices:
-      cleanDisplayText(data.market_prices) || "Market prices not available",
+      cleanDisplayText(data.market_prices) ||
+      pending ||
+      "Market prices not available",
     symptoms:
-      cleanDisplayText(data.details.symptoms) || "Details not available",
+      cleanDisplayText(details.symptoms) || pending || "Details not available",
     organicTreatment:
-      cleanDisplayText(data.details.organic_treatment) ||
+      cleanDisplayText(details.organic_treatment) ||
+      pending ||
       "Details not available",
     chemicalTreatment:
-      cleanDisplayText(data.details.chemical_treatment) ||
+      cleanDisplayText(details.chemical_treatment) ||
+      pending ||
       "Details not available",
     preventionTips:
-      cleanDisplayText(data.details.prevention_tips) || "Details not available",
+      cleanDisplayText(details.prevention_tips) ||
+      pending ||
+      "Details not available",
   };
 
   Object.entries(elements).forEach(([id, content]) => {
@@ -614,11 +697,13 @@ function displayResults(data) {
   const detectionInterface = document.getElementById("detectionInterface");
   const resultsSection = document.getElementById("resultsSection");
 
+  const firstShown = resultsSection && resultsSection.classList.contains("hidden");
+
   if (detectionInterface) detectionInterface.classList.add("hidden");
   if (resultsSection) resultsSection.classList.remove("hidden");
 
-  // Scroll to top
-  window.scrollTo(0, 0);
+  // Scroll to top (not again when job details fill in)
+  if (firstShown) window.scrollTo(0, 0);
 }
 
 // Download report functionality
@@ -765,7 +850,9 @@ async function loadPredictionHistory() {
             <div class="flex items-start space-x-4">
                 ${
                   pred.image_path
-                    ? `<img src="${pred.image_path}" alt="Crop" class="w-20 h-20 rounded-lg object-cover">`
+                    ? `<img src="${
+                        pred.thumbnail_path || pred.image_path
+                      }" alt="Crop" class="w-20 h-20 rounded-lg object-cover" loading="lazy">`
                     : '<div class="w-20 h-20 rounded-lg bg-gray-200 flex items-center justify-center"><i class="fas fa-image text-gray-400"></i></div>'
                 }
                 <div class="flex-1">
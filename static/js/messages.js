@@ -34,7 +34,11 @@ document.addEventListener('DOMContentLoaded', function() {
     let currentThreadUserId = null;
     let selectedComposeUserId = null;
     let pollingInterval = null;
+    let eventSource = null;
     let conversations = [];
+    let threadMessages = [];      // Loaded messages of the open thread, oldest first
+    let threadCursor = null;      // next_cursor for the next older page (null = no more)
+    let loadedThreadUserId = null;
 
     // Initialize
     init();
@@ -72,8 +76,10 @@ document.addEventListener('DOMContentLoaded', function() {
         // Load initial data
         loadInbox();
 
-        // Start polling for new messages
-        startPolling();
+        // Listen for pushed messages; poll only if push is unavailable
+        if (!connectEventStream()) {
+            startPolling();
+        }
     }
 
     // Load inbox conversations
@@ -167,7 +173,7 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Load thread messages
+    // Load thread messages (newest page; older pages stay loaded on refresh)
     async function loadThread(userId) {
         try {
             const response = await fetch(`/api/messages/thread/${userId}`);
@@ -177,7 +183,25 @@ document.addEventListener('DOMContentLoaded', function() {
             }
 
             const data = await response.json();
-            displayMessages(data.messages || []);
+            const newest = data.messages || [];
+            const newestIds = new Set(newest.map(msg => msg.id));
+            const overlaps = threadMessages.some(msg => newestIds.has(msg.id));
+
+            if (loadedThreadUserId === userId && overlaps) {
+                // Refresh of the open thread: keep the older pages already loaded
+                const firstNewId = newest[0].id;
+                const firstIndex = threadMessages.findIndex(msg => msg.id === firstNewId);
+                const older = firstIndex > 0 ? threadMessages.slice(0, firstIndex) : [];
+                threadMessages = older.concat(newest);
+                if (older.length === 0) {
+                    threadCursor = data.next_cursor || null;
+                }
+            } else {
+                threadMessages = newest;
+                threadCursor = data.next_cursor || null;
+            }
+            loadedThreadUserId = userId;
+            displayMessages(threadMessages);
 
         } catch (error) {
             console.error('Error loading thread:', error);
@@ -185,8 +209,43 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Load the next older page of the open thread
+    async function loadOlderMessages() {
+        if (!threadCursor || !currentThreadUserId) {
+            return;
+        }
+
+        try {
+            const userId = currentThreadUserId;
+            const response = await fetch(`/api/messages/thread/${userId}?cursor=${encodeURIComponent(threadCursor)}`);
+
+            if (!response.ok) {
+                throw new Error('Failed to load older messages');
+            }
+
+            const data = await response.json();
+            if (userId !== currentThreadUserId) {
+                return;  // Thread changed while loading
+            }
+
+            // Keep the view anchored on the message that was at the top
+            const previousHeight = messagesContainer.scrollHeight;
+            const previousTop = messagesContainer.scrollTop;
+
+            threadMessages = (data.messages || []).concat(threadMessages);
+            threadCursor = data.next_cursor || null;
+            displayMessages(threadMessages, false);
+
+            messagesContainer.scrollTop = messagesContainer.scrollHeight - previousHeight + previousTop;
+
+        } catch (error) {
+            console.error('Error loading older messages:', error);
+            showNotification('Failed to load older messages', 'error');
+        }
+    }
+
     // Display messages in thread
-    function displayMessages(messages) {
+    function displayMessages(messages, scrollDown = true) {
         messagesContainer.innerHTML = '';
 
         if (messages.length === 0) {
@@ -198,6 +257,18 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
+        if (threadCursor) {
+            const loadOlder = document.createElement('div');
+            loadOlder.className = 'text-center';
+            loadOlder.innerHTML = `
+                <button type="button" class="text-sm text-green-600 hover:text-green-700 font-medium">
+                    <i class="fas fa-chevron-up mr-1"></i>Load older messages
+                </button>
+            `;
+            loadOlder.querySelector('button').addEventListener('click', loadOlderMessages);
+            messagesContainer.appendChild(loadOlder);
+        }
+
         messages.forEach(msg => {
             const isSent = msg.is_sent;
             const div = document.createElement('div');
@@ -216,13 +287,17 @@ document.addEventListener('DOMContentLoaded', function() {
             messagesContainer.appendChild(div);
         });
 
-        // Scroll to bottom
-        scrollToBottom();
+        if (scrollDown) {
+            scrollToBottom();
+        }
     }
 
     // Close thread
     function closeThread() {
         currentThreadUserId = null;
+        loadedThreadUserId = null;
+        threadMessages = [];
+        threadCursor = null;
         threadHeader.classList.add('hidden');
         messagesContainer.classList.add('hidden');
         messageInput.classList.add('hidden');
@@ -538,6 +613,54 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Open the Server-Sent Events stream; returns false if it cannot be used
+    function connectEventStream() {
+        if (!window.EventSource) {
+            return false;
+        }
+
+        eventSource = new EventSource('/api/events/stream');
+
+        eventSource.addEventListener('counts', () => {
+            // Connected (or reconnected): push replaces polling
+            if (pollingInterval) {
+                clearInterval(pollingInterval);
+                pollingInterval = null;
+                loadInbox();
+            }
+        });
+
+        eventSource.addEventListener('message', (e) => {
+            const data = JSON.parse(e.data);
+            loadInbox();
+
+            // Reload current thread if the message belongs to it
+            if (currentThreadUserId &&
+                (data.sender_id === currentThreadUserId || data.receiver_id === currentThreadUserId)) {
+                loadThread(currentThreadUserId);
+            }
+        });
+
+        // EventSource reconnects by itself; poll until it does
+        eventSource.onerror = () => {
+            if (!pollingInterval) {
+                startPolling();
+            }
+            // Refused (e.g. 503 when the server is at its stream limit):
+            // EventSource gives up, so keep polling and try push again later
+            if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+                eventSource = null;
+                setTimeout(() => {
+                    if (!eventSource) {
+                        connectEventStream();
+                    }
+                }, 60000);
+            }
+        };
+
+        return true;
+    }
+
     // Start polling for new messages
     function startPolling() {
         // Poll every 10 seconds
@@ -657,6 +780,9 @@ document.addEventListener('DOMContentLoaded', function() {
         if (pollingInterval) {
             clearInterval(pollingInterval);
         }
+        if (eventSource) {
+            eventSource.close();
+        }
     });
 });
 
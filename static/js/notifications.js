@@ -3,9 +3,11 @@
 
 class NotificationSystem {
     constructor() {
-        this.pollingInterval = 30000; // Poll every 30 seconds
+        this.pollingInterval = 30000; // Poll every 30 seconds (fallback only)
+        this.streamRetryDelay = 60000; // Retry push after the server refused the stream
         this.intervalId = null;
         this.isLoggedIn = false;
+        this.eventSource = null;
     }
 
     // Initialize the notification system
@@ -17,16 +19,52 @@ class NotificationSystem {
             return;
         }
 
-        // Initial fetch
-        this.fetchNotifications();
-
-        // Start polling
-        this.startPolling();
+        // Prefer server push; fall back to polling if unavailable
+        if (!this.connectEventStream()) {
+            this.fetchNotifications();
+            this.startPolling();
+        }
 
         // Setup click handlers
         this.setupClickHandlers();
     }
 
+    // Open the Server-Sent Events stream (authenticated by the session cookie);
+    // returns false if it cannot be used
+    connectEventStream() {
+        if (!window.EventSource) {
+            return false;
+        }
+
+        this.eventSource = new EventSource('/api/events/stream');
+
+        // The server sends fresh counts on connect and after every event
+        this.eventSource.addEventListener('counts', (e) => {
+            this.stopPolling();
+            this.updateNotificationBadges(JSON.parse(e.data));
+        });
+
+        // EventSource reconnects by itself; poll until it does
+        this.eventSource.onerror = () => {
+            if (!this.intervalId) {
+                this.fetchNotifications();
+                this.startPolling();
+            }
+            // Refused (e.g. 503 when the server is at its stream limit):
+            // EventSource gives up, so keep polling and try push again later
+            if (this.eventSource && this.eventSource.readyState === EventSource.CLOSED) {
+                this.eventSource = null;
+                setTimeout(() => {
+                    if (!this.eventSource) {
+                        this.connectEventStream();
+                    }
+                }, this.streamRetryDelay);
+            }
+        };
+
+        return true;
+    }
+
     // Start polling for notifications
     startPolling() {
         if (this.intervalId) {
@@ -168,6 +206,10 @@ class NotificationSystem {
     // Destroy the notification system
     destroy() {
         this.stopPolling();
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
     }
 }
 
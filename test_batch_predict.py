@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for batch scoring of leaf photo folders and zips
+"""
+import csv
+import io
+import os
+import sys
+import tempfile
+import zipfile
+import numpy as np
+from PIL import Image
+from batch_predict import TOO_LARGE_ERROR, count_archive_images, csv_rows, error_row, iter_image_sources, jsonl_rows, score_images
+from inference_engine import InferenceEngine
+
+CLASS_NAMES = [f"Crop___Disease_{i}" for i in range(38)]
+
+def photo_bytes(value, size=(640, 480)):
+    """Solid image whose red channel encodes the expected class"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (value * 6, 0, 0)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def red_runner(batch):
+    """Classifier stand-in: class = red value / 6, second best = class + 1"""
+    out = np.zeros((len(batch), 38), dtype=np.float32)
+    classes = np.rint(batch[:, 0, 0, 0] * 255 / 6).astype(int)
+    out[np.arange(len(batch)), classes] = 0.7
+    out[np.arange(len(batch)), (classes + 1) % 38] = 0.2
+    return out
+
+def test_directory_scoring():
+    """Images are scored in input order, with top-k classes and per-file errors"""
+    print("\n=== Testing Directory Scoring ===")
+    folder = tempfile.mkdtemp()
+    os.makedirs(os.path.join(folder, 'field2'))
+    for i in range(10):
+        with open(os.path.join(folder, 'field2' if i % 2 else '', f'leaf_{i:02d}.png'), 'wb') as f:
+            f.write(photo_bytes(i))
+    with open(os.path.join(folder, 'leaf_03_broken.jpg'), 'wb') as f:
+        f.write(b'not a jpeg')
+    with open(os.path.join(folder, 'notes.txt'), 'w') as f:
+        f.write('ignored')
+
+    engine = InferenceEngine(red_runner, max_batch_size=4)
+    results = list(score_images(iter_image_sources(folder), engine.predict_batch, CLASS_NAMES,
+                                batch_size=4, workers=3, top_k=2))
+
+    assert len(results) == 11, len(results)
+    by_file = {r['file']: r for r in results}
+    assert 'error' in by_file['leaf_03_broken.jpg']
+    for i in range(10):
+        name = os.path.join('field2', f'leaf_{i:02d}.png') if i % 2 else f'leaf_{i:02d}.png'
+        result = by_file[name]
+        assert result['predicted_class'] == CLASS_NAMES[i], result
+        assert [c['class'] for c in result['top_k']] == [CLASS_NAMES[i], CLASS_NAMES[i + 1]]
+        assert result['disease'] == f"Crop - Disease {i}"
+    assert [r['file'] for r in results] == sorted(by_file, key=lambda n: (os.path.dirname(n), n))
+    assert engine.get_stats()['requests'] == 10
+    print(f"✅ {len(results)} files scored, broken file reported")
+    return True
+
+def test_zip_to_csv_and_jsonl():
+    """A zip archive streams to CSV and JSONL lines"""
+    print("\n=== Testing Zip to CSV/JSONL ===")
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for i in range(5):
+            zf.writestr(f'photos/leaf_{i}.png', photo_bytes(i + 20))
+        zf.writestr('__MACOSX/photos/._leaf_0.png', b'junk')
+
+    archive.seek(0)
+    results = list(score_images(iter_image_sources(archive), red_runner, CLASS_NAMES, batch_size=2, workers=2))
+    rows = list(csv.DictReader(io.StringIO(''.join(csv_rows(results)))))
+    assert [row['predicted_class'] for row in rows] == CLASS_NAMES[20:25], rows
+    assert rows[0]['top_k'].startswith('Crop___Disease_20:0.7;'), rows[0]['top_k']
+
+    lines = list(jsonl_rows(results))
+    assert len(lines) == 5 and all(line.endswith('\n') for line in lines)
+    print(f"✅ {len(rows)} CSV rows and {len(lines)} JSONL lines")
+    return True
+
+def test_zip_member_limits():
+    """Oversized members become error rows instead of being inflated into memory"""
+    print("\n=== Testing Zip Member Limits ===")
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('leaf_ok.png', photo_bytes(3, size=(64, 64)))
+        zf.writestr('bomb.png', b'\0' * (5 * 1024 * 1024))  # compresses to a few KB
+    assert count_archive_images(archive) == 2
+
+    archive.seek(0)
+    sources = list(iter_image_sources(archive, max_file_bytes=1024 * 1024))
+    assert sources[1] == ('bomb.png', None), sources[1][0]
+    results = list(score_images(sources, red_runner, CLASS_NAMES, batch_size=2, workers=1))
+    assert results[0]['predicted_class'] == CLASS_NAMES[3]
+    assert results[1] == {'file': 'bomb.png', 'error': TOO_LARGE_ERROR}, results[1]
+
+    assert error_row('Batch stopped early', 'jsonl') == '{"error": "Batch stopped early"}\n'
+    assert error_row('Batch stopped early', 'csv').rstrip('\r\n') == ',,,,,,Batch stopped early'
+    print("✅ Oversized member reported, error rows formatted")
+    return True
+
+def test_bounded_memory():
+    """Only a bounded window of images is read ahead of the results"""
+    print("\n=== Testing Bounded Read-Ahead ===")
+    pulled = [0]
+    data = photo_bytes(1, size=(64, 64))
+
+    def endless_sources():
+        for i in range(300):
+            pulled[0] += 1
+            yield f'img_{i}.png', data
+
+    max_ahead = 0
+    for count, _ in enumerate(score_images(endless_sources(), red_runner, CLASS_NAMES, batch_size=8, workers=2), 1):
+        max_ahead = max(max_ahead, pulled[0] - count)
+    assert count == 300
+    assert max_ahead <= 8 + 2 * 2 + 8, max_ahead
+    print(f"✅ 300 images scored with at most {max_ahead} read ahead")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Batch Predict")
+    print("=" * 60)
+
+    tests = [
+        test_directory_scoring,
+        test_zip_to_csv_and_jsonl,
+        test_zip_member_limits,
+        test_bounded_memory
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
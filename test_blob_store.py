@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed upload store
+"""
+import glob
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from PIL import Image
+from blob_store import BlobStore, THUMBNAIL_EXT
+import blob_store as blob_module
+from database import DatabaseManager
+from image_pipeline import process_image
+
+def photo_bytes(color, size=(1600, 1200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+def blob_files(root):
+    return sorted(glob.glob(os.path.join(root, '??', '??', '*')))
+
+def test_deduplicated_storage():
+    """Identical uploads share one sharded blob; each blob gets a small thumbnail"""
+    print("\n=== Testing Deduplicated Storage ===")
+    root = tempfile.mkdtemp()
+    store = BlobStore(root)
+    first = process_image(photo_bytes((10, 120, 30)))
+    again = process_image(photo_bytes((10, 120, 30)))
+    other = process_image(photo_bytes((200, 60, 30)))
+
+    url = store.put_image(first.image, first.digest)
+    assert store.put_image(again.image, again.digest) == url
+    assert store.put_image(other.image, other.digest) != url
+    assert url == f"/static/uploads/blobs/{first.digest[:2]}/{first.digest[2:4]}/{first.digest}.jpg", url
+
+    files = blob_files(root)
+    assert len(files) == 4, files  # 2 blobs + 2 thumbnails
+    with Image.open(store.path_for(first.digest, THUMBNAIL_EXT)) as thumb:
+        assert max(thumb.size) == 256, thumb.size
+    assert store.thumbnail_url(url) == url[:-4] + THUMBNAIL_EXT
+    assert store.thumbnail_url('/static/uploads/prediction_4_20251017_022253.jpg') is None
+    print(f"✅ 3 uploads -> 2 blobs ({len(files)} files)")
+    return True
+
+def test_garbage_collection():
+    """Unreferenced blobs older than min_age are removed with their thumbnails"""
+    print("\n=== Testing Garbage Collection ===")
+    root = tempfile.mkdtemp()
+    store = BlobStore(root)
+    kept = process_image(photo_bytes((1, 2, 3)))
+    dropped = process_image(photo_bytes((90, 90, 90)))
+    kept_url = store.put_image(kept.image, kept.digest)
+    store.put_image(dropped.image, dropped.digest)
+
+    # Too young to collect
+    assert store.collect_garbage([kept_url], min_age=3600)['removed'] == 0
+
+    old = time.time() - 7200
+    for path in blob_files(root):
+        os.utime(path, (old, old))
+    assert store.collect_garbage([kept_url], min_age=3600, dry_run=True)['removed'] == 1
+    assert len(blob_files(root)) == 4
+
+    stats = store.collect_garbage([kept_url], min_age=3600)
+    assert stats['removed'] == 1 and stats['bytes_freed'] > 0, stats
+    assert [os.path.basename(p).split('.')[0] for p in blob_files(root)] == [kept.digest] * 2
+    print(f"✅ Removed {stats['removed']} unreferenced blob ({stats['bytes_freed']} bytes)")
+    return True
+
+def test_import_legacy_uploads():
+    """Timestamped uploads move into the store and predictions point at the blobs"""
+    print("\n=== Testing Legacy Import ===")
+    workdir = tempfile.mkdtemp()
+    uploads = os.path.join(workdir, 'uploads')
+    os.makedirs(uploads)
+    data = photo_bytes((5, 150, 5), size=(320, 240))
+    for name in ('prediction_4_20251017_022253.jpg', 'prediction_4_20251017_022353.jpg'):
+        with open(os.path.join(uploads, name), 'wb') as f:
+            f.write(data)
+
+    db = DatabaseManager(os.path.join(workdir, 'test.db'))
+    user_id = db.create_user('Legacy', 'legacy@example.com', '9000000001', 'secret', 'Mysuru')
+    for name in ('prediction_4_20251017_022253.jpg', 'prediction_4_20251017_022353.jpg'):
+        db.save_prediction(user_id, 'Tomato - Early blight', 0.9, '10%', '', '', '', '', '',
+                           image_path=f'/static/uploads/{name}')
+
+    original_store = blob_module.blob_store
+    blob_module.blob_store = BlobStore(os.path.join(workdir, 'blobs'))
+    try:
+        stats = blob_module.import_legacy_uploads(db, uploads_dir=uploads)
+    finally:
+        blob_module.blob_store = original_store
+
+    assert stats == {'files': 2, 'blobs': 1, 'rows_updated': 2}, stats
+    paths = {p['image_path'] for p in db.get_user_predictions(user_id)}
+    assert len(paths) == 1 and paths.pop().startswith('/static/uploads/blobs/')
+    assert not glob.glob(os.path.join(uploads, 'prediction_*.jpg'))
+    shutil.rmtree(workdir)
+    print("✅ 2 legacy files -> 1 blob, 2 predictions updated")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Blob Store")
+    print("=" * 60)
+
+    tests = [
+        test_deduplicated_storage,
+        test_garbage_collection,
+        test_import_legacy_uploads
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
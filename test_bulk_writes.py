@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for DatabaseManager bulk-write methods
+"""
+import sys
+from db_test_utils import make_db as make_test_db, service_module
+
+def make_db():
+    """Create a migrated DatabaseManager on a throwaway database file"""
+    db = make_test_db('bulk_test.db')
+    user_id = db.get_user_by_email('demo@raithamitra.com')['id']
+    return db, user_id
+
+def test_save_farm_activities_bulk():
+    """Bulk activities are saved with ids in input order"""
+    print("\n=== Testing save_farm_activities_bulk ===")
+    db, user_id = make_db()
+
+    activities = [
+        {'user_id': user_id, 'activity_type': 'irrigation', 'crop_type': 'rice',
+         'scheduled_date': f'2025-06-0{day}', 'description': f'Task {day}', 'ai_generated': True}
+        for day in range(1, 8)
+    ]
+    ids = db.save_farm_activities_bulk(activities)
+
+    assert len(ids) == 7, f"Expected 7 ids, got {ids}"
+    schedule = db.get_farm_schedule(user_id, '2025-06-01', '2025-06-07')
+    by_id = {row['id']: row for row in schedule}
+    for activity_id, activity in zip(ids, activities):
+        assert by_id[activity_id]['description'] == activity['description']
+
+    assert db.save_farm_activities_bulk([]) == []
+    print(f"✅ Saved activities {ids}")
+    return True
+
+def test_save_expenses_bulk():
+    """Bulk expenses are saved with ids in input order"""
+    print("\n=== Testing save_expenses_bulk ===")
+    db, user_id = make_db()
+
+    single_id = db.save_expense(user_id, 'seeds', 500, '2025-06-01')
+    ids = db.save_expenses_bulk([
+        {'user_id': user_id, 'category': 'fertilizer', 'amount': 800, 'expense_date': '2025-06-02'},
+        {'user_id': user_id, 'category': 'labor', 'amount': 1200, 'expense_date': '2025-06-03',
+         'description': 'Planting', 'crop_related': 'rice'}
+    ])
+
+    assert ids == [single_id + 1, single_id + 2], f"Unexpected ids {ids}"
+    expenses = {row['id']: row for row in db.get_expenses(user_id)}
+    assert expenses[ids[1]]['category'] == 'labor'
+    assert expenses[ids[1]]['crop_related'] == 'rice'
+    print(f"✅ Saved expenses {ids}")
+    return True
+
+def test_default_schedule_uses_bulk():
+    """farm_service default schedule is written in one batch"""
+    print("\n=== Testing farm_service default schedule ===")
+    db, user_id = make_db()
+    # farm_service opens raitha_mitra.db at import; bind it to the test database instead
+    with service_module('farm_service', db) as farm_service:
+        schedule = farm_service.generate_default_schedule(user_id, 'tomato', 'vegetative')
+
+    saved = db.get_farm_schedule(user_id)
+    assert len(schedule) == 7
+    assert len(saved) == 7, f"Expected 7 saved tasks, got {len(saved)}"
+    print("✅ Default schedule saved as one batch")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Bulk Writes")
+    print("=" * 60)
+
+    tests = [
+        test_save_farm_activities_bulk,
+        test_save_expenses_bulk,
+        test_default_schedule_uses_bulk
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
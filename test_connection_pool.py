@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Test script for pooled DatabaseManager connections
+"""
+import sys
+import threading
+from db_pool import ConnectionPool, DatabaseMaintenance, apply_storage_profile, validate_pragma
+from db_test_utils import make_db as make_test_db, temp_db_path
+
+def make_db(**kwargs):
+    """Create an unmigrated DatabaseManager on a throwaway database file"""
+    return make_test_db('pool_test.db', migrate=False, **kwargs)
+
+def test_connection_reuse():
+    """Connections are reused instead of reopened"""
+    print("\n=== Testing Connection Reuse ===")
+    db = make_db(use_pool=True, pool_size=2)
+    created = db.pool.get_stats()['created']
+
+    for _ in range(20):
+        db.get_user_by_email('demo@raithamitra.com')
+
+    stats = db.pool.get_stats()
+    assert stats['created'] == created, f"Expected no new connections, got {stats}"
+    assert stats['in_use'] == 0, f"Connection leaked: {stats}"
+    print(f"✅ 20 lookups reused pooled connections: {stats}")
+    return True
+
+def test_nested_checkout():
+    """Nested get_connection() on one thread shares the connection"""
+    print("\n=== Testing Nested Checkout ===")
+    db = make_db(use_pool=True, pool_size=1)
+
+    outer = db.get_connection()
+    inner = db.get_connection()
+    assert outer._conn is inner._conn, "Nested checkout should reuse the thread's connection"
+    inner.close()
+    outer.execute('SELECT 1')  # still usable after inner release
+    outer.close()
+
+    assert db.pool.get_stats()['in_use'] == 0
+    print("✅ Nested checkout shares one connection")
+    return True
+
+def test_context_manager():
+    """connection() commits on success and rolls back on error"""
+    print("\n=== Testing Context Manager ===")
+    db = make_db(use_pool=True)
+
+    with db.connection() as conn:
+        conn.execute('CREATE TABLE kv (k TEXT PRIMARY KEY, v TEXT)')
+        conn.execute("INSERT INTO kv VALUES ('a', '1')")
+
+    try:
+        with db.connection() as conn:
+            conn.execute("INSERT INTO kv VALUES ('b', '2')")
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+
+    with db.connection() as conn:
+        keys = [row['k'] for row in conn.execute('SELECT k FROM kv')]
+
+    assert keys == ['a'], f"Expected only committed row, got {keys}"
+    print("✅ Commit and rollback behave as expected")
+    return True
+
+def test_get_connection_as_context_manager():
+    """with db.get_connection() commits and releases the checkout"""
+    print("\n=== Testing get_connection() Context Manager ===")
+    db = make_db(use_pool=True, pool_size=1)
+
+    with db.get_connection() as conn:
+        conn.execute('CREATE TABLE kv (k TEXT PRIMARY KEY, v TEXT)')
+        conn.execute("INSERT INTO kv VALUES ('a', '1')")
+
+    assert db.pool.get_stats()['in_use'] == 0, "Checkout not released by the with block"
+
+    # pool_size=1: this would time out if the first checkout had leaked
+    with db.get_connection() as conn:
+        rows = conn.execute('SELECT k FROM kv').fetchall()
+    assert [row['k'] for row in rows] == ['a'], "Insert was not committed"
+    print("✅ with-block commits and returns the connection to the pool")
+    return True
+
+def test_invalid_pragma_rejected():
+    """PRAGMA values are validated before being formatted into SQL"""
+    print("\n=== Testing PRAGMA Validation ===")
+    assert validate_pragma('journal_mode', 'wal') == 'WAL'
+    assert validate_pragma('cache_size', '-8000') == '-8000'
+    for name, value in [('journal_mode', 'WAL; DROP TABLE users'), ('busy_timeout', '5000 --'), ('foo', '1')]:
+        try:
+            validate_pragma(name, value)
+        except ValueError:
+            continue
+        raise AssertionError(f"{name}={value!r} should be rejected")
+
+    db = make_db(use_pool=True)
+    with db.connection() as conn:
+        apply_storage_profile(conn, {'synchronous': 'FULL; PRAGMA foreign_keys=ON'})
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1, "Invalid value must not be applied"
+    print("✅ Invalid PRAGMA values skipped")
+    return True
+
+def test_threads_share_pool():
+    """Concurrent threads stay within the pool size"""
+    print("\n=== Testing Threaded Access ===")
+    db = make_db(use_pool=True, pool_size=3)
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(25):
+                db.get_user_by_email('demo@raithamitra.com')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = db.pool.get_stats()
+    assert not errors, f"Worker errors: {errors}"
+    assert stats['created'] <= 3, f"Pool exceeded its size: {stats}"
+    print(f"✅ 8 threads served by {stats['created']} connections")
+    return True
+
+def test_health_check_discards_dead_connection():
+    """A closed idle connection is replaced on checkout"""
+    print("\n=== Testing Health Check ===")
+    path = temp_db_path('health.db')
+    pool = ConnectionPool(path, pool_size=1, health_check_interval=0)
+
+    conn = pool.get_connection()
+    raw = conn._conn
+    conn.close()
+    raw.close()  # simulate a connection that died while idle
+
+    conn = pool.get_connection()
+    assert conn._conn is not raw, "Dead connection should not be handed out"
+    conn.execute('SELECT 1')
+    conn.close()
+
+    assert pool.get_stats()['discarded'] == 1
+    print("✅ Dead idle connection discarded")
+    return True
+
+def test_leaked_checkout_reclaimed():
+    """Unclosed checkouts are reclaimed by release_thread() or when their thread exits"""
+    print("\n=== Testing Leak Reclaim ===")
+    path = temp_db_path('leak.db')
+    pool = ConnectionPool(path, pool_size=1, timeout=2)
+
+    pool.get_connection()
+    pool.get_connection()  # nested, also never closed
+    assert pool.release_thread(), "Leaked checkout should be reclaimed"
+    outer = pool.get_connection()
+    assert outer.outermost, "Nesting depth leaked into the next checkout"
+    outer.close()
+
+    worker = threading.Thread(target=pool.get_connection)
+    worker.start()
+    worker.join()
+    # pool_size=1: this would time out if the dead thread still held the slot
+    pool.get_connection().close()
+
+    stats = pool.get_stats()
+    assert stats['leaked'] == 2 and stats['in_use'] == 0, f"Unexpected stats: {stats}"
+    print("✅ Leaked checkouts reclaimed")
+    return True
+
+def test_pool_disabled():
+    """use_pool=False keeps plain sqlite3 connections"""
+    print("\n=== Testing Pool Disabled ===")
+    db = make_db(use_pool=False)
+    assert db.pool is None
+    assert db.get_user_by_email('demo@raithamitra.com') is not None
+    print("✅ Unpooled mode still works")
+    return True
+
+def test_storage_profile_applied():
+    """New connections get the WAL storage profile"""
+    print("\n=== Testing Storage Profile ===")
+    db = make_db(use_pool=True)
+
+    with db.connection() as conn:
+        journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        synchronous = conn.execute('PRAGMA synchronous').fetchone()[0]
+        temp_store = conn.execute('PRAGMA temp_store').fetchone()[0]
+        busy_timeout = conn.execute('PRAGMA busy_timeout').fetchone()[0]
+
+    assert journal_mode == 'wal', f"Expected WAL, got {journal_mode}"
+    assert synchronous == 1, f"Expected synchronous=NORMAL (1), got {synchronous}"
+    assert temp_store == 2, f"Expected temp_store=MEMORY (2), got {temp_store}"
+    assert busy_timeout == 5000, f"Expected busy_timeout=5000, got {busy_timeout}"
+    print("✅ WAL profile applied")
+    return True
+
+def test_maintenance_checkpoint():
+    """Maintenance pass checkpoints the WAL"""
+    print("\n=== Testing Maintenance ===")
+    db = make_db(use_pool=True)
+
+    with db.connection() as conn:
+        conn.execute('CREATE TABLE log (id INTEGER PRIMARY KEY, msg TEXT)')
+        conn.executemany('INSERT INTO log (msg) VALUES (?)', [(f'row {i}',) for i in range(500)])
+
+    result = DatabaseMaintenance(db.db_path).run_once()
+    assert result['busy'] == 0, f"Checkpoint was blocked: {result}"
+    assert result['checkpointed_frames'] == result['wal_frames'], f"WAL not fully checkpointed: {result}"
+    print(f"✅ Checkpointed {result['checkpointed_frames']} WAL frames")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Connection Pool")
+    print("=" * 60)
+
+    tests = [
+        test_connection_reuse,
+        test_nested_checkout,
+        test_context_manager,
+        test_get_connection_as_context_manager,
+        test_invalid_pragma_rejected,
+        test_threads_share_pool,
+        test_health_check_discards_dead_connection,
+        test_leaked_checkout_reclaimed,
+        test_pool_disabled,
+        test_storage_profile_applied,
+        test_maintenance_checkpoint
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for concurrent prediction enrichment
+"""
+import sys
+import time
+from enrichment import EnrichmentCall, EnrichmentExecutor
+
+def slow(value, seconds):
+    time.sleep(seconds)
+    return value
+
+def test_concurrent_fan_out():
+    """Calls run at the same time: total latency is the slowest call, not the sum"""
+    print("\n=== Testing Concurrent Fan-Out ===")
+    executor = EnrichmentExecutor(max_workers=8)
+    calls = {
+        'details': EnrichmentCall(slow, ('treatment', 0.4), 5, lambda: 'default treatment'),
+        'market_prices': EnrichmentCall(slow, ('prices', 0.4), 5, lambda: 'default prices'),
+        'disease': EnrichmentCall(slow, ('ರೋಗ', 0.3), 5, lambda: 'disease'),
+        'yield_impact': EnrichmentCall(slow, ('ಇಳುವರಿ', 0.3), 5, lambda: 'yield')
+    }
+    start = time.monotonic()
+    results, fallbacks = executor.fan_out(calls, deadline=5)
+    elapsed = time.monotonic() - start
+
+    assert results == {'details': 'treatment', 'market_prices': 'prices', 'disease': 'ರೋಗ', 'yield_impact': 'ಇಳುವರಿ'}, results
+    assert fallbacks == []
+    assert elapsed < 0.8, f"{elapsed:.2f}s - calls ran one after another"
+    print(f"✅ 4 calls (1.4s sequential) finished in {elapsed:.2f}s")
+    return True
+
+def test_timeouts_and_partial_results():
+    """Slow or failing calls get their fallback; finished calls are kept"""
+    print("\n=== Testing Timeouts and Partial Results ===")
+    executor = EnrichmentExecutor(max_workers=8)
+
+    def broken():
+        raise RuntimeError('quota exceeded')
+
+    calls = {
+        'details': EnrichmentCall(slow, ('treatment', 0.1), 5, lambda: 'default treatment'),
+        'market_prices': EnrichmentCall(slow, ('prices', 3), 5, lambda: 'default prices'),  # misses the deadline
+        'disease': EnrichmentCall(slow, ('ರೋಗ', 3), 0.2, lambda: 'disease'),  # misses its own timeout
+        'yield_impact': EnrichmentCall(broken, (), 5, lambda: 'yield')
+    }
+    start = time.monotonic()
+    results, fallbacks = executor.fan_out(calls, deadline=0.5)
+    elapsed = time.monotonic() - start
+
+    assert results == {'details': 'treatment', 'market_prices': 'default prices', 'disease': 'disease', 'yield_impact': 'yield'}, results
+    assert sorted(fallbacks) == ['disease', 'market_prices', 'yield_impact'], fallbacks
+    assert elapsed < 0.8, f"{elapsed:.2f}s - deadline not applied"
+    stats = executor.get_stats()
+    assert stats['timeouts'] == 2 and stats['errors'] == 1, stats
+    print(f"✅ Partial results after {elapsed:.2f}s with {len(fallbacks)} fallbacks")
+    return True
+
+def test_bounded_pool():
+    """Calls queued behind a full pool still respect the deadline"""
+    print("\n=== Testing Bounded Pool ===")
+    executor = EnrichmentExecutor(max_workers=2)
+
+    def broken_fallback():
+        raise KeyError('no default')
+
+    calls = {
+        'first': EnrichmentCall(slow, ('a', 0.3), 5, lambda: 'default a'),
+        'second': EnrichmentCall(slow, ('b', 0.3), 5, lambda: 'default b'),
+        'queued': EnrichmentCall(slow, ('c', 0.3), 5, lambda: 'default c'),
+        'no_fallback': EnrichmentCall(slow, ('d', 0.3), 5, broken_fallback)
+    }
+    results, fallbacks = executor.fan_out(calls, deadline=0.45)
+    assert results == {'first': 'a', 'second': 'b', 'queued': 'default c', 'no_fallback': None}, results
+    assert fallbacks == ['queued', 'no_fallback'], fallbacks
+    print("✅ 2 workers: 2 calls finished, 2 queued calls fell back")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Enrichment")
+    print("=" * 60)
+
+    tests = [
+        test_concurrent_fan_out,
+        test_timeouts_and_partial_results,
+        test_bounded_pool
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
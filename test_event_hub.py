@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script for the event hub (SSE push channel)
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from database import DatabaseManager
+from migrate_database import migrate_database
+from event_hub import EventHub, event_hub, format_sse
+
+def test_memory_publish_subscribe():
+    """Events reach only the subscribed user's queues"""
+    print("\n=== Testing In-Process Hub ===")
+    hub = EventHub(broker='memory')
+    alice = hub.subscribe(1)
+    alice_tab2 = hub.subscribe(1)
+    bob = hub.subscribe(2)
+
+    hub.publish(1, 'message', {'message_id': 7})
+
+    assert alice.get(timeout=1) == {'type': 'message', 'data': {'message_id': 7}}
+    assert alice_tab2.get(timeout=1)['type'] == 'message'
+    assert bob.get(timeout=0.1) is None
+
+    hub.unsubscribe(alice)
+    hub.unsubscribe(alice_tab2)
+    hub.unsubscribe(bob)
+    assert hub.get_stats()['subscriptions'] == 0
+    print("✅ Events routed per user")
+    return True
+
+def test_sqlite_broker_across_workers():
+    """An event published by one worker reaches a subscriber on another"""
+    print("\n=== Testing SQLite Broker ===")
+    path = os.path.join(tempfile.mkdtemp(), 'events.db')
+    worker_a = EventHub(broker='sqlite', broker_path=path, poll_interval=0.05)
+    worker_b = EventHub(broker='sqlite', broker_path=path, poll_interval=0.05)
+
+    subscription = worker_b.subscribe(5)
+    time.sleep(0.2)  # let the poller record its starting position
+
+    start = time.time()
+    worker_a.publish(5, 'friend_request', {'request_id': 3})
+    event = subscription.get(timeout=2)
+    elapsed = time.time() - start
+    worker_b.unsubscribe(subscription)
+
+    assert event == {'type': 'friend_request', 'data': {'request_id': 3}}, f"Unexpected event {event}"
+    assert elapsed < 1, f"Delivery took {elapsed:.2f}s"
+    print(f"✅ Cross-worker delivery in {elapsed * 1000:.0f}ms")
+    return True
+
+def test_subscription_cap_and_poller_restart():
+    """Streams past max_subscriptions are refused; a restarted poller skips old events"""
+    print("\n=== Testing Stream Cap and Poller Restart ===")
+    path = os.path.join(tempfile.mkdtemp(), 'events.db')
+    hub = EventHub(broker='sqlite', broker_path=path, poll_interval=0.05, max_subscriptions=2)
+
+    first = hub.subscribe(1)
+    second = hub.subscribe(2)
+    assert hub.subscribe(3) is None, "Third stream should be refused"
+    assert hub.get_stats()['rejected'] == 1
+    hub.unsubscribe(first)
+    hub.unsubscribe(second)
+    time.sleep(0.2)  # poller exits once nobody is subscribed
+
+    hub.publish(1, 'message', {'message_id': 'stale'})
+    subscription = hub.subscribe(1)
+    time.sleep(0.2)
+    hub.publish(1, 'message', {'message_id': 'fresh'})
+    event = subscription.get(timeout=2)
+    extra = subscription.get(timeout=0.2)
+    hub.unsubscribe(subscription)
+
+    assert event['data'] == {'message_id': 'fresh'}, f"Stale event replayed: {event}"
+    assert extra is None, f"Unexpected extra event {extra}"
+    print("✅ Cap enforced and no stale replay after restart")
+    return True
+
+def test_database_publishes_events():
+    """send_message and friend request methods publish to both parties"""
+    print("\n=== Testing DatabaseManager Events ===")
+    path = os.path.join(tempfile.mkdtemp(), 'events_db.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = DatabaseManager(path)
+        migrate_database(path)
+    with db.connection() as conn:
+        conn.executemany('''
+            INSERT INTO users (name, email, mobile, password_hash) VALUES (?, ?, ?, 'x')
+        ''', [('Asha', 'asha@example.com', '9200000001'), ('Ravi', 'ravi@example.com', '9200000002')])
+        asha, ravi = [row['id'] for row in conn.execute("SELECT id FROM users WHERE email != 'demo@raithamitra.com' ORDER BY id")]
+
+    asha_sub = event_hub.subscribe(asha)
+    ravi_sub = event_hub.subscribe(ravi)
+    try:
+        message_id = db.send_message(asha, ravi, 'Hello Ravi')
+        assert ravi_sub.get(timeout=1)['data']['message_id'] == message_id
+        assert asha_sub.get(timeout=1)['type'] == 'message'
+
+        request_id = db.send_friend_request(asha, ravi)
+        assert ravi_sub.get(timeout=1) == {
+            'type': 'friend_request', 'data': {'request_id': request_id, 'requester_id': asha}
+        }
+
+        db.accept_friend_request(request_id)
+        assert asha_sub.get(timeout=1)['type'] == 'friend_request_accepted'
+        assert ravi_sub.get(timeout=1)['type'] == 'friend_request_accepted'
+    finally:
+        event_hub.unsubscribe(asha_sub)
+        event_hub.unsubscribe(ravi_sub)
+
+    assert format_sse({'type': 'counts', 'data': {'unread_messages': 1}}) == \
+        'event: counts\ndata: {"unread_messages": 1}\n\n'
+    print("✅ Messaging and friend events published")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Event Hub")
+    print("=" * 60)
+
+    tests = [
+        test_memory_publish_subscribe,
+        test_sqlite_broker_across_workers,
+        test_subscription_cap_and_poller_restart,
+        test_database_publishes_events
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-decode image pipeline
+"""
+import base64
+import io
+import os
+import sys
+import tempfile
+import numpy as np
+from PIL import Image
+import image_pipeline
+from image_pipeline import decode_base64_image, process_image
+
+def jpeg_bytes(size, color=(40, 160, 60), mode='RGB', fmt='JPEG'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, color if mode == 'RGB' else color[0]).save(buffer, fmt)
+    return buffer.getvalue()
+
+def test_tensor_and_stored_copy():
+    """A large JPEG yields a model tensor and a downscaled stored copy"""
+    print("\n=== Testing Tensor and Stored Copy ===")
+    upload = process_image(jpeg_bytes((4000, 3000)), stored_max_side=1280)
+
+    assert upload.tensor.shape == (1, 128, 128, 3), upload.tensor.shape
+    assert upload.tensor.dtype == np.float32
+    assert 0.0 <= upload.tensor.min() and upload.tensor.max() <= 1.0
+    assert abs(upload.tensor[0, 64, 64, 1] - 160 / 255.0) < 0.03
+    assert upload.source_size == (4000, 3000) and upload.source_format == 'JPEG'
+    assert max(upload.image.size) == 1280, upload.image.size
+
+    path = os.path.join(tempfile.mkdtemp(), 'upload.jpg')
+    upload.save(path)
+    with Image.open(path) as saved:
+        assert saved.format == 'JPEG' and saved.size == upload.image.size
+    print(f"✅ 4000x3000 JPEG -> tensor {upload.tensor.shape}, stored {upload.image.size}")
+    return True
+
+def test_non_jpeg_and_data_url():
+    """PNG/greyscale uploads are converted to RGB; data: URL prefixes are stripped"""
+    print("\n=== Testing PNG and Data URL ===")
+    png = jpeg_bytes((300, 200), mode='L', fmt='PNG')
+    data_url = 'data:image/png;base64,' + base64.b64encode(png).decode()
+
+    upload = process_image(decode_base64_image(data_url))
+    assert upload.image.mode == 'RGB' and upload.image.size == (300, 200)
+    assert upload.tensor.shape == (1, 128, 128, 3)
+    assert decode_base64_image(base64.b64encode(png).decode()) == png
+    print("✅ PNG data URL decoded")
+    return True
+
+def test_rejects_bad_input():
+    """Invalid base64, non-images and oversized images raise ValueError"""
+    print("\n=== Testing Bad Input ===")
+    original = image_pipeline.MAX_INPUT_PIXELS
+    image_pipeline.MAX_INPUT_PIXELS = 1000 * 1000
+    try:
+        for bad in (lambda: decode_base64_image('data:image/jpeg;base64,abcde'),
+                    lambda: process_image(b'not an image'),
+                    lambda: process_image(jpeg_bytes((1200, 1000)))):
+            try:
+                bad()
+                return False
+            except ValueError:
+                pass
+    finally:
+        image_pipeline.MAX_INPUT_PIXELS = original
+    print("✅ Bad input rejected with ValueError")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Image Pipeline")
+    print("=" * 60)
+
+    tests = [
+        test_tensor_and_stored_copy,
+        test_non_jpeg_and_data_url,
+        test_rejects_bad_input
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the set-based inbox query
+"""
+import sys
+import time
+from db_test_utils import make_db as make_test_db
+
+def make_db():
+    """Create a migrated DatabaseManager on a throwaway database file"""
+    return make_test_db('inbox_test.db')
+
+def create_users(db, count):
+    """Bulk-create farmers directly (password hashing is too slow for hundreds)"""
+    with db.connection() as conn:
+        conn.executemany('''
+            INSERT INTO users (name, email, mobile, password_hash, location)
+            VALUES (?, ?, ?, 'x', ?)
+        ''', [(f'Farmer {i}', f'farmer{i}@example.com', f'90000{i:05d}', f'Village {i}')
+              for i in range(count)])
+        return [row['id'] for row in conn.execute("SELECT id FROM users WHERE email LIKE 'farmer%' ORDER BY id")]
+
+def test_inbox_contents():
+    """Inbox rows carry the other user's details and unread counts"""
+    print("\n=== Testing Inbox Contents ===")
+    db = make_db()
+    me, alice, bob = create_users(db, 3)
+
+    db.send_message(alice, me, 'Hello from Alice')
+    db.send_message(alice, me, 'Are you there?')
+    db.send_message(me, bob, 'Hi Bob')
+    db.send_message(bob, me, 'Hi back')
+    db.send_message(me, bob, 'How are the crops?')
+
+    inbox = db.get_inbox_conversations(me)
+    by_user = {conv['other_user_id']: conv for conv in inbox}
+
+    assert len(inbox) == 2, f"Expected 2 conversations, got {inbox}"
+    assert by_user[alice]['unread_count'] == 2
+    assert by_user[alice]['other_user_name'] == 'Farmer 1'
+    assert by_user[alice]['other_user_location'] == 'Village 1'
+    assert by_user[alice]['last_message'] == 'Are you there?'
+    assert by_user[bob]['unread_count'] == 1
+    assert by_user[bob]['last_message'] == 'How are the crops?'
+    assert by_user[bob]['last_sender_id'] == me
+    print("✅ Conversations, names and unread counts are correct")
+    return True
+
+def test_constant_query_count():
+    """Inbox cost is one statement regardless of conversation count"""
+    print("\n=== Testing Query Count ===")
+    db = make_db()
+    user_ids = create_users(db, 301)
+    me, others = user_ids[0], user_ids[1:]
+
+    with db.connection() as conn:
+        conn.executemany(
+            'INSERT INTO messages (sender_id, receiver_id, message_text) VALUES (?, ?, ?)',
+            [(other, me, f'Message {i}') for i, other in enumerate(others)]
+        )
+
+    statements = []
+    conn = db.get_connection()  # nested calls on this thread reuse it
+    conn.set_trace_callback(statements.append)
+    start = time.perf_counter()
+    inbox = db.get_inbox_conversations(me, limit=500)
+    elapsed = (time.perf_counter() - start) * 1000
+    conn.set_trace_callback(None)
+    conn.close()
+
+    selects = [sql for sql in statements if 'SELECT' in sql.upper()]
+    assert len(inbox) == 300, f"Expected 300 conversations, got {len(inbox)}"
+    assert len(selects) == 1, f"Expected 1 query, got {len(selects)}"
+    print(f"✅ 300 conversations in 1 query ({elapsed:.1f}ms)")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Inbox Query")
+    print("=" * 60)
+
+    tests = [
+        test_inbox_contents,
+        test_constant_query_count
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
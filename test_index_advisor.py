@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for the index advisor
+"""
+import sqlite3
+import sys
+from index_advisor import analyze, build_scratch_database, extract_statements
+
+def test_extracts_sql_from_modules():
+    """Literal and f-string SQL passed to execute() is found with its function"""
+    print("\n=== Testing SQL Extraction ===")
+    statements = extract_statements('database.py')
+    functions = {function for _, function, _, _ in statements}
+
+    assert 'get_friends' in functions
+    assert 'get_user_predictions' in functions, "f-string queries should be extracted"
+    assert all('\n' not in sql for _, _, _, sql in statements), "SQL should be whitespace-normalized"
+    print(f"✅ Extracted {len(statements)} statements from database.py")
+    return True
+
+def test_application_sql_has_no_scans():
+    """Every statement in the code seeks an index on the migrated schema"""
+    print("\n=== Testing Application Query Plans ===")
+    report = analyze()
+
+    assert report['planned'] > 50, f"Only planned {report['planned']} statements"
+    assert not report['scans'], f"Unexpected scans: {[(f, d) for _, f, _, d, _ in report['scans']]}"
+    print(f"✅ {report['planned']} statements planned, no unexpected scans")
+    return True
+
+def test_missing_index_is_reported():
+    """Dropping an index makes the advisor report the scan it caused"""
+    print("\n=== Testing Scan Detection ===")
+    path = build_scratch_database()
+    conn = sqlite3.connect(path)
+    conn.execute('DROP INDEX idx_friend_requests_recipient')
+    conn.execute('DROP INDEX idx_yield_user_date')
+    conn.commit()
+    conn.close()
+
+    scanned = {function for _, function, _, _, _ in analyze(path)['scans']}
+    assert scanned == {'get_friend_requests', 'get_yield_predictions'}, f"Unexpected findings {scanned}"
+    print("✅ Missing indexes reported as scans")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Index Advisor")
+    print("=" * 60)
+
+    tests = [
+        test_extracts_sql_from_modules,
+        test_application_sql_has_no_scans,
+        test_missing_index_is_reported
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
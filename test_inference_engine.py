@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test script for the micro-batching inference engine
+"""
+import contextlib
+import io
+import sys
+import threading
+import time
+import numpy as np
+from inference_engine import InferenceEngine, InterpreterPool, TFLiteRunner
+
+class RecordingRunner:
+    """Classifier stand-in: class index = the image's fill value; records batch sizes"""
+
+    def __init__(self, classes=38, delay=0.0):
+        self.classes = classes
+        self.delay = delay
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append(len(batch))
+        time.sleep(self.delay)
+        out = np.zeros((len(batch), self.classes), dtype=np.float32)
+        out[np.arange(len(batch)), batch[:, 0, 0, 0].astype(int)] = 1.0
+        return out
+
+class FakeInterpreter:
+    """Minimal TFLite interpreter double with an optionally fixed batch dimension"""
+
+    def __init__(self, resizable=True, delay=0.0):
+        self.resizable = resizable
+        self.delay = delay
+        self.busy = False
+        self.shape = [1, 128, 128, 3]
+        self.input = None
+        self.invokes = 0
+
+    def get_input_details(self):
+        return [{'index': 0, 'shape': np.array(self.shape)}]
+
+    def get_output_details(self):
+        return [{'index': 1}]
+
+    def resize_tensor_input(self, index, shape):
+        if not self.resizable and shape[0] != 1:
+            raise RuntimeError('batch dimension is fixed')
+        self.shape = list(shape)
+
+    def allocate_tensors(self):
+        pass
+
+    def set_tensor(self, index, value):
+        assert list(value.shape) == self.shape, f"{value.shape} != {self.shape}"
+        self.input = value
+
+    def invoke(self):
+        assert not self.busy, "Interpreter used by two threads at once"
+        self.busy = True
+        time.sleep(self.delay)
+        self.invokes += 1
+        self.busy = False
+
+    def get_tensor(self, index):
+        return self.input.reshape(len(self.input), -1)[:, :2]
+
+def image(value):
+    return np.full((1, 128, 128, 3), value, dtype=np.float32)
+
+def test_concurrent_requests_are_batched():
+    """Concurrent callers share batches and each gets its own result back"""
+    print("\n=== Testing Batching and Scatter ===")
+    runner = RecordingRunner(delay=0.01)
+    engine = InferenceEngine(runner, max_batch_size=8, max_wait_ms=20)
+
+    results = {}
+    def call(i):
+        results[i] = int(np.argmax(engine.predict(image(i))[0]))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(24)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.shutdown()
+
+    assert results == {i: i for i in range(24)}, "Results were scattered to the wrong callers"
+    assert max(runner.batches) <= 8 and sum(runner.batches) == 24
+    assert len(runner.batches) < 24, f"Expected batching, got {runner.batches}"
+    print(f"✅ 24 requests in {len(runner.batches)} batches: {runner.batches}")
+    return True
+
+def test_single_request_not_delayed():
+    """A lone request is dispatched after max_wait_ms, not held for a full batch"""
+    print("\n=== Testing Max Wait ===")
+    engine = InferenceEngine(RecordingRunner(), max_batch_size=32, max_wait_ms=10)
+    start = time.time()
+    prediction = engine.predict(image(5)[0])
+    elapsed = time.time() - start
+    engine.shutdown()
+
+    assert prediction.shape == (1, 38) and np.argmax(prediction[0]) == 5
+    assert elapsed < 0.5, f"Lone request took {elapsed:.2f}s"
+    print(f"✅ Lone request answered in {elapsed * 1000:.0f}ms")
+    return True
+
+def test_errors_reach_callers():
+    """A failing batch raises in every caller and the engine keeps serving"""
+    print("\n=== Testing Error Propagation ===")
+    calls = []
+    def flaky(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError('model exploded')
+        return np.ones((len(batch), 38), dtype=np.float32)
+
+    engine = InferenceEngine(flaky, max_batch_size=4, max_wait_ms=1)
+    try:
+        engine.predict(image(0))
+        return False
+    except RuntimeError as e:
+        assert 'exploded' in str(e)
+    assert engine.predict(image(0)).shape == (1, 38)
+    assert engine.get_stats()['errors'] == 1
+    engine.shutdown()
+    print("✅ Errors propagated, engine still serving")
+    return True
+
+def test_tflite_runner_resizes_batch():
+    """The TFLite runner resizes to the batch, or invokes per image if it cannot"""
+    print("\n=== Testing TFLite Runner ===")
+    batch = np.stack([image(i)[0] for i in range(3)])
+
+    interpreter = FakeInterpreter()
+    out = TFLiteRunner(interpreter)(batch)
+    assert out.shape == (3, 2) and interpreter.invokes == 1
+
+    fixed = FakeInterpreter(resizable=False)
+    with_fallback = TFLiteRunner(fixed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = with_fallback(batch)
+    assert out.shape == (3, 2) and fixed.invokes == 3
+    assert out[2, 0] == 2.0
+    print("✅ Batched invoke, per-image fallback for fixed-batch models")
+    return True
+
+def test_interpreter_pool_runs_batches_in_parallel():
+    """Each engine worker gets its own interpreter and pool waits are measured"""
+    print("\n=== Testing Interpreter Pool ===")
+    pool = InterpreterPool(lambda: FakeInterpreter(delay=0.02), size=3)
+    engine = InferenceEngine(pool, max_batch_size=2, max_wait_ms=1, workers=3)
+
+    threads = [threading.Thread(target=engine.predict, args=(image(i),)) for i in range(18)]
+    start = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+    stats = engine.get_stats()
+    engine.shutdown()
+
+    assert stats['requests'] == 18 and stats['errors'] == 0, stats
+    assert stats['pool']['acquisitions'] == stats['batches'] and stats['pool']['idle'] == 3
+    assert elapsed < stats['batches'] * 0.02, f"Batches ran serially ({elapsed:.2f}s)"
+
+    unbatched = InferenceEngine(InterpreterPool(lambda: FakeInterpreter(delay=0.02), size=2),
+                                batching=False, workers=2)
+    threads = [threading.Thread(target=unbatched.predict, args=(image(i),)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    waits = unbatched.get_stats()['pool']
+    assert waits['acquisitions'] == 6 and waits['max_wait_ms'] > 0, waits
+    print(f"✅ {stats['batches']} batches on 3 interpreters in {elapsed * 1000:.0f}ms, "
+          f"unbatched max wait {waits['max_wait_ms']:.1f}ms")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Inference Engine")
+    print("=" * 60)
+
+    tests = [
+        test_concurrent_requests_are_batched,
+        test_single_request_not_delayed,
+        test_errors_reach_callers,
+        test_tflite_runner_resizes_batch,
+        test_interpreter_pool_runs_batches_in_parallel
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for the process-pool inference server
+"""
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from inference_engine import InferenceEngine
+from inference_server import InferenceServer, RemoteInferenceClient
+
+def argmax_runner(batch):
+    """Classifier stand-in: class index = the image's fill value"""
+    out = np.zeros((len(batch), 38), dtype=np.float32)
+    out[np.arange(len(batch)), batch[:, 0, 0, 0].astype(int)] = 1.0
+    return out
+
+def build_engine():
+    """Runs inside each worker process, like inference_server.load_engine"""
+    return InferenceEngine(argmax_runner, max_batch_size=4, max_wait_ms=2)
+
+def start_server(workers=2, authkey=None):
+    address = os.path.join(tempfile.mkdtemp(), 'inference.sock')
+    server = InferenceServer(address, workers=workers, authkey=authkey, engine_factory=build_engine)
+    server.start()
+    threading.Thread(target=server.supervise, args=(0.1,), daemon=True).start()
+    return server
+
+def image(value):
+    return np.full((1, 128, 128, 3), value, dtype=np.float32)
+
+def test_remote_predictions():
+    """Concurrent web threads get their own results from the worker processes"""
+    print("\n=== Testing Remote Predictions ===")
+    server = start_server(workers=2)
+    client = RemoteInferenceClient(server.address, timeout=10)
+    try:
+        results = {}
+        def call(i):
+            results[i] = int(np.argmax(client.predict(image(i))[0]))
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results == {i: i for i in range(20)}, results
+        stats = client.get_stats()
+        assert stats['pid'] in [p.pid for p in server.processes.values()], stats
+    finally:
+        server.stop()
+    print("✅ 20 concurrent predictions served by worker processes")
+    return True
+
+def test_worker_restart():
+    """A crashed worker is restarted and clients reconnect transparently"""
+    print("\n=== Testing Worker Restart ===")
+    server = start_server(workers=1)
+    client = RemoteInferenceClient(server.address, timeout=10)
+    try:
+        first_pid = client.get_stats()['pid']
+        os.kill(first_pid, signal.SIGKILL)
+
+        deadline = time.time() + 10
+        while server.processes[0].pid == first_pid and time.time() < deadline:
+            time.sleep(0.05)
+
+        assert int(np.argmax(client.predict(image(7))[0])) == 7
+        assert client.get_stats()['pid'] != first_pid
+    finally:
+        server.stop()
+    print("✅ Worker restarted and client reconnected")
+    return True
+
+def test_errors_and_auth():
+    """Server-side errors surface in the client; the authkey is enforced"""
+    print("\n=== Testing Errors and Auth ===")
+    server = start_server(workers=1, authkey=b'secret')
+    try:
+        mode = os.stat(server.address).st_mode & 0o777
+        assert mode == 0o600, f"Socket should be owner-only, got {oct(mode)}"
+        client = RemoteInferenceClient(server.address, authkey=b'secret', timeout=10)
+        try:
+            client.predict(np.zeros((2, 128, 128, 3)))  # a batch is not one image
+            return False
+        except RuntimeError as e:
+            assert 'one image' in str(e)
+
+        intruder = RemoteInferenceClient(server.address, authkey=b'wrong', timeout=2, connect_timeout=1)
+        try:
+            intruder.predict(image(1))
+            return False
+        except Exception:
+            pass
+        assert int(np.argmax(client.predict(image(3))[0])) == 3
+    finally:
+        server.stop()
+    assert not os.path.exists(server.address), "Socket should be removed on stop"
+    print("✅ Errors propagated and wrong authkey rejected")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Inference Server")
+    print("=" * 60)
+
+    tests = [
+        test_remote_predictions,
+        test_worker_restart,
+        test_errors_and_auth
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
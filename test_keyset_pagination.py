@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for keyset (cursor) pagination
+"""
+import sys
+from database import decode_page_token, encode_page_token, next_page_token
+from db_test_utils import make_db as make_test_db
+
+def make_db():
+    """Create a migrated DatabaseManager with two farmers on a throwaway file"""
+    db = make_test_db('pagination_test.db')
+    with db.connection() as conn:
+        conn.executemany('''
+            INSERT INTO users (name, email, mobile, password_hash) VALUES (?, ?, ?, 'x')
+        ''', [('Asha', 'asha@example.com', '9300000001'), ('Ravi', 'ravi@example.com', '9300000002')])
+        asha, ravi = [row['id'] for row in conn.execute("SELECT id FROM users WHERE email != 'demo@raithamitra.com' ORDER BY id")]
+    return db, asha, ravi
+
+def walk_pages(fetch, limit):
+    """Follow next-page tokens until the last page, returning all pages"""
+    pages, token = [], None
+    while True:
+        page = fetch(limit, token)
+        pages.append(page)
+        token = next_page_token(page, limit)
+        if not token:
+            return pages
+
+def test_page_token_round_trip():
+    """Tokens are opaque and decode back to the keyset position"""
+    print("\n=== Testing Page Tokens ===")
+    token = encode_page_token('2025-06-01 10:00:00', 42)
+    assert '2025' not in token
+    assert decode_page_token(token) == ('2025-06-01 10:00:00', 42)
+    try:
+        decode_page_token('not-a-token')
+        return False
+    except ValueError:
+        pass
+    print("✅ Tokens round-trip and reject garbage")
+    return True
+
+def test_conversation_pages():
+    """Conversation pages cover every message exactly once, despite timestamp ties"""
+    print("\n=== Testing Conversation Pages ===")
+    db, asha, ravi = make_db()
+
+    # All rows share a created_at second, so ordering relies on the id tie-breaker
+    with db.connection() as conn:
+        conn.executemany(
+            "INSERT INTO messages (sender_id, receiver_id, message_text, created_at) VALUES (?, ?, ?, '2025-06-01 10:00:00')",
+            [(asha, ravi, f'm{i}') if i % 2 else (ravi, asha, f'm{i}') for i in range(250)]
+        )
+
+    pages = walk_pages(lambda limit, token: db.get_conversation(asha, ravi, limit, token), 40)
+    ids = [msg['id'] for page in pages for msg in page]
+
+    assert len(ids) == 250 and len(set(ids)) == 250, f"Got {len(ids)} ids, {len(set(ids))} unique"
+    assert all(page == sorted(page, key=lambda m: m['id']) for page in pages), "Each page should be oldest first"
+    assert pages[0][-1]['message_text'] == 'm249', "First page should end with the newest message"
+    assert len(db.get_conversation(asha, ravi)) == 250, "No limit keeps the old behaviour"
+    print(f"✅ 250 messages in {len(pages)} pages")
+    return True
+
+def test_history_pages():
+    """Chat, prediction and activity history paginate without gaps"""
+    print("\n=== Testing History Pages ===")
+    db, asha, _ = make_db()
+
+    db.save_chat_messages_bulk([{'user_id': asha, 'message': f'q{i}', 'response': 'a'} for i in range(55)])
+    db.save_predictions_bulk([
+        {'user_id': asha, 'disease_name': 'Rice___Blast', 'confidence': 90.0, 'yield_impact': 'Medium',
+         'symptoms': '', 'organic_treatment': '', 'chemical_treatment': '', 'prevention_tips': '',
+         'market_prices': ''} for _ in range(23)
+    ])
+    db.save_farm_activities_bulk([
+        {'user_id': asha, 'activity_type': 'irrigation', 'crop_type': 'rice',
+         'scheduled_date': '2025-06-01'} for _ in range(31)
+    ])
+
+    for name, fetch, total in [
+        ('chat', lambda limit, token: db.get_chat_history(asha, limit, token), 55),
+        ('predictions', lambda limit, token: db.get_user_predictions(asha, limit, token), 23),
+        ('activities', lambda limit, token: db.get_activity_history(asha, limit, token), 31),
+    ]:
+        pages = walk_pages(fetch, 10)
+        ids = [row['id'] for page in pages for row in page]
+        assert len(ids) == total and len(set(ids)) == total, f"{name}: {len(ids)} rows, {len(set(ids))} unique"
+        print(f"  ✅ {name}: {total} rows in {len(pages)} pages")
+    return True
+
+def test_pages_use_indexes():
+    """Page queries seek an index instead of scanning or sorting the table"""
+    print("\n=== Testing Query Plans ===")
+    db, asha, ravi = make_db()
+    token = encode_page_token('2025-06-01 10:00:00', 100)
+
+    plans = []
+    conn = db.get_connection()
+    conn.set_trace_callback(lambda sql: plans.append(sql) if 'SELECT' in sql and 'EXPLAIN' not in sql else None)
+    db.get_conversation(asha, ravi, 50, token)
+    db.get_user_predictions(asha, 20, token)
+    conn.set_trace_callback(None)
+
+    for sql in plans:
+        detail = ' '.join(row['detail'] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql))
+        assert 'SCAN messages' not in detail and 'SCAN predictions' not in detail, detail
+    conn.close()
+    print("✅ Page queries use index seeks")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Keyset Pagination")
+    print("=" * 60)
+
+    tests = [
+        test_page_token_round_trip,
+        test_conversation_pages,
+        test_history_pages,
+        test_pages_use_indexes
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
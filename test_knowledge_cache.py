@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the treatment/market knowledge cache
+"""
+import os
+import sys
+import tempfile
+import time
+from knowledge_cache import KnowledgeCache
+
+DETAILS = {
+    'symptoms': '• ಎಲೆಗಳ ಮೇಲೆ ಕಂದು ಚುಕ್ಕೆಗಳು',
+    'organic_treatment': '• Neem oil spray',
+    'chemical_treatment': '• Mancozeb 2g/L',
+    'prevention_tips': '• Crop rotation'
+}
+
+def temp_db():
+    return os.path.join(tempfile.mkdtemp(), 'knowledge.db')
+
+def test_two_tier_lookup():
+    """Entries are served from memory, then from SQLite in a new process"""
+    print("\n=== Testing Two-Tier Lookup ===")
+    db_path = temp_db()
+    cache = KnowledgeCache(db_path)
+    assert cache.get('treatment', 'Tomato - Early blight', 'kn', 1) is None
+    cache.put('treatment', 'Tomato - Early blight', 'kn', 1, DETAILS)
+    assert cache.get('treatment', 'Tomato - Early blight', 'kn', 1) == DETAILS
+    assert cache.get('treatment', 'Tomato - Early blight', 'hi', 1) is None
+
+    restarted = KnowledgeCache(db_path)
+    assert restarted.get('treatment', 'Tomato - Early blight', 'kn', 1) == DETAILS
+    assert restarted.get('treatment', 'Tomato - Early blight', 'kn', 1) == DETAILS
+    stats = restarted.get_stats()['treatment']
+    assert stats['disk_hits'] == 1 and stats['memory_hits'] == 1 and stats['hit_rate'] == 1.0, stats
+    print(f"✅ Memory and disk hits: {stats}")
+    return True
+
+def test_ttl_per_kind():
+    """Market prices expire much sooner than treatment details"""
+    print("\n=== Testing TTL per Kind ===")
+    cache = KnowledgeCache(temp_db(), ttls={'treatment': 3600, 'market': 0.2})
+    cache.put('treatment', 'Potato - Late blight', 'en', 1, DETAILS)
+    cache.put('market', 'Potato', 'en', 1, '• Bengaluru: ₹15-25/kg')
+    assert cache.get('market', 'Potato', 'en', 1) == '• Bengaluru: ₹15-25/kg'
+    time.sleep(0.3)
+    assert cache.get('market', 'Potato', 'en', 1) is None
+    assert cache.get('treatment', 'Potato - Late blight', 'en', 1) == DETAILS
+
+    stats = cache.get_stats()
+    assert stats['market']['hit_rate'] == 0.5 and stats['treatment']['hit_rate'] == 1.0, stats
+    print("✅ Market entry expired, treatment entry kept")
+    return True
+
+def test_versioned_invalidation():
+    """A new prompt version misses old entries; invalidate() removes them"""
+    print("\n=== Testing Versioned Invalidation ===")
+    db_path = temp_db()
+    cache = KnowledgeCache(db_path)
+    for disease in ('Apple - Black rot', 'Corn - Common rust'):
+        cache.put('treatment', disease, 'en', 1, DETAILS)
+    cache.put('treatment', 'Apple - Black rot', 'en', 2, {'symptoms': 'new prompt'})
+    cache.put('market', 'Apple', 'en', 1, 'prices')
+
+    assert cache.get('treatment', 'Corn - Common rust', 'en', 2) is None
+    assert cache.invalidate('treatment', keep_version=2) == 2
+    assert cache.get('treatment', 'Apple - Black rot', 'en', 1) is None
+    assert cache.get('treatment', 'Apple - Black rot', 'en', 2) == {'symptoms': 'new prompt'}
+    assert cache.get('market', 'Apple', 'en', 1) == 'prices'
+
+    assert cache.invalidate('market', subject='Apple') == 1
+    assert KnowledgeCache(db_path).get('market', 'Apple', 'en', 1) is None
+    print("✅ Old prompt versions and single subjects invalidated")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Knowledge Cache")
+    print("=" * 60)
+
+    tests = [
+        test_two_tier_lookup,
+        test_ttl_per_kind,
+        test_versioned_invalidation
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared LLM client
+"""
+import sys
+import threading
+import time
+from google.api_core import exceptions as google_exceptions
+from llm_client import CALLER_LIMITS, DEFAULT_CALLER_LIMIT, LLMClient, LLMTimeout
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel: sleeps for the number in the prompt"""
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, request_options=None):
+        if prompt == 'deadline':
+            raise google_exceptions.DeadlineExceeded('Deadline Exceeded')
+        if prompt == 'bad request':
+            raise ValueError('prompt timed out of patience')  # not a timeout, despite the text
+        with self.lock:
+            self.calls.append(request_options)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(float(prompt.split()[-1]))
+            return FakeResponse(f"answer to {prompt}")
+        finally:
+            with self.lock:
+                self.active -= 1
+
+def client_with(model, **kwargs):
+    client = LLMClient(**kwargs)
+    client.configure(None, model=model)
+    return client
+
+def test_generate():
+    """All callers share one model; the request carries the timeout"""
+    print("\n=== Testing Generate ===")
+    model = FakeModel()
+    client = client_with(model, timeout=5)
+    assert client.generate("sleep 0", caller='chat') == "answer to sleep 0"
+    assert client.generate("sleep 0", caller='treatment', timeout=2) == "answer to sleep 0"
+    assert model.calls[0]['timeout'] <= 5 and model.calls[1]['timeout'] <= 2, model.calls
+
+    unconfigured = LLMClient()
+    assert not unconfigured.available
+    try:
+        unconfigured.generate("sleep 0")
+        return False
+    except RuntimeError:
+        pass
+    print(f"✅ {len(model.calls)} calls through one shared model")
+    return True
+
+def test_timeout():
+    """A slow call raises LLMTimeout (a TimeoutError) near its timeout"""
+    print("\n=== Testing Timeout ===")
+    client = client_with(FakeModel())
+    start = time.monotonic()
+    try:
+        client.generate("sleep 3", timeout=0.2)
+        return False
+    except TimeoutError as e:
+        assert isinstance(e, LLMTimeout)
+    elapsed = time.monotonic() - start
+    assert elapsed < 1.5, elapsed
+    assert client.get_stats()['timeouts'] == 1
+    print(f"✅ Timed out after {elapsed:.2f}s")
+    return True
+
+def test_sdk_errors_classified_by_type():
+    """SDK deadline errors become LLMTimeout; other errors pass through by type, not text"""
+    print("\n=== Testing SDK Error Types ===")
+    client = client_with(FakeModel())
+    try:
+        client.generate("deadline")
+        return False
+    except LLMTimeout as e:
+        assert isinstance(e.__cause__, google_exceptions.DeadlineExceeded)
+    try:
+        client.generate("bad request")
+        return False
+    except LLMTimeout:
+        return False
+    except ValueError:
+        pass
+    stats = client.get_stats()
+    assert stats['timeouts'] == 1 and stats['errors'] == 1, stats
+    print(f"✅ Errors classified by type: {stats}")
+    return True
+
+def test_pool_sized_to_caller_limits():
+    """Calls within their caller limit never queue for a worker"""
+    print("\n=== Testing Pool Sizing ===")
+    client = LLMClient()
+    expected = sum(CALLER_LIMITS.values()) + DEFAULT_CALLER_LIMIT
+    assert client.executor._max_workers == expected, client.executor._max_workers
+
+    # A saturated (undersized) pool reports busy, not a timed-out call
+    model = FakeModel()
+    small = client_with(model, max_workers=1)
+    blocker = threading.Thread(target=small.generate, args=("sleep 0.5",), kwargs={'caller': 'farm'})
+    blocker.start()
+    time.sleep(0.05)
+    try:
+        small.generate("sleep 0", caller='chat', timeout=0.1)
+        return False
+    except LLMTimeout:
+        pass
+    blocker.join()
+    stats = small.get_stats()
+    assert stats['busy'] == 1 and stats['timeouts'] == 0, stats
+    print(f"✅ Pool of {expected} workers; queued call counted as busy")
+    return True
+
+def test_concurrency_limits():
+    """Per-caller limits stop one caller from using the whole pool"""
+    print("\n=== Testing Concurrency Limits ===")
+    model = FakeModel()
+    client = client_with(model, max_workers=3, caller_limits={'chat': 1})
+    outcomes = []
+
+    def ask(caller, prompt, timeout):
+        try:
+            outcomes.append((caller, client.generate(prompt, caller=caller, timeout=timeout)))
+        except LLMTimeout:
+            outcomes.append((caller, 'busy'))
+
+    threads = [threading.Thread(target=ask, args=('chat', 'sleep 0.5', 0.2))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads += [threading.Thread(target=ask, args=('chat', 'sleep 0', 0.2)),
+                threading.Thread(target=ask, args=('treatment', 'sleep 0.1', 2))]
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert ('chat', 'busy') in outcomes, outcomes
+    assert ('treatment', 'answer to sleep 0.1') in outcomes, outcomes
+    assert model.peak <= 3 and client.get_stats()['busy'] == 1, client.get_stats()
+    print(f"✅ Second chat call refused while treatment ran: {outcomes}")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing LLM Client")
+    print("=" * 60)
+
+    tests = [
+        test_generate,
+        test_timeout,
+        test_sdk_errors_classified_by_type,
+        test_pool_sized_to_caller_limits,
+        test_concurrency_limits
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for inference backend selection
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import types
+from model_backend import load_inference_engine, resolve_interpreter
+
+class FakeInterpreter:
+    """Stands in for ai_edge_litert.interpreter.Interpreter"""
+
+def test_prefers_lightweight_runtime():
+    """LiteRT is chosen over TensorFlow when installed, and backends can be forced"""
+    print("\n=== Testing Backend Resolution ===")
+    package = types.ModuleType('ai_edge_litert')
+    module = types.ModuleType('ai_edge_litert.interpreter')
+    module.Interpreter = FakeInterpreter
+    package.interpreter = module
+    sys.modules['ai_edge_litert'] = package
+    sys.modules['ai_edge_litert.interpreter'] = module
+    try:
+        assert resolve_interpreter('auto') == ('litert', FakeInterpreter)
+        assert resolve_interpreter('litert') == ('litert', FakeInterpreter)
+    finally:
+        del sys.modules['ai_edge_litert']
+        del sys.modules['ai_edge_litert.interpreter']
+
+    for bad in ('litert', 'onnx'):
+        try:
+            resolve_interpreter(bad)
+            return False
+        except ImportError:
+            pass
+    print("✅ LiteRT preferred, unknown or missing backends rejected")
+    return True
+
+def test_tensorflow_only_when_requested():
+    """An installed TensorFlow is never picked by 'auto', only by name"""
+    print("\n=== Testing TensorFlow Opt-in ===")
+    if 'tensorflow' in sys.modules:
+        print("⏭️  Real TensorFlow already imported, skipping")
+        return True
+    tensorflow = types.ModuleType('tensorflow')
+    tensorflow.lite = types.SimpleNamespace(Interpreter=FakeInterpreter)
+    sys.modules['tensorflow'] = tensorflow
+    try:
+        assert resolve_interpreter('tensorflow') == ('tensorflow', FakeInterpreter)
+        try:
+            resolve_interpreter('auto')
+            return False
+        except ImportError:
+            pass
+    finally:
+        del sys.modules['tensorflow']
+    print("✅ TensorFlow used only when INFERENCE_BACKEND=tensorflow")
+    return True
+
+def test_missing_model_files():
+    """No model files means no engine and no TensorFlow import"""
+    print("\n=== Testing Missing Model ===")
+    folder = tempfile.mkdtemp()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine, model_type = load_inference_engine(os.path.join(folder, 'm.tflite'), os.path.join(folder, 'm.h5'))
+    assert engine is None and model_type == 'None'
+    assert 'tensorflow' not in sys.modules, "TensorFlow must not be imported when there is nothing to load"
+    print("✅ Missing model handled without importing TensorFlow")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Model Backend")
+    print("=" * 60)
+
+    tests = [
+        test_prefers_lightweight_runtime,
+        test_tensorflow_only_when_requested,
+        test_missing_model_files
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
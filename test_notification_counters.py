@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test script for maintained notification counters
+"""
+import contextlib
+import io
+import sys
+import threading
+from database import DatabaseManager
+from db_test_utils import make_db as make_test_db
+
+def make_db():
+    """Create a migrated DatabaseManager on a throwaway database file"""
+    return make_test_db('counters_test.db')
+
+def create_users(db, count):
+    """Create farmers directly (password hashing is not needed here)"""
+    with db.connection() as conn:
+        conn.executemany('''
+            INSERT INTO users (name, email, mobile, password_hash, location)
+            VALUES (?, ?, ?, 'x', 'Mysuru')
+        ''', [(f'Farmer {i}', f'farmer{i}@example.com', f'91000{i:05d}') for i in range(count)])
+        return [row['id'] for row in conn.execute("SELECT id FROM users WHERE email LIKE 'farmer%' ORDER BY id")]
+
+def test_message_counters():
+    """send_message and mark_message_read keep unread_messages in step"""
+    print("\n=== Testing Unread Message Counter ===")
+    db = make_db()
+    me, alice, bob = create_users(db, 3)
+
+    first = db.send_message(alice, me, 'Hello')
+    db.send_message(bob, me, 'Namaskara')
+    db.send_message(me, alice, 'Hi Alice')
+    assert db.get_notification_counts(me)['unread_messages'] == 2
+    assert db.get_notification_counts(alice)['unread_messages'] == 1
+
+    db.mark_message_read(first)
+    db.mark_message_read(first)  # marking twice must not double-count
+    assert db.get_notification_counts(me)['unread_messages'] == 1
+    print("✅ Unread message counter maintained")
+    return True
+
+def test_friend_request_counters():
+    """Friend request send/accept/decline keep pending_friend_requests in step"""
+    print("\n=== Testing Friend Request Counter ===")
+    db = make_db()
+    me, alice, bob = create_users(db, 3)
+
+    from_alice = db.send_friend_request(alice, me)
+    from_bob = db.send_friend_request(bob, me)
+    assert db.get_notification_counts(me)['pending_friend_requests'] == 2
+
+    db.accept_friend_request(from_alice)
+    assert db.get_notification_counts(me)['pending_friend_requests'] == 1
+
+    db.decline_friend_request(from_bob)
+    db.decline_friend_request(from_bob)  # already declined, no change
+    assert db.get_notification_counts(me)['pending_friend_requests'] == 0
+    print("✅ Pending friend request counter maintained")
+    return True
+
+def test_concurrent_updates_count_once():
+    """Racing mark-read / accept calls decrement each counter only once"""
+    print("\n=== Testing Concurrent Counter Updates ===")
+    db = make_db()
+    me, alice = create_users(db, 2)
+    message_id = db.send_message(alice, me, 'Hello')
+    request_id = db.send_friend_request(alice, me)
+
+    def race(fn, arg):
+        threads = [threading.Thread(target=fn, args=(arg,)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    race(db.mark_message_read, message_id)
+    race(db.accept_friend_request, request_id)
+
+    counts = db.get_notification_counts(me)
+    assert counts['unread_messages'] == 0, f"Unread counter drifted: {counts}"
+    assert counts['pending_friend_requests'] == 0, f"Pending counter drifted: {counts}"
+    print("✅ Concurrent updates decrement once")
+    return True
+
+def test_backfill_matches_source():
+    """Counters created on an existing database are backfilled"""
+    print("\n=== Testing Backfill ===")
+    db = make_db()
+    me, alice = create_users(db, 2)
+    db.send_message(alice, me, 'Hello')
+    db.send_friend_request(alice, me)
+
+    # Simulate a database migrated before counters existed
+    with db.connection() as conn:
+        conn.execute('DROP TABLE notification_counters')
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = DatabaseManager(db.db_path)
+
+    counts = db.get_notification_counts(me)
+    assert counts == {'unread_messages': 1, 'pending_friend_requests': 1}, f"Unexpected counts {counts}"
+    assert db.get_notification_counts(999999) == {'unread_messages': 0, 'pending_friend_requests': 0}
+    print("✅ Counters backfilled from existing rows")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Notification Counters")
+    print("=" * 60)
+
+    tests = [
+        test_message_counters,
+        test_friend_request_counters,
+        test_concurrent_updates_count_once,
+        test_backfill_matches_source
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test script for the prediction result cache
+"""
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from PIL import Image
+from image_pipeline import process_image
+from prediction_cache import PredictionCache, perceptual_hash
+
+def leaf_photo(quality=90, size=(800, 600)):
+    """A JPEG with some structure, so its dHash is not all zeros"""
+    rng = np.random.default_rng(1)
+    base = Image.fromarray(rng.integers(0, 255, (6, 8, 3), dtype=np.uint8)).resize(size, Image.BICUBIC)
+    buffer = io.BytesIO()
+    base.save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+def new_cache(**kwargs):
+    return PredictionCache(db_path=os.path.join(tempfile.mkdtemp(), 'cache.db'), **kwargs)
+
+def test_exact_hits_and_persistence():
+    """Hits by content hash + language; the SQLite tier survives a new instance"""
+    print("\n=== Testing Exact Hits and Persistence ===")
+    cache = new_cache()
+    upload = process_image(leaf_photo())
+    payload = {'disease': 'Tomato - Early blight', 'confidence': 0.93}
+
+    assert cache.get(upload.digest, 'en') is None
+    cache.put(upload.digest, 'en', 'Tomato___Early_blight', 0.93, payload)
+    assert cache.get(upload.digest, 'en') == payload
+    assert cache.get(upload.digest, 'kn') is None, "Language is part of the key"
+    assert cache.get_classification(upload.digest) == ('Tomato___Early_blight', 0.93)
+
+    restarted = PredictionCache(db_path=cache.db_path)
+    assert restarted.get(upload.digest, 'en') == payload
+    stats = restarted.get_stats()
+    assert stats['disk_hits'] == 1 and stats['memory_entries'] == 1, stats
+    assert cache.get_stats()['memory_hits'] == 1
+    print("✅ Exact hits served from memory and SQLite")
+    return True
+
+def test_near_duplicates():
+    """Near-duplicate matching is off by default; opted in, a re-encoded copy hits"""
+    print("\n=== Testing Near Duplicates ===")
+    original = process_image(leaf_photo(quality=90))
+    reencoded = process_image(leaf_photo(quality=60, size=(640, 480)))
+    assert original.digest != reencoded.digest
+    distance = (perceptual_hash(original.image) ^ perceptual_hash(reencoded.image)).bit_count()
+    assert distance <= 4, distance
+
+    cache = new_cache(max_distance=4)
+    cache.put(original.digest, 'en', 'Potato___Late_blight', 0.8, {'disease': 'late'},
+              phash=perceptual_hash(original.image))
+    assert cache.get(reencoded.digest, 'en', perceptual_hash(reencoded.image)) == {'disease': 'late'}
+    assert cache.get_stats()['near_duplicate_hits'] + cache.get_stats()['disk_hits'] == 1
+
+    strict = new_cache()
+    assert not strict.near_duplicates_enabled, "Near-duplicate matching must be opt-in"
+    strict.put(original.digest, 'en', 'Potato___Late_blight', 0.8, {'disease': 'late'},
+               phash=perceptual_hash(original.image))
+    assert strict.get(reencoded.digest, 'en', perceptual_hash(reencoded.image)) is None
+    print(f"✅ Re-encoded photo matched (dHash distance {distance})")
+    return True
+
+def test_lru_and_ttl():
+    """The memory tier evicts least recently used entries; expired entries miss"""
+    print("\n=== Testing LRU Eviction and TTL ===")
+    cache = new_cache(max_entries=2)
+    for key in ('a', 'b'):
+        cache.put(key, 'en', 'Corn___healthy', 0.9, {'key': key})
+    cache.get('a', 'en')
+    cache.put('c', 'en', 'Corn___healthy', 0.9, {'key': 'c'})
+    assert list(cache.memory) == [('a', 'en'), ('c', 'en')], list(cache.memory)
+
+    short = new_cache(ttl=1)
+    short.put('x', 'en', 'Corn___healthy', 0.9, {'key': 'x'})
+    short.memory[('x', 'en')]['created_at'] -= 5
+    conn = short._connection()
+    conn.execute('UPDATE prediction_cache SET created_at = ?', (time.time() - 5,))
+    conn.commit()
+    assert short.get('x', 'en') is None
+    print("✅ LRU eviction and expiry work")
+    return True
+
+def test_memory_hits_not_blocked_by_disk():
+    """A write stuck on the SQLite lock does not hold up memory hits"""
+    print("\n=== Testing Lock Scope ===")
+    cache = new_cache()
+    cache.put('a', 'en', 'Corn___healthy', 0.9, {'key': 'a'})
+
+    blocker = sqlite3.connect(cache.db_path)
+    blocker.execute('BEGIN EXCLUSIVE')
+    writer = threading.Thread(target=cache.put, args=('b', 'en', 'Corn___healthy', 0.9, {'key': 'b'}))
+    writer.start()
+    time.sleep(0.2)  # the writer is now waiting for the database lock
+
+    start = time.perf_counter()
+    assert cache.get('a', 'en') == {'key': 'a'}
+    elapsed = time.perf_counter() - start
+    blocker.rollback()
+    writer.join()
+    blocker.close()
+
+    assert elapsed < 0.1, f"Memory hit waited {elapsed:.2f}s behind a disk write"
+    assert cache.get('b', 'en') == {'key': 'b'}
+    print(f"✅ Memory hit served in {elapsed * 1000:.1f}ms while a write waited")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Prediction Cache")
+    print("=" * 60)
+
+    tests = [
+        test_exact_hits_and_persistence,
+        test_near_duplicates,
+        test_lru_and_ttl,
+        test_memory_hits_not_blocked_by_disk
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
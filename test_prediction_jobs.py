@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for async prediction jobs (/api/predict/jobs/<id>)
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from prediction_jobs import JobStore
+
+def temp_db():
+    return os.path.join(tempfile.mkdtemp(), 'jobs.db')
+
+def test_job_lifecycle():
+    """A job starts pending with its partial result and ends done with the full one"""
+    print("\n=== Testing Job Lifecycle ===")
+    store = JobStore(temp_db(), max_workers=2)
+    release = threading.Event()
+
+    def enrich(disease, language):
+        release.wait(5)
+        return {'disease': disease, 'language': language, 'details': {'symptoms': 'Spots'}}
+
+    job_id = store.submit(enrich, 'Tomato - Early blight', 'kn', initial={'disease': 'Tomato - Early blight', 'details': None})
+    job = store.get(job_id)
+    assert job['status'] in ('pending', 'running'), job
+    assert job['result'] == {'disease': 'Tomato - Early blight', 'details': None}, job
+
+    # wait() returns at the timeout while the job is still running
+    assert store.wait(job_id, timeout=0.3)['status'] in ('pending', 'running')
+    release.set()
+    job = store.wait(job_id, timeout=5)
+    assert job['status'] == 'done', job
+    assert job['result']['details'] == {'symptoms': 'Spots'} and job['error'] is None
+    assert store.get('missing') is None
+    assert store.get_stats() == {'submitted': 1, 'completed': 1, 'failed': 0, 'running': 0}
+    print(f"✅ Job {job_id[:8]} finished in {job['elapsed']}s")
+    return True
+
+def test_job_error():
+    """An exception in the job is recorded as an error status"""
+    print("\n=== Testing Job Error ===")
+    store = JobStore(temp_db())
+
+    def broken():
+        raise RuntimeError('Gemini unavailable')
+
+    job = store.wait(store.submit(broken), timeout=5)
+    assert job['status'] == 'error' and job['error'] == 'Gemini unavailable', job
+    assert store.get_stats()['failed'] == 1
+    print("✅ Failure recorded")
+    return True
+
+def test_shared_and_stale_jobs():
+    """Another worker reads jobs from the same database; lost jobs time out as errors"""
+    print("\n=== Testing Shared and Stale Jobs ===")
+    db_path = temp_db()
+    worker_a = JobStore(db_path, stale_after=60)
+    worker_b = JobStore(db_path, stale_after=60)
+
+    job_id = worker_a.submit(lambda: {'disease': 'Potato - Late blight'})
+    job = worker_b.wait(job_id, timeout=5)
+    assert job['status'] == 'done' and job['result'] == {'disease': 'Potato - Late blight'}, job
+
+    # A job whose worker died stays pending in the database
+    lost_id = worker_a.submit(time.sleep, 1)
+    old = time.time() - 120
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE prediction_jobs SET status = 'pending', updated_at = ? WHERE job_id = ?", (old, lost_id))
+    conn.commit()
+    job = worker_b.get(lost_id)
+    assert job['status'] == 'error' and 'interrupted' in job['error'], job
+
+    # Finished jobs past their ttl are pruned
+    worker_a.wait(lost_id, timeout=5)
+    conn.execute("UPDATE prediction_jobs SET updated_at = ?", (time.time() - 7200,))
+    conn.commit()
+    conn.close()
+    worker_b.prune()
+    assert worker_a.get(job_id) is None
+    print("✅ Jobs shared across workers; stale and expired jobs handled")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Prediction Jobs")
+    print("=" * 60)
+
+    tests = [
+        test_job_lifecycle,
+        test_job_error,
+        test_shared_and_stale_jobs
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
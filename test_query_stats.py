@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for query instrumentation
+"""
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+from flask import Flask, g
+from database import DatabaseManager
+from query_stats import InstrumentedConnection, QueryStats, normalize_sql, query_stats
+
+def test_normalize_sql():
+    """Statements differing only in literals and whitespace group together"""
+    print("\n=== Testing SQL Normalization ===")
+    assert normalize_sql("SELECT * FROM users\n   WHERE id = 5") == normalize_sql("SELECT * FROM users WHERE id = 12")
+    assert normalize_sql("SELECT * FROM users WHERE name = 'Asha'") == "SELECT * FROM users WHERE name = ?"
+    assert normalize_sql("SELECT * FROM users WHERE id IN (?, ?, ?)") == "SELECT * FROM users WHERE id IN (...)"
+    assert normalize_sql("SELECT user1_id FROM friendships") == "SELECT user1_id FROM friendships"
+    print("✅ Statements normalized")
+    return True
+
+def test_database_statements_recorded():
+    """DatabaseManager queries are counted with their row counts"""
+    print("\n=== Testing Statement Recording ===")
+    path = os.path.join(tempfile.mkdtemp(), 'query_stats_test.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = DatabaseManager(path)
+    query_stats.reset()
+
+    db.save_predictions_bulk([
+        {'user_id': 1, 'disease_name': 'Rice___Blast', 'confidence': 90.0, 'yield_impact': 'Medium',
+         'symptoms': '', 'organic_treatment': '', 'chemical_treatment': '', 'prevention_tips': '',
+         'market_prices': ''} for _ in range(7)
+    ])
+    for _ in range(3):
+        db.get_user_predictions(1, 5)
+    db.get_user_by_id(1)  # fetchone, then close
+
+    statements = {s['sql']: s for s in query_stats.get_stats()['statements']}
+    history = next(s for sql, s in statements.items() if sql.startswith('SELECT * FROM predictions'))
+    insert = next(s for sql, s in statements.items() if sql.startswith('INSERT INTO predictions'))
+    assert history['count'] == 3 and history['avg_rows'] == 5, history
+    assert insert['avg_rows'] == 7, insert
+    assert any('FROM users' in sql for sql in statements), "fetchone statements should be recorded on close"
+    assert history['p95_ms'] >= history['p50_ms'] >= 0
+    print(f"✅ {len(statements)} distinct statements recorded")
+    return True
+
+def test_slow_query_log():
+    """Statements over the threshold are appended to the slow-query log"""
+    print("\n=== Testing Slow Query Log ===")
+    log_path = os.path.join(tempfile.mkdtemp(), 'slow.log')
+    stats = QueryStats(slow_query_ms=0, slow_log_path=log_path)
+    conn = InstrumentedConnection(sqlite3.connect(':memory:'), stats)
+    conn.execute('SELECT 1').fetchall()
+    conn.close()
+
+    with open(log_path) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 1 and lines[0].endswith('SELECT 1') and '1 rows' in lines[0], lines
+    print("✅ Slow query logged")
+    return True
+
+def test_request_totals():
+    """Per-request totals land on flask.g and in route aggregates"""
+    print("\n=== Testing Per-Request Totals ===")
+    path = os.path.join(tempfile.mkdtemp(), 'query_stats_request.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = DatabaseManager(path)
+    query_stats.reset()
+
+    app = Flask(__name__)
+
+    @app.route('/farmer')
+    def farmer():
+        for _ in range(4):  # an N+1 pattern
+            db.get_user_by_id(1)
+        query_stats.record_request('farmer', g.query_count, g.query_time)
+        return {'queries': g.query_count}
+
+    response = app.test_client().get('/farmer')
+    assert response.get_json()['queries'] == 4
+    route = query_stats.get_stats()['routes'][0]
+    assert route['endpoint'] == 'farmer' and route['p95_queries'] == 4, route
+    print("✅ Request totals tracked")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Query Stats")
+    print("=" * 60)
+
+    tests = [
+        test_normalize_sql,
+        test_database_statements_recorded,
+        test_slow_query_log,
+        test_request_totals
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
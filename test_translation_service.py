@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for batched translation with translation memory
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+from knowledge_cache import KnowledgeCache
+from translation_service import translate_fields
+
+FIELDS = {
+    'disease': 'Tomato - Early blight',
+    'yield_impact': '10-30%',
+    'symptoms': '• Brown spots with rings on older leaves',
+    'organic_treatment': '• Neem oil 5 ml per litre',
+    'chemical_treatment': '• Mancozeb 2 g per litre',
+    'prevention_tips': '• Crop rotation',
+    'market_prices': '• Bengaluru: ₹25-45/kg'
+}
+
+class FakeLLM:
+    """Replies with the batch JSON (in a code fence) with every value prefixed"""
+
+    def __init__(self, reply=None):
+        self.prompts = []
+        self.reply = reply
+
+    def __call__(self, prompt, timeout):
+        self.prompts.append(prompt)
+        if self.reply is not None:
+            return self.reply
+        batch = json.loads(re.search(r'\{.*\}', prompt, re.DOTALL).group(0))
+        return "```json\n" + json.dumps({key: f"KN:{value}" for key, value in batch.items()}, ensure_ascii=False) + "\n```"
+
+def temp_cache():
+    return KnowledgeCache(os.path.join(tempfile.mkdtemp(), 'knowledge.db'))
+
+def test_single_batched_call():
+    """All fields go out in one request; duplicate strings are sent once"""
+    print("\n=== Testing Single Batched Call ===")
+    llm = FakeLLM()
+    fields = dict(FIELDS, duplicate='10-30%', empty='', missing=None)
+    translated, missing = translate_fields(fields, 'kn', generate=llm, cache=temp_cache())
+
+    assert len(llm.prompts) == 1 and 'Kannada' in llm.prompts[0]
+    assert llm.prompts[0].count('10-30%') == 1
+    assert missing == [], missing
+    assert translated['symptoms'] == 'KN:• Brown spots with rings on older leaves'
+    assert translated['duplicate'] == translated['yield_impact'] == 'KN:10-30%'
+    assert translated['empty'] == '' and translated['missing'] is None
+
+    english, _ = translate_fields(FIELDS, 'en', generate=llm, cache=temp_cache())
+    assert english == FIELDS and len(llm.prompts) == 1
+    print(f"✅ {len(fields)} fields translated with {len(llm.prompts)} call")
+    return True
+
+def test_translation_memory():
+    """Remembered strings are never sent again, across cache instances"""
+    print("\n=== Testing Translation Memory ===")
+    db_path = os.path.join(tempfile.mkdtemp(), 'knowledge.db')
+    llm = FakeLLM()
+    translate_fields(FIELDS, 'kn', generate=llm, cache=KnowledgeCache(db_path))
+
+    cache = KnowledgeCache(db_path)
+    translated, missing = translate_fields(FIELDS, 'kn', generate=llm, cache=cache)
+    assert len(llm.prompts) == 1 and not missing
+    assert translated['market_prices'] == 'KN:• Bengaluru: ₹25-45/kg'
+
+    changed = dict(FIELDS, market_prices='• Mysuru: ₹20-40/kg')
+    translated, _ = translate_fields(changed, 'kn', generate=llm, cache=cache)
+    assert len(llm.prompts) == 2 and 'Mysuru' in llm.prompts[1] and 'Neem' not in llm.prompts[1]
+    assert translated['market_prices'] == 'KN:• Mysuru: ₹20-40/kg'
+
+    translate_fields(FIELDS, 'hi', generate=llm, cache=cache)
+    assert len(llm.prompts) == 3  # other language, not remembered
+    print(f"✅ Memory hit rate {cache.get_stats()['translation']['hit_rate']}")
+    return True
+
+def test_failures():
+    """Timeouts and unusable replies report the fields as missing and are not remembered"""
+    print("\n=== Testing Failures ===")
+    cache = temp_cache()
+
+    def timing_out(prompt, timeout):
+        raise TimeoutError('LLM call timed out')
+
+    translated, missing = translate_fields(FIELDS, 'kn', generate=timing_out, cache=cache)
+    assert sorted(missing) == sorted(FIELDS) and all(v is None for v in translated.values())
+
+    partial = FakeLLM(reply='Here you go: {"t1": "ಟೊಮೆಟೊ - ಆರಂಭಿಕ ಅಂಗಮಾರಿ", "t2": 7}')
+    translated, missing = translate_fields(FIELDS, 'kn', generate=partial, cache=cache)
+    assert translated['disease'] == 'ಟೊಮೆಟೊ - ಆರಂಭಿಕ ಅಂಗಮಾರಿ'
+    assert 'yield_impact' in missing and 'disease' not in missing
+
+    translated, missing = translate_fields(FIELDS, 'kn', generate=FakeLLM(reply='not json'), cache=cache)
+    assert translated['disease'] == 'ಟೊಮೆಟೊ - ಆರಂಭಿಕ ಅಂಗಮಾರಿ' and len(missing) == 6
+    print("✅ Failed fields reported, good ones kept")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Translation Service")
+    print("=" * 60)
+
+    tests = [
+        test_single_batched_call,
+        test_translation_memory,
+        test_failures
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
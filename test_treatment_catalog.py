@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline treatment catalog job
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from knowledge_cache import KnowledgeCache
+from treatment_catalog import (
+    CATALOG_KIND, TREATMENT_PROMPT_VERSION, RateBudget, build_treatment_prompt, get_cached_treatment,
+    parse_gemini_response, precompute_catalog, stub_generate
+)
+
+CLASS_NAMES = ['Tomato___Early_blight', 'Potato___Late_blight', 'Apple___healthy']
+LANGUAGES = ['en', 'kn']
+
+def temp_cache():
+    return KnowledgeCache(os.path.join(tempfile.mkdtemp(), 'knowledge.db'))
+
+def test_fill_catalog():
+    """Every class x language is generated with the stub LLM and stored"""
+    print("\n=== Testing Catalog Fill ===")
+    cache = temp_cache()
+    stats = precompute_catalog(CLASS_NAMES, LANGUAGES, stub_generate, cache=cache, workers=3, rate_per_minute=0)
+    assert stats == {'total': 6, 'cached': 0, 'generated': 6, 'failed': 0}, stats
+
+    details = cache.get(CATALOG_KIND, 'Tomato - Early blight', 'kn', TREATMENT_PROMPT_VERSION)
+    assert details['symptoms'] == '• Symptoms for Tomato - Early blight (Kannada)', details
+    assert details == parse_gemini_response(stub_generate(build_treatment_prompt('Tomato - Early blight', 'kn')))
+    assert get_cached_treatment(cache, 'Apple - healthy', 'en') is not None
+    print(f"✅ {stats['generated']} entries generated")
+    return True
+
+def test_catalog_entries_do_not_expire():
+    """Catalog entries outlive the treatment TTL that on-demand answers get"""
+    print("\n=== Testing Catalog Lifetime ===")
+    cache = KnowledgeCache(os.path.join(tempfile.mkdtemp(), 'knowledge.db'), ttls={'treatment': 0.1})
+    precompute_catalog(CLASS_NAMES[:1], ['en'], stub_generate, cache=cache, rate_per_minute=0)
+    cache.put('treatment', 'Potato - Late blight', 'en', TREATMENT_PROMPT_VERSION, {'symptoms': 'on demand'})
+    time.sleep(0.2)
+
+    assert get_cached_treatment(cache, 'Tomato - Early blight', 'en') is not None, "Catalog entry expired"
+    assert get_cached_treatment(cache, 'Potato - Late blight', 'en') is None, "On-demand entry should expire"
+    restarted = KnowledgeCache(cache.db_path, ttls={'treatment': 0.1})
+    assert get_cached_treatment(restarted, 'Tomato - Early blight', 'en') is not None
+    print("✅ Catalog entry kept past the treatment TTL")
+    return True
+
+def test_resumable():
+    """Failed or interrupted entries are generated on the next run; cached ones are skipped"""
+    print("\n=== Testing Resume ===")
+    cache = temp_cache()
+    calls = []
+
+    def flaky(prompt):
+        calls.append(prompt)
+        if "'Potato - Late blight'" in prompt:
+            raise TimeoutError('LLM call timed out')
+        return stub_generate(prompt)
+
+    first = precompute_catalog(CLASS_NAMES, LANGUAGES, flaky, cache=cache, rate_per_minute=0)
+    assert first['generated'] == 4 and first['failed'] == 2, first
+
+    calls.clear()
+    second = precompute_catalog(CLASS_NAMES, LANGUAGES, stub_generate, cache=cache, rate_per_minute=0)
+    assert second == {'total': 6, 'cached': 4, 'generated': 2, 'failed': 0}, second
+
+    third = precompute_catalog(CLASS_NAMES, LANGUAGES, flaky, cache=cache, rate_per_minute=0, dry_run=True)
+    assert third['cached'] == 6 and not calls
+    print("✅ Second run generated only the 2 failed entries")
+    return True
+
+def test_rate_budget():
+    """Parallel workers together stay under the per-minute budget"""
+    print("\n=== Testing Rate Budget ===")
+    budget = RateBudget(rate_per_minute=600)  # one call per 0.1s
+    start = time.monotonic()
+    stats = precompute_catalog(CLASS_NAMES, LANGUAGES, stub_generate, cache=temp_cache(), workers=6, rate_per_minute=600)
+    elapsed = time.monotonic() - start
+    assert stats['generated'] == 6
+    assert elapsed >= 0.45, f"{elapsed:.2f}s - budget not applied"
+
+    budget.acquire()
+    start = time.monotonic()
+    budget.acquire()
+    assert time.monotonic() - start >= 0.09
+    print(f"✅ 6 calls at 600/min took {elapsed:.2f}s")
+    return True
+
+def test_stub_needs_scratch_cache():
+    """The CLI refuses to write stub answers into the cache the app serves from"""
+    print("\n=== Testing --stub Guard ===")
+    folder = tempfile.mkdtemp()
+    classes_path = os.path.join(folder, 'classes.json')
+    with open(classes_path, 'w') as f:
+        json.dump(CLASS_NAMES, f)
+    production = os.path.join(folder, 'production.db')
+    scratch = os.path.join(folder, 'scratch.db')
+    env = dict(os.environ, KNOWLEDGE_CACHE_DB=production)
+
+    def run(*extra):
+        command = [sys.executable, 'treatment_catalog.py', '--stub', '--languages', 'en', '--classes', classes_path, *extra]
+        return subprocess.run(command, env=env, capture_output=True, text=True).returncode
+
+    assert run() == 1, "--stub without --cache-db must refuse to write"
+    assert run('--cache-db', production) == 1, "--cache-db must not be the app's cache"
+    assert run('--cache-db', scratch) == 0
+    assert get_cached_treatment(KnowledgeCache(scratch), 'Apple - healthy', 'en') is not None
+    assert get_cached_treatment(KnowledgeCache(production), 'Apple - healthy', 'en') is None
+    print("✅ Stub output only lands in the scratch cache")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Treatment Catalog")
+    print("=" * 60)
+
+    tests = [
+        test_fill_catalog,
+        test_catalog_entries_do_not_expire,
+        test_resumable,
+        test_rate_budget,
+        test_stub_needs_scratch_cache
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for streamed image uploads (/api/v2/predict)
+"""
+import io
+import os
+import sys
+from PIL import Image
+from werkzeug.test import EnvironBuilder
+from image_pipeline import process_image
+from upload_stream import UploadError, UploadTooLarge, spool_request
+
+def jpeg_bytes(size=(640, 480)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 40, 40)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+def test_multipart_upload():
+    """The image part is spooled and form fields are returned"""
+    print("\n=== Testing Multipart Upload ===")
+    photo = jpeg_bytes()
+    environ = EnvironBuilder(method='POST', data={
+        'image': (io.BytesIO(photo), 'photo.jpg', 'image/jpeg'),
+        'user_id': '7',
+        'language': 'kn'
+    }).get_environ()
+
+    with spool_request(environ) as spooled:
+        assert spooled.size == len(photo), spooled.size
+        assert spooled.fields == {'user_id': '7', 'language': 'kn'}, spooled.fields
+        assert spooled.content_type == 'image/jpeg'
+        upload = process_image(spooled.file)
+    assert upload.tensor.shape == (1, 128, 128, 3)
+    assert upload.image.size == (640, 480)
+
+    # Binary parts much larger than the parser's read buffer
+    blob = os.urandom(1_000_000)
+    environ = EnvironBuilder(method='POST', data={
+        'image': (io.BytesIO(blob), 'photo.jpg', 'image/jpeg')
+    }).get_environ()
+    with spool_request(environ) as spooled:
+        assert spooled.file.read() == blob
+    print(f"✅ Multipart upload spooled ({spooled.size} bytes)")
+    return True
+
+def test_raw_upload():
+    """A raw image/jpeg body is spooled, including chunked bodies without Content-Length"""
+    print("\n=== Testing Raw Upload ===")
+    photo = jpeg_bytes()
+    environ = EnvironBuilder(method='POST', data=photo, content_type='image/jpeg').get_environ()
+    with spool_request(environ) as spooled:
+        assert spooled.file.read() == photo and spooled.fields == {}
+
+    chunked = EnvironBuilder(method='POST', data=photo, content_type='image/jpeg').get_environ()
+    del chunked['CONTENT_LENGTH']
+    chunked['wsgi.input_terminated'] = True
+    with spool_request(chunked) as spooled:
+        assert spooled.size == len(photo)
+    print("✅ Raw and chunked bodies spooled")
+    return True
+
+def test_size_limit_and_errors():
+    """Oversized bodies raise UploadTooLarge; wrong or empty bodies raise UploadError"""
+    print("\n=== Testing Size Limit and Errors ===")
+    big = b'\xff' * 300_000
+
+    declared = EnvironBuilder(method='POST', data=big, content_type='image/jpeg').get_environ()
+    chunked = EnvironBuilder(method='POST', data=big, content_type='image/jpeg').get_environ()
+    del chunked['CONTENT_LENGTH']
+    chunked['wsgi.input_terminated'] = True
+    multipart = EnvironBuilder(method='POST', data={
+        'image': (io.BytesIO(big), 'photo.jpg', 'image/jpeg')
+    }).get_environ()
+
+    for environ in (declared, chunked, multipart):
+        try:
+            spool_request(environ, max_bytes=100_000)
+            return False
+        except UploadTooLarge:
+            pass
+
+    invalid = [
+        EnvironBuilder(method='POST', json={'image': 'data:...'}).get_environ(),
+        EnvironBuilder(method='POST', data=b'', content_type='image/jpeg').get_environ(),
+        EnvironBuilder(method='POST', data={'photo': (io.BytesIO(b'x'), 'p.jpg')}).get_environ()
+    ]
+    for environ in invalid:
+        try:
+            spool_request(environ)
+            return False
+        except UploadTooLarge:
+            return False
+        except UploadError:
+            pass
+    print("✅ Limits enforced and bad uploads rejected")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Upload Stream")
+    print("=" * 60)
+
+    tests = [
+        test_multipart_upload,
+        test_raw_upload,
+        test_size_limit_and_errors
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
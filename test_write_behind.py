@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test script for the write-behind queue
+"""
+import os
+import sys
+import threading
+from db_test_utils import make_db as make_test_db
+from write_behind import WriteBehindQueue
+
+def make_db():
+    """Create a migrated DatabaseManager on a throwaway database file"""
+    db = make_test_db('write_behind_test.db')
+    user_id = db.get_user_by_email('demo@raithamitra.com')['id']
+    return db, user_id
+
+def prediction_fields(user_id, disease='Tomato___Late_blight'):
+    return {
+        'user_id': user_id, 'disease_name': disease, 'confidence': 97.5,
+        'yield_impact': 'High', 'symptoms': 'Dark spots', 'organic_treatment': 'Neem oil',
+        'chemical_treatment': 'Mancozeb', 'prevention_tips': 'Rotate crops',
+        'market_prices': 'Stable', 'image_path': None
+    }
+
+def test_group_commit():
+    """Queued rows of every kind land in the database after flush"""
+    print("\n=== Testing Group Commit ===")
+    db, user_id = make_db()
+    wb = WriteBehindQueue(db, spill_path=db.db_path + '.spill')
+
+    for i in range(20):
+        wb.submit('prediction', **prediction_fields(user_id))
+        wb.submit('chat_message', user_id=user_id, message=f'Q{i}', response=f'A{i}',
+                  context_data={'crop': 'tomato'}, language='en')
+    wb.submit('financial_score', user_id=user_id, overall_score=72.5,
+              score_breakdown={'cost_efficiency_score': 70})
+
+    assert wb.flush(timeout=10), "Queue did not drain"
+    wb.shutdown()
+
+    assert len(db.get_user_predictions(user_id, limit=100)) == 20
+    assert len(db.get_chat_history(user_id, limit=100)) == 20
+    assert db.get_latest_financial_score(user_id)['cost_efficiency_score'] == 70
+
+    stats = wb.get_stats()
+    assert stats['written'] == 41, f"Unexpected stats {stats}"
+    assert stats['batches'] < 41, f"Rows were not grouped: {stats}"
+    print(f"✅ 41 rows written in {stats['batches']} batches")
+    return True
+
+def test_concurrent_submit_stats():
+    """Stats stay exact when many threads submit at once"""
+    print("\n=== Testing Concurrent Submit Stats ===")
+    db, user_id = make_db()
+    wb = WriteBehindQueue(db, max_queue_size=1000, spill_path=db.db_path + '.spill')
+
+    def submit_many():
+        for i in range(50):
+            wb.submit('chat_message', user_id=user_id, message=f'Q{i}', response='A')
+
+    threads = [threading.Thread(target=submit_many) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert wb.flush(timeout=10), "Queue did not drain"
+    wb.shutdown()
+
+    stats = wb.get_stats()
+    assert stats['queued'] + stats['spilled'] == 400, f"Lost stat updates: {stats}"
+    assert stats['written'] == stats['queued'], f"Unexpected stats {stats}"
+    print(f"✅ 400 concurrent submits counted: {stats}")
+    return True
+
+def test_overflow_spills_and_replays():
+    """Rows that do not fit in the queue are spilled and replayed on restart"""
+    print("\n=== Testing Spill and Replay ===")
+    db, user_id = make_db()
+    spill_path = db.db_path + '.spill'
+    wb = WriteBehindQueue(db, max_queue_size=1, spill_path=spill_path)
+
+    # Keep the writer from starting so the queue fills up
+    wb.start = lambda: None
+    assert wb.submit('chat_message', user_id=user_id, message='kept', response='r') is True
+    assert wb.submit('chat_message', user_id=user_id, message='spilled', response='r') is False
+    assert os.path.exists(spill_path), "Overflow row was not spilled"
+
+    # A fresh queue replays the spill file before writing new rows
+    wb2 = WriteBehindQueue(db, spill_path=spill_path)
+    wb2.submit('chat_message', user_id=user_id, message='new', response='r')
+    assert wb2.flush(timeout=10)
+    wb2.shutdown()
+
+    messages = {m['message'] for m in db.get_chat_history(user_id, limit=10)}
+    assert messages == {'spilled', 'new'}, f"Unexpected messages {messages}"
+    assert not os.path.exists(spill_path), "Spill file should be consumed"
+    print("✅ Spilled row replayed on restart")
+    return True
+
+def test_bad_row_quarantined():
+    """A row that fails on its own is quarantined; the rest of its batch is written"""
+    print("\n=== Testing Bad Row Quarantine ===")
+    db, user_id = make_db()
+    spill_path = db.db_path + '.spill'
+    wb = WriteBehindQueue(db, spill_path=spill_path)
+
+    bad = prediction_fields(user_id)
+    del bad['symptoms']  # malformed row makes the batch fail
+    batch = [('prediction', prediction_fields(user_id)), ('prediction', bad), ('prediction', prediction_fields(user_id))]
+    assert wb._write_batch(batch) == 2
+
+    stats = wb.get_stats()
+    assert stats['quarantined'] == 1 and stats['spilled'] == 0, f"Unexpected stats {stats}"
+    assert len(db.get_user_predictions(user_id, limit=10)) == 2
+    assert not os.path.exists(spill_path), "Bad row must not be re-spilled"
+    with open(wb.quarantine_path) as f:
+        assert len(f.readlines()) == 1
+    print("✅ Bad row quarantined, good rows written")
+    return True
+
+def test_interrupted_replay_recovered():
+    """Rows left in .replay by a crashed replay are not overwritten or lost"""
+    print("\n=== Testing Interrupted Replay ===")
+    db, user_id = make_db()
+    spill_path = db.db_path + '.spill'
+    wb = WriteBehindQueue(db, spill_path=spill_path)
+
+    # A crash mid-replay left one row in .replay, and a later run spilled another
+    wb._spill([('chat_message', {'user_id': user_id, 'message': 'crashed', 'response': 'r'})])
+    os.replace(spill_path, wb.replay_path)
+    wb._spill([('chat_message', {'user_id': user_id, 'message': 'later', 'response': 'r'})])
+
+    wb.start()
+    assert wb.flush(timeout=10)
+    wb.shutdown()
+
+    messages = {m['message'] for m in db.get_chat_history(user_id, limit=10)}
+    assert messages == {'crashed', 'later'}, f"Unexpected messages {messages}"
+    assert not os.path.exists(wb.replay_path) and not os.path.exists(spill_path)
+    print("✅ Leftover .replay rows replayed")
+    return True
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Testing Write-Behind Queue")
+    print("=" * 60)
+
+    tests = [
+        test_group_commit,
+        test_concurrent_submit_stats,
+        test_overflow_spills_and_replays,
+        test_bad_row_quarantined,
+        test_interrupted_replay_recovered
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results.append(False)
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} passed")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,138 @@
+"""
+Tiered Cache Module
+Shared base of the two-tier caches (prediction_cache, knowledge_cache):
+an in-memory LRU in front of a SQLite table that all workers share and
+that survives restarts.
+The lock only guards the in-memory LRU and the counters. SQLite I/O runs
+outside it on a per-thread connection, so a slow disk read or a write
+waiting on the SQLite lock never stalls memory hits on other threads.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class TieredCache:
+    """
+    In-memory LRU + SQLite tier
+
+    Subclasses set NAME (for log messages), TABLE and SCHEMA (CREATE
+    statements run on every new connection), build get/put from the
+    helpers below, and override _prune() to trim the table.
+    """
+
+    NAME = 'Cache'
+    TABLE = None
+    SCHEMA = ()
+    PRUNE_EVERY = 100  # writes between _prune() calls
+
+    def __init__(self, db_path, max_entries, enabled=True):
+        """
+        Args:
+            db_path: SQLite file shared by all workers
+            max_entries: Entries kept in memory
+            enabled: False turns every lookup into a miss
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.local = threading.local()
+        self.puts = 0
+
+    # --- Memory tier (under self.lock) ---
+
+    def _memory_get(self, key, is_fresh):
+        """Entry for key if present and is_fresh(entry), marking it recently used"""
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None or not is_fresh(entry):
+                return None
+            self.memory.move_to_end(key)
+            return entry
+
+    def _remember(self, key, entry):
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def _memory_items(self):
+        """Snapshot of (key, entry) pairs, for scans that must not hold the lock"""
+        with self.lock:
+            return list(self.memory.items())
+
+    def _forget(self, matches):
+        """Drop every in-memory entry whose key satisfies matches(key)"""
+        with self.lock:
+            for key in [key for key in self.memory if matches(key)]:
+                del self.memory[key]
+
+    # --- SQLite tier (no lock held) ---
+
+    def _connection(self):
+        """This thread's connection, created (with the schema) on first use"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self.local.conn = conn
+        return conn
+
+    def _query(self, sql, params=()):
+        """
+        Run a read
+
+        Returns:
+            sqlite3.Row-like tuple or None (errors are logged as misses)
+        """
+        try:
+            return self._connection().execute(sql, params).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ {self.NAME} read failed: {e}")
+            return None
+
+    def _write(self, sql, params=(), now=None):
+        """
+        Run a write and commit it; every PRUNE_EVERY writes also prunes
+
+        Returns:
+            int: Rows changed (0 on error)
+        """
+        with self.lock:
+            self.puts += 1
+            prune = now is not None and self.puts % self.PRUNE_EVERY == 0
+
+        conn = None
+        try:
+            conn = self._connection()
+            changed = conn.execute(sql, params).rowcount
+            if prune:
+                self._prune(conn, now)
+            conn.commit()
+            return changed
+        except sqlite3.Error as e:
+            print(f"⚠️ {self.NAME} write failed: {e}")
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
+            return 0
+
+    def _prune(self, conn, now):
+        """Trim the table (called inside a write, before its commit)"""
+
+    def clear(self):
+        """Empty both tiers"""
+        with self.lock:
+            self.memory.clear()
+        try:
+            conn = self._connection()
+            conn.execute(f'DELETE FROM {self.TABLE}')
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ {self.NAME} clear failed: {e}")
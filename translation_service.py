@@ -0,0 +1,111 @@
+"""
+Translation Service Module
+Translates several fields (disease name, yield impact, treatment details,
+market prices) in one Gemini request that returns a JSON map, on top of a
+translation memory in the knowledge cache: a string translated once is
+never sent again.
+"""
+
+import hashlib
+import json
+import re
+
+from knowledge_cache import knowledge_cache
+from llm_client import generate_text, llm_available
+from treatment_catalog import LANGUAGE_NAMES
+
+# Bump when the prompt below changes; remembered translations for older versions are ignored
+TRANSLATION_PROMPT_VERSION = 1
+
+
+def _memory_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def build_batch_prompt(texts, target_language):
+    """Prompt asking for a JSON object with the same keys, values translated"""
+    target_lang_name = LANGUAGE_NAMES.get(target_language, 'English')
+    return f"""Translate every value of this JSON object to {target_lang_name}.
+Keep the keys exactly as they are. Keep bullet points (•), line breaks, numbers, currency symbols (₹) and brand names.
+Keep technical terms related to agriculture and plant diseases accurate.
+Reply with only the translated JSON object, no explanations or markdown.
+
+{json.dumps(texts, ensure_ascii=False, indent=1)}"""
+
+
+def parse_batch_response(text):
+    """
+    JSON object from a model reply (tolerates code fences and surrounding text)
+
+    Returns:
+        dict: key -> translated string (non-string or empty values dropped)
+    """
+    match = re.search(r'\{.*\}', text or '', re.DOTALL)
+    if not match:
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {key: value.strip() for key, value in data.items() if isinstance(value, str) and value.strip()}
+
+
+def translate_fields(fields, target_language, generate=None, timeout=10, cache=None):
+    """
+    Translate a dict of fields with at most one model call
+
+    Args:
+        fields: dict of name -> text (empty or non-string values are passed through)
+        target_language: Language code
+        generate: Callable (prompt, timeout) -> text; default the shared LLM client
+        timeout: Seconds for the model call
+        cache: KnowledgeCache used as translation memory (default: global)
+
+    Returns:
+        tuple: (dict of name -> translated text or None,
+                list of names that could not be translated)
+    """
+    cache = knowledge_cache if cache is None else cache
+    if target_language == 'en':
+        return dict(fields), []
+
+    translated = {}
+    pending = {}  # unique source text -> batch key
+    for name, text in fields.items():
+        if not isinstance(text, str) or not text.strip():
+            translated[name] = text
+            continue
+        remembered = cache.get('translation', _memory_key(text), target_language, TRANSLATION_PROMPT_VERSION)
+        if remembered is not None:
+            translated[name] = remembered
+        elif text not in pending:
+            pending[text] = f"t{len(pending) + 1}"
+
+    results = {}
+    if pending:
+        if generate is None and llm_available():
+            generate = lambda prompt, timeout: generate_text(prompt, caller='translation', timeout=timeout)
+
+        if generate is not None:
+            batch = {key: text for text, key in pending.items()}
+            try:
+                results = parse_batch_response(generate(build_batch_prompt(batch, target_language), timeout))
+                print(f"🌐 Translated {len(results)}/{len(batch)} strings to {target_language} in one call")
+            except TimeoutError:
+                print(f"⏱️ Batched translation timeout after {timeout}s")
+            except Exception as e:
+                print(f"❌ Batched translation error: {e}")
+
+        for text, key in pending.items():
+            if key in results:
+                cache.put('translation', _memory_key(text), target_language, TRANSLATION_PROMPT_VERSION, results[key])
+
+    missing = []
+    for name, text in fields.items():
+        if name not in translated:
+            translated[name] = results.get(pending[text])
+            if translated[name] is None:
+                missing.append(name)
+    return translated, missing
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Treatment Catalog Module
+The Gemini treatment prompt and its parser, plus an offline job that
+generates treatment details for every disease class x language ahead of
+time into the knowledge cache, so no farmer waits for Gemini on a first
+prediction. The job runs calls in parallel under a rate budget and is
+resumable: entries already in the cache are skipped. Catalog entries are
+stored under their own kind, which has no TTL: they stay until
+TREATMENT_PROMPT_VERSION changes.
+
+Usage:
+    python treatment_catalog.py                      # all classes, all languages
+    python treatment_catalog.py --languages en,kn --rate 20
+    python treatment_catalog.py --stub --dry-run     # local stub LLM, no API calls
+    python treatment_catalog.py --stub --cache-db /tmp/catalog_test.db
+
+--stub writes placeholder text, so it only writes to a scratch database
+given with --cache-db (never the cache the app serves from).
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from knowledge_cache import KnowledgeCache, knowledge_cache
+
+CLASSES_PATH = 'class_names.json'
+
+LANGUAGE_NAMES = {
+    'en': 'English',
+    'hi': 'Hindi',
+    'kn': 'Kannada',
+    'te': 'Telugu',
+    'ta': 'Tamil',
+    'ml': 'Malayalam',
+    'mr': 'Marathi',
+    'gu': 'Gujarati',
+    'bn': 'Bengali',
+    'pa': 'Punjabi'
+}
+
+# Bump when the prompt or parser below changes; cached answers for older versions are ignored
+# (2: section numbers no longer leak into the previous section)
+TREATMENT_PROMPT_VERSION = 2
+
+MISSING_SECTION = "Information not available."
+
+# Knowledge cache kind of pre-generated entries. Unlike 'treatment' (answers
+# generated on demand) it has no TTL, so the catalog never silently expires.
+CATALOG_KIND = 'catalog'
+
+
+def disease_name_for(class_name):
+    """'Tomato___Early_blight' -> 'Tomato - Early blight' (the name used in prompts and cache keys)"""
+    return class_name.replace("___", " - ").replace("_", " ")
+
+
+def get_cached_treatment(cache, disease_name, language, version=TREATMENT_PROMPT_VERSION):
+    """
+    Treatment details already generated for a disease and language
+
+    Returns:
+        dict or None: The on-demand answer if cached, else the catalog entry
+    """
+    details = cache.get('treatment', disease_name, language, version)
+    if details is None:
+        details = cache.get(CATALOG_KIND, disease_name, language, version)
+    return details
+
+
+def build_treatment_prompt(disease_name, target_language='en'):
+    """Gemini prompt for the four treatment sections in the target language"""
+    target_lang_name = LANGUAGE_NAMES.get(target_language, 'English')
+    return f"""You are an expert agricultural advisor for farmers in India. A farmer has identified '{disease_name}'.
+
+        Provide a detailed action plan in {target_lang_name}. Organize your response into four sections with these exact English headings followed by {target_lang_name} content:
+
+        1. Symptoms:
+        [Write a clear bulleted list of key symptoms in simple {target_lang_name}. Use simple bullet points (•) and avoid asterisks or markdown formatting.]
+
+        2. Organic Treatment:
+        [Write a clear bulleted list of organic remedies in simple {target_lang_name}. Include specific instructions and quantities. Use simple bullet points (•) and avoid asterisks or markdown formatting.]
+
+        3. Chemical Treatment:
+        [Write a clear bulleted list of recommended chemical treatments, including common brand names available in India, in simple {target_lang_name}. Use simple bullet points (•) and avoid asterisks or markdown formatting.]
+
+        4. Prevention Tips:
+        [Write a clear bulleted list of preventive measures in simple {target_lang_name}. Use simple bullet points (•) and avoid asterisks or markdown formatting.]
+
+        IMPORTANT FORMATTING RULES:
+        - Use simple, farmer-friendly language that is easy to understand and implement
+        - Do NOT use asterisks (*), markdown formatting, hashtags (#), or complex symbols
+        - Use simple bullet points (•) for lists only
+        - Write in clear, plain text format without any special formatting
+        - Keep sentences short and actionable
+        - Use proper spacing between sections
+        - Include specific quantities, timings, and brand names where applicable
+        - Write as if explaining to a farmer in person"""
+
+
+def clean_gemini_text(text):
+    """Clean up Gemini AI response text by removing markdown formatting"""
+    if not text:
+        return text
+
+    # Remove excessive asterisks and markdown formatting
+    text = re.sub(r'\*{2,}', '', text)  # Remove multiple asterisks
+    text = re.sub(r'\*([^*]+)\*', r'\1', text)  # Remove single asterisks around text
+    text = re.sub(r'#{1,6}\s*', '', text)  # Remove markdown headers
+    text = re.sub(r'`([^`]+)`', r'\1', text)  # Remove code formatting
+    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)  # Remove markdown links
+
+    # Clean up bullet points and formatting
+    text = re.sub(r'^\s*[-•*]\s*', '• ', text, flags=re.MULTILINE)  # Standardize bullet points
+    text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)  # Remove excessive line breaks
+    text = re.sub(r'^\s+|\s+$', '', text)  # Remove leading/trailing whitespace
+
+    # Fix common formatting issues
+    text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces with single space
+    text = re.sub(r'\n\s*', '\n', text)  # Clean up line breaks
+
+    return text.strip()
+
+
+def parse_gemini_response(text):
+    """Parse Gemini AI response into structured format"""
+    details = {key: MISSING_SECTION for key in ["symptoms", "organic_treatment", "chemical_treatment", "prevention_tips"]}
+
+    # Clean the input text first
+    text = clean_gemini_text(text)
+
+    # Each section ends where the next (optionally numbered) heading starts
+    patterns = {
+        "symptoms": r"Symptoms:(.*?)(?:\d+\.\s*)?(Organic Treatment:|Chemical Treatment:|Prevention Tips:|$)",
+        "organic_treatment": r"Organic Treatment:(.*?)(?:\d+\.\s*)?(Chemical Treatment:|Prevention Tips:|$)",
+        "chemical_treatment": r"Chemical Treatment:(.*?)(?:\d+\.\s*)?(Prevention Tips:|$)",
+        "prevention_tips": r"Prevention Tips:(.*)"
+    }
+
+    for key, pattern in patterns.items():
+        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
+        if match:
+            extracted_text = match.group(1).strip()
+            # Clean the extracted text
+            cleaned_text = clean_gemini_text(extracted_text)
+            details[key] = cleaned_text if cleaned_text else MISSING_SECTION
+
+    return details
+
+
+def is_complete(details):
+    """True when every treatment section was parsed"""
+    return MISSING_SECTION not in details.values()
+
+
+class RateBudget:
+    """Spaces calls evenly so all workers together stay under rate_per_minute"""
+
+    def __init__(self, rate_per_minute):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next call may start"""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def stub_generate(prompt):
+    """Local stand-in for Gemini: a well-formed answer naming the disease and language"""
+    disease = re.search(r"identified '([^']+)'", prompt).group(1)
+    language = re.search(r"action plan in (\w+)", prompt).group(1)
+    return "\n".join(
+        f"{number}. {heading}:\n• {heading} for {disease} ({language})"
+        for number, heading in enumerate(['Symptoms', 'Organic Treatment', 'Chemical Treatment', 'Prevention Tips'], 1)
+    )
+
+
+def precompute_catalog(class_names, languages, generate, cache=None, workers=4, rate_per_minute=30,
+                       force=False, dry_run=False, version=TREATMENT_PROMPT_VERSION):
+    """
+    Generate treatment details for every class x language missing from the cache
+
+    Args:
+        class_names: Model class names (e.g. from class_names.json)
+        languages: Language codes
+        generate: Callable prompt -> response text (LLM or stub_generate)
+        cache: KnowledgeCache to fill (default: the global knowledge_cache)
+        workers: Calls in flight at once
+        rate_per_minute: Upper bound on calls started per minute
+        force: Regenerate entries that are already cached
+        dry_run: Only count what would be generated
+
+    Returns:
+        dict: total, cached, generated, failed
+    """
+    cache = knowledge_cache if cache is None else cache
+    pairs = [(disease_name_for(c), lang) for c in dict.fromkeys(class_names) for lang in languages]
+    todo = [pair for pair in pairs if force or cache.get(CATALOG_KIND, pair[0], pair[1], version) is None]
+    stats = {'total': len(pairs), 'cached': len(pairs) - len(todo), 'generated': 0, 'failed': 0}
+    print(f"📚 Treatment catalog: {len(pairs)} entries, {stats['cached']} cached, {len(todo)} to generate")
+    if dry_run or not todo:
+        return stats
+
+    budget = RateBudget(rate_per_minute)
+
+    def work(disease_name, language):
+        budget.acquire()
+        details = parse_gemini_response(generate(build_treatment_prompt(disease_name, language)))
+        if not is_complete(details):
+            raise ValueError('incomplete answer')
+        cache.put(CATALOG_KIND, disease_name, language, version, details)
+
+    start = time.time()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(work, *pair): pair for pair in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            disease_name, language = futures[future]
+            try:
+                future.result()
+                stats['generated'] += 1
+            except Exception as e:
+                stats['failed'] += 1
+                print(f"⚠️ {disease_name} ({language}): {e}")
+            if done % 10 == 0 or done == len(todo):
+                print(f"📝 {done}/{len(todo)} ({time.time() - start:.0f}s)")
+    except KeyboardInterrupt:
+        # Everything generated so far is already cached; the next run resumes
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-generate treatment details for every disease and language')
+    parser.add_argument('--languages', default=','.join(LANGUAGE_NAMES), help='Comma-separated language codes')
+    parser.add_argument('--classes', default=CLASSES_PATH, help='Class names JSON file')
+    parser.add_argument('--workers', type=int, default=4, help='Calls in flight at once')
+    parser.add_argument('--rate', type=float, default=30, help='Maximum calls per minute')
+    parser.add_argument('--force', action='store_true', help='Regenerate cached entries')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be generated')
+    parser.add_argument('--stub', action='store_true', help='Use a local stub instead of Gemini')
+    parser.add_argument('--cache-db', help='Knowledge cache file to fill (default: the one the app uses)')
+    args = parser.parse_args()
+
+    cache = knowledge_cache
+    if args.cache_db:
+        cache = KnowledgeCache(db_path=args.cache_db, ttls=knowledge_cache.ttls)
+    if args.stub and not args.dry_run:
+        # Stub answers are placeholders; catalog entries never expire, so the app would serve them indefinitely
+        if not args.cache_db or os.path.abspath(args.cache_db) == os.path.abspath(knowledge_cache.db_path):
+            print("❌ --stub only writes to a scratch database: add --cache-db PATH (or --dry-run)", file=sys.stderr)
+            return 1
+
+    with open(args.classes) as f:
+        class_names = json.load(f)
+    languages = [code.strip() for code in args.languages.split(',') if code.strip()]
+    unknown = [code for code in languages if code not in LANGUAGE_NAMES]
+    if unknown:
+        print(f"❌ Unknown language codes: {', '.join(unknown)}", file=sys.stderr)
+        return 1
+
+    if args.stub:
+        generate = stub_generate
+    else:
+        from llm_client import generate_text, llm_available
+        if not llm_available() and not args.dry_run:
+            print("❌ GEMINI_API_KEY is not set (use --stub for a local run)", file=sys.stderr)
+            return 1
+        generate = lambda prompt: generate_text(prompt, caller='catalog', timeout=60)
+
+    stats = precompute_catalog(class_names, languages, generate, cache=cache, workers=args.workers,
+                               rate_per_minute=args.rate, force=args.force, dry_run=args.dry_run)
+    print(f"✅ {stats['generated']} generated, {stats['cached']} already cached, {stats['failed']} failed")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Upload Stream Module
+Spools a streamed image upload (multipart/form-data or a raw image/* body)
+to a temporary file, enforcing the size limit while the body is being read,
+so large photos never sit in memory as base64 JSON strings
+"""
+
+import os
+import tempfile
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import FormDataParser
+from werkzeug.http import parse_options_header
+from werkzeug.wsgi import get_input_stream
+
+# Largest accepted image file
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', 20 * 1024 * 1024))
+
+# Uploads smaller than this stay in memory; larger ones roll over to disk
+SPOOL_MEMORY_BYTES = 512 * 1024
+
+# Room for multipart boundaries, part headers and the small text fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Parser buffer / text field limit (Flask's MAX_FORM_MEMORY_SIZE default)
+MAX_FORM_MEMORY = 500_000
+
+RAW_IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/webp', 'application/octet-stream'}
+ZIP_TYPES = {'application/zip', 'application/x-zip-compressed', 'application/octet-stream'}
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(ValueError):
+    """The request did not contain a usable image upload"""
+
+
+class UploadTooLarge(UploadError):
+    """The upload exceeded the size limit"""
+
+
+class SpooledUpload:
+    """An uploaded image spooled to a temporary file plus any form fields"""
+
+    def __init__(self, file, fields, size, content_type):
+        self.file = file
+        self.fields = fields
+        self.size = size
+        self.content_type = content_type
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _spool_factory(*args, **kwargs):
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+
+
+def _spool_multipart(environ, max_bytes, field):
+    parser = FormDataParser(
+        stream_factory=_spool_factory,
+        max_form_memory_size=MAX_FORM_MEMORY,
+        max_content_length=max_bytes + MULTIPART_OVERHEAD,
+        max_form_parts=16,
+        silent=False
+    )
+    _, form, files = parser.parse_from_environ(environ)
+
+    upload = files.get(field)
+    for _, part in files.items(multi=True):
+        if part is not upload:
+            part.close()
+    if upload is None:
+        raise UploadError(f"No '{field}' file in the upload")
+
+    stream = upload.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    if size > max_bytes:
+        stream.close()
+        raise UploadTooLarge(f"Image larger than {max_bytes // (1024 * 1024)} MB")
+    return SpooledUpload(stream, form.to_dict(), size, upload.mimetype)
+
+
+def _spool_raw(environ, max_bytes, content_type):
+    # get_input_stream rejects an oversized Content-Length up front and
+    # stops chunked bodies once they pass max_bytes
+    stream = get_input_stream(environ, max_content_length=max_bytes)
+    spool = _spool_factory()
+    size = 0
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise RequestEntityTooLarge()
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return SpooledUpload(spool, {}, size, content_type)
+
+
+def spool_request(environ, max_bytes=UPLOAD_MAX_BYTES, field='image', raw_types=RAW_IMAGE_TYPES):
+    """
+    Read an image upload from a WSGI request body into a temporary file
+
+    Args:
+        environ: WSGI environ (request.environ); the body must not have been read
+        max_bytes: Largest accepted image
+        field: Multipart file field holding the image
+        raw_types: Content-Types accepted as a raw (non-multipart) body
+
+    Returns:
+        SpooledUpload: positioned at the start of the image; close it when done
+
+    Raises:
+        UploadTooLarge: If the body exceeds the limit (checked while streaming)
+        UploadError: If the body is not a supported image upload
+    """
+    content_type, _ = parse_options_header(environ.get('CONTENT_TYPE', ''))
+    try:
+        if content_type == 'multipart/form-data':
+            upload = _spool_multipart(environ, max_bytes, field)
+        elif content_type in raw_types:
+            upload = _spool_raw(environ, max_bytes, content_type)
+        else:
+            raise UploadError(f"Unsupported Content-Type {content_type or 'none'!r}")
+    except RequestEntityTooLarge:
+        raise UploadTooLarge(f"Image larger than {max_bytes // (1024 * 1024)} MB")
+    except UploadError:
+        raise
+    except ValueError as e:
+        raise UploadError(f"Malformed upload: {e}")
+
+    if upload.size == 0:
+        upload.close()
+        raise UploadError("Empty upload")
+    return upload
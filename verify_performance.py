@@ -54,7 +54,18 @@ def verify_database_indexes():
                 print_result(f"Index on {table}.{column}", has_index)
         
         conn.close()
-        return True
+        
+        # Plan every statement in the code against the migrated schema;
+        # any full-table scan not explicitly allowed fails verification
+        from index_advisor import analyze, ALLOWED_SCANS
+        report = analyze()
+        print(f"\nPlanned {report['planned']} SQL statements "
+              f"({len(report['allowed'])} allowed scans)")
+        for module, function, line, detail, _ in report['scans']:
+            print_result(f"{module}:{line} {function}()", False, detail)
+        print_result("No unexpected full-table scans", not report['scans'])
+        
+        return not report['scans']
         
     except Exception as e:
         print_result("Database index verification", False, str(e))
@@ -0,0 +1,400 @@
+"""
+Write-Behind Queue Module
+Moves non-critical inserts (prediction history, chat log, financial scores)
+off the request path and group-commits them on a single writer thread
+
+Writes are fire-and-forget: callers get no row id and no confirmation that
+the row reached the database, so only rows nothing reads back right away
+belong here.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: spill/replay are only serialized within one process
+    fcntl = None
+
+
+@contextmanager
+def _file_lock(path, blocking=True):
+    """
+    Exclusive advisory lock on path, shared by every process (gunicorn worker)
+
+    Yields:
+        bool: True if the lock is held, False if blocking=False and another process has it
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue in front of DatabaseManager writes
+
+    Requests enqueue rows and return immediately; one writer thread drains
+    the queue and saves each batch in a single transaction using the
+    DatabaseManager bulk methods. Rows that cannot be queued or written are
+    appended to a spill file and replayed the next time the writer starts;
+    rows that fail on their own (bad data rather than a busy database) are
+    moved to a quarantine file instead of being retried forever.
+    """
+
+    # kind -> DatabaseManager bulk method name
+    WRITERS = {
+        'prediction': 'save_predictions_bulk',
+        'chat_message': 'save_chat_messages_bulk',
+        'financial_score': 'save_financial_scores_bulk'
+    }
+
+    def __init__(self, db, max_queue_size=1000, batch_size=100, flush_interval=0.05, spill_path=None):
+        """
+        Args:
+            db: DatabaseManager instance
+            max_queue_size: Rows held in memory before new rows spill to disk
+            batch_size: Maximum rows written per transaction
+            flush_interval: Seconds the writer waits for more rows when idle
+            spill_path: JSON-lines file for rows that could not be written
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path or f'{db.db_path}.writebehind.jsonl'
+        self.replay_path = f'{self.spill_path}.replay'
+        self.quarantine_path = f'{self.spill_path}.failed'
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._pending = 0
+        self._pending_cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.stats = {
+            'queued': 0,
+            'written': 0,
+            'batches': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'quarantined': 0
+        }
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def submit(self, kind, **fields):
+        """
+        Queue a row for writing (fire-and-forget)
+
+        Args:
+            kind: 'prediction', 'chat_message' or 'financial_score'
+            **fields: Keyword arguments of the matching DatabaseManager.save_* method
+
+        Returns:
+            bool: True if queued, False if it was spilled to disk instead.
+                Neither means the row is written yet; no row id is available.
+        """
+        if kind not in self.WRITERS:
+            raise ValueError(f'Unknown write-behind kind: {kind}')
+
+        self.start()
+        item = (kind, fields)
+
+        with self._pending_cond:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._spill([item])
+            self._done(1)
+            return False
+
+        self._count('queued')
+        return True
+
+    def start(self):
+        """Start the writer thread (replays any spilled rows first)"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout=10):
+        """
+        Wait until everything queued so far has been written or spilled
+
+        Returns:
+            bool: True if the queue drained within the timeout
+        """
+        deadline = time.time() + timeout
+        with self._pending_cond:
+            while self._pending > 0:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._pending_cond.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=10):
+        """Flush, stop the writer, and spill anything left in memory"""
+        if not self._thread:
+            return
+        self.flush(timeout)
+        self._stopping.set()
+        self._thread.join(timeout=timeout)
+
+        leftovers = []
+        while True:
+            try:
+                leftovers.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftovers:
+            self._spill(leftovers)
+            self._done(len(leftovers))
+
+    def _run(self):
+        self._replay_spill()
+
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # Everything that piled up while the last batch was committing
+            # goes into this one transaction
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+            self._done(len(batch))
+
+    def _write_batch(self, batch):
+        """
+        Write a batch in one transaction
+
+        If the transaction fails, each row is retried on its own: rows that
+        still fail because the database is busy are spilled, rows that fail
+        for any other reason are quarantined.
+
+        Returns:
+            int: Rows written
+        """
+        try:
+            self._write_rows(batch)
+            self._count('written', len(batch))
+            self._count('batches')
+            return len(batch)
+        except Exception as e:
+            print(f"⚠️  Write-behind batch failed ({len(batch)} rows), retrying rows one by one: {e}")
+
+        written = 0
+        retry, bad = [], []
+        for item in batch:
+            try:
+                self._write_rows([item])
+                written += 1
+            except sqlite3.OperationalError:
+                retry.append(item)
+            except Exception as e:
+                print(f"⚠️  Quarantining write-behind {item[0]} row: {e}")
+                bad.append(item)
+
+        self._count('written', written)
+        if retry:
+            self._spill(retry)
+        if bad:
+            self._spill(bad, self.quarantine_path)
+            self._count('quarantined', len(bad))
+        return written
+
+    def _write_rows(self, items):
+        grouped = {}
+        for kind, fields in items:
+            grouped.setdefault(kind, []).append(fields)
+
+        with self.db.connection():
+            for kind, rows in grouped.items():
+                getattr(self.db, self.WRITERS[kind])(rows)
+
+    def _done(self, count):
+        with self._pending_cond:
+            self._pending -= count
+            self._pending_cond.notify_all()
+
+    def _spill(self, items, path=None):
+        """Append rows to the spill (or quarantine) file and fsync it"""
+        path = path or self.spill_path
+        try:
+            with self._spill_lock, _file_lock(f'{self.spill_path}.lock'):
+                with open(path, 'a', encoding='utf-8') as f:
+                    for kind, fields in items:
+                        f.write(json.dumps({'kind': kind, 'fields': fields}, default=_json_default) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+            if path == self.spill_path:
+                self._count('spilled', len(items))
+        except OSError as e:
+            print(f"❌ Could not spill {len(items)} write-behind rows: {e}")
+
+    def _replay_spill(self):
+        """
+        Write rows left in the spill file by a previous run
+
+        Only one process replays at a time; the others skip it. The spill
+        file is moved to the .replay file, which is removed only after every
+        row in it was written, spilled again or quarantined, so a crash
+        mid-replay leaves it to be replayed on the next start (rows already
+        written by then are written again: replay is at-least-once).
+        """
+        with _file_lock(f'{self.spill_path}.replay.lock', blocking=False) as acquired:
+            if not acquired:
+                return
+
+            with self._spill_lock, _file_lock(f'{self.spill_path}.lock'):
+                if os.path.exists(self.spill_path):
+                    if os.path.exists(self.replay_path):
+                        # Leftover from a crashed replay: add to it, never overwrite it
+                        with open(self.spill_path, encoding='utf-8') as src, \
+                                open(self.replay_path, 'a', encoding='utf-8') as dst:
+                            dst.write(src.read())
+                            dst.flush()
+                            os.fsync(dst.fileno())
+                        os.remove(self.spill_path)
+                    else:
+                        os.replace(self.spill_path, self.replay_path)
+                if not os.path.exists(self.replay_path):
+                    return
+
+            items = []
+            with open(self.replay_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        items.append((record['kind'], record['fields']))
+                    except (ValueError, KeyError):
+                        continue  # torn final line from a crash mid-write
+
+            replayed = 0
+            for start in range(0, len(items), self.batch_size):
+                replayed += self._write_batch(items[start:start + self.batch_size])
+            self._count('replayed', replayed)
+
+            os.remove(self.replay_path)
+            if items:
+                print(f"♻️  Replayed {replayed} of {len(items)} spilled write-behind rows")
+
+    def get_stats(self):
+        """
+        Get queue statistics
+
+        Returns:
+            dict: Counters plus current queue depth
+        """
+        with self._stats_lock:
+            return {**self.stats, 'depth': self._queue.qsize()}
+
+
+def _json_default(value):
+    """Serialize numpy scalars and other stragglers for the spill file"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+# One queue per database file, flushed at interpreter exit
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def is_enabled():
+    return os.getenv('WRITE_BEHIND_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+
+def get_write_behind(db):
+    """
+    Get (or create) the shared write-behind queue for a DatabaseManager's file
+
+    Args:
+        db: DatabaseManager instance
+
+    Returns:
+        WriteBehindQueue: Shared queue
+    """
+    key = os.path.abspath(db.db_path)
+    with _queues_lock:
+        wb = _queues.get(key)
+        if wb is None:
+            wb = WriteBehindQueue(
+                db,
+                max_queue_size=int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', 1000)),
+                batch_size=int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 100)),
+                flush_interval=float(os.getenv('WRITE_BEHIND_FLUSH_MS', 50)) / 1000,
+                spill_path=os.getenv('WRITE_BEHIND_SPILL_PATH')
+            )
+            _queues[key] = wb
+        return wb
+
+
+def _shutdown_all():
+    for wb in list(_queues.values()):
+        wb.shutdown()
+
+
+atexit.register(_shutdown_all)
+
+
+# Convenience functions: queue the write, or write synchronously when disabled.
+# They return nothing either way, so callers cannot come to rely on a row id.
+def queue_prediction(db, **fields):
+    """Save a prediction row via the write-behind queue (fire-and-forget)"""
+    if not is_enabled():
+        db.save_prediction(**fields)
+    else:
+        get_write_behind(db).submit('prediction', **fields)
+
+
+def queue_chat_message(db, **fields):
+    """Save a chat message row via the write-behind queue (fire-and-forget)"""
+    if not is_enabled():
+        db.save_chat_message(**fields)
+    else:
+        get_write_behind(db).submit('chat_message', **fields)
+
+
+def queue_financial_score(db, **fields):
+    """Save a financial score row via the write-behind queue (fire-and-forget)"""
+    if not is_enabled():
+        db.save_financial_score(**fields)
+    else:
+        get_write_behind(db).submit('financial_score', **fields)
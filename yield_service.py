@@ -6,16 +6,9 @@ Handles yield prediction, confidence scoring, and preparation checklists
 import os
 import json
 from datetime import datetime, timedelta
-import google.generativeai as genai
+from llm_client import generate_text, llm_available
 from database import DatabaseManager
 
-# Initialize Gemini AI
-api_key = os.getenv('GEMINI_API_KEY')
-if api_key:
-    genai.configure(api_key=api_key)
-    gemini_model = genai.GenerativeModel('gemini-2.5-flash')
-else:
-    gemini_model = None
 
 db = DatabaseManager()
 
@@ -256,7 +249,7 @@ def predict_yield(user_id, crop_type, planting_date, farm_data=None):
     confidence_score = calculate_confidence(data_completeness, weather_stability)
     
     # Use AI for prediction if available
-    if gemini_model and farm_data:
+    if llm_available() and farm_data:
         try:
             # Build context
             context = f"""Crop: {crop_type}
@@ -299,10 +292,10 @@ Format as JSON:
   "recommendations": ["rec1", "rec2", ...]
 }}"""
             
-            response = gemini_model.generate_content(prompt)
+            response_text = generate_text(prompt, caller='yield')
             
-            if response and response.text:
-                text = response.text.strip()
+            if response_text:
+                text = response_text.strip()
                 text = text.replace('```json', '').replace('```', '').strip()
                 
                 try: